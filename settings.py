@@ -1,27 +1,121 @@
+from __future__ import annotations
+
 import os
 import numpy as np
 
-class Settings:
-    log_path = '.logs'
-    live_fps = 100
-    frame_save_path = os.path.join('sims', 'data', 'hurdles', 'frames')
-    video_out_path = os.path.join('/mnt', 'c', 'Users', 'eugen', 'Desktop', 'simsdata', 'new')
-    video_fps = 30
-
-    map_shape = np.array([640, 480])
-    gravity = np.array([0, -1])
-    frames = 1000
-
-    hurdler_height = 30
-    hurdler_width = 30
-    hurdler_x_spawn = 100
-    hurdler_jump_speed = 17
-    jump_interval = 15
-
-    hurdle_height = 50
-    hurdle_width = 50
-    hurdle_drift = np.array([-10, 0])
-    hurdle_spawn_x = 640
-
-    nbit_generations = 20
-    algo_runs = 100
+class Config:
+    """Immutable configuration of a run. Passed explicitly to Simulation, gameobjects, physics,
+        courses and trainers so runs with different settings can share a process.
+        Fields default to DEFAULTS. replace returns a validated copy
+        with some fields overridden, so per run overrides are cheap. Configs pickle, so they
+        can be sent to worker processes.
+
+    Raises:
+        TypeError: Raised on unknown fields
+        ValueError: Raised on invalid values
+        AttributeError: Raised on assignment
+    """
+    DEFAULTS = {
+        'log_path': '.logs',
+        'live_fps': 100,
+        'frame_save_path': os.path.join('sims', 'data', 'hurdles', 'frames'),
+        'video_out_path': os.path.join('/mnt', 'c', 'Users', 'eugen', 'Desktop', 'simsdata', 'new'),
+        'video_fps': 30,
+
+        'map_shape': np.array([640, 480]),
+        'gravity': np.array([0, -1]),
+        'frames': 1000,
+
+        'hurdler_height': 30,
+        'hurdler_width': 30,
+        'hurdler_x_spawn': 100,
+        'hurdler_jump_speed': 17,
+        'jump_interval': 15,
+
+        'hurdle_height': 50,
+        'hurdle_width': 50,
+        'hurdle_drift': np.array([-10, 0]),
+        'hurdle_spawn_x': 640,
+
+        'nbit_generations': 20,
+        'algo_runs': 100,
+    }
+    POSITIVE = (
+        'live_fps', 'video_fps', 'frames', 'hurdler_height', 'hurdler_width', 'hurdler_jump_speed',
+        'jump_interval', 'hurdle_height', 'hurdle_width', 'hurdle_spawn_x', 'nbit_generations', 'algo_runs')
+    VECTORS = ('map_shape', 'gravity', 'hurdle_drift')
+    __slots__ = tuple(DEFAULTS)
+    unknown_field_msg = 'unknown config fields {fields}'
+    invalid_positive_msg = '{field} must be a positive integer, got {value}'
+    invalid_vector_msg = '{field} must have shape (2,), got {value}'
+    invalid_value_msg = '{field} {reason}, got {value}'
+    frozen_msg = 'Config is immutable, use replace'
+
+    def __init__(self, **overrides):
+        unknown = sorted(set(overrides) - set(self.DEFAULTS))
+        if len(unknown) > 0:
+            raise TypeError(self.unknown_field_msg.format(fields=unknown))
+        for field, default in self.DEFAULTS.items():
+            value = overrides.get(field, default)
+            if field in self.VECTORS:
+                value = np.array(value)
+                value.flags.writeable = False
+            object.__setattr__(self, field, value)
+        self.validate()
+
+    def validate(self):
+        for field in self.POSITIVE:
+            value = getattr(self, field)
+            if not isinstance(value, (int, np.integer)) or value < 1:
+                raise ValueError(self.invalid_positive_msg.format(field=field, value=value))
+        for field in self.VECTORS:
+            value = getattr(self, field)
+            if value.shape != (2,):
+                raise ValueError(self.invalid_vector_msg.format(field=field, value=value))
+        if (self.map_shape < 1).any():
+            raise ValueError(self.invalid_value_msg.format(
+                field='map_shape', reason='must be positive', value=self.map_shape))
+        if self.hurdle_drift[0] >= 0:
+            raise ValueError(self.invalid_value_msg.format(
+                field='hurdle_drift', reason='must move hurdles left', value=self.hurdle_drift))
+        if self.hurdler_x_spawn < 0:
+            raise ValueError(self.invalid_value_msg.format(
+                field='hurdler_x_spawn', reason='must not be negative', value=self.hurdler_x_spawn))
+
+    def __setattr__(self, field: str, value: any):
+        raise AttributeError(self.frozen_msg)
+
+    def __delattr__(self, field: str):
+        raise AttributeError(self.frozen_msg)
+
+    def __getstate__(self) -> dict:
+        return self.to_dict()
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    def __eq__(self, other: Config) -> bool:
+        if not isinstance(other, Config):
+            return NotImplemented
+        return all(np.array_equal(getattr(self, field), getattr(other, field)) for field in self.DEFAULTS)
+
+    def __hash__(self):
+        return hash(tuple(str(getattr(self, field)) for field in self.DEFAULTS))
+
+    def __repr__(self):
+        overrides = ', '.join(
+            f'{field}={value!r}' for field, value in self.to_dict().items()
+            if not np.array_equal(value, self.DEFAULTS[field]))
+        return f'{self.__class__.__name__}({overrides})'
+
+    def replace(self, **overrides) -> Config:
+        """Copy with overridden fields
+        """
+        return self.__class__(**{**self.to_dict(), **overrides})
+
+    def to_dict(self) -> dict:
+        return {
+            field: getattr(self, field).tolist() if field in self.VECTORS else getattr(self, field)
+            for field in self.DEFAULTS}
+
+DEFAULT_CONFIG = Config()
@@ -0,0 +1,4 @@
+from sims import cli
+
+if __name__ == '__main__':
+    raise SystemExit(cli.main())
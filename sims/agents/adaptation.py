@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import numpy as np
+
+from sims.agents import genetics
+from sims.agents import genomes
+
+class MutationControl:
+    """Sets mutation rates of offspring before they are mutated and adapts from statistics
+    """
+    def apply(self, offspring: genomes.GenomeStore):
+        raise NotImplementedError()
+
+    def update(self, statistics: genetics.OnlineStatistics):
+        pass
+
+class OneFifthRule(MutationControl):
+    """Rechenberg's 1/5th success rule on one shared mutation rate (expected bit flips):
+        the rate grows while more than target of offspring beat their parents and shrinks otherwise
+
+    Args:
+        rate (float, optional): initial rate. Defaults to 1.
+        target (float, optional): target success rate. Defaults to 0.2.
+        factor (float, optional): multiplicative step. Defaults to 0.85.
+        min_rate (float, optional): Defaults to 1.
+        max_rate (float, optional): Defaults to 8.
+    """
+    def __init__(
+        self, rate: float=1, target: float=0.2, factor: float=0.85,
+        min_rate: float=1, max_rate: float=8):
+        self.rate = rate
+        self.target = target
+        self.factor = factor
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+
+    def apply(self, offspring: genomes.GenomeStore):
+        offspring.mut_rates[:] = self.rate
+
+    def update(self, statistics: genetics.OnlineStatistics):
+        success_rate = statistics.latest('success_rate')
+        if np.isnan(success_rate) or success_rate == self.target:
+            return
+        step = 1 / self.factor if success_rate > self.target else self.factor
+        self.rate = float(np.clip(self.rate * step, self.min_rate, self.max_rate))
+
+class SelfAdaptive(MutationControl):
+    """Self-adaptive per genome mutation rates. Each offspring inherits the rate of its first
+        parent (see GenomeStore.crossover) perturbed log-normally, so rates evolve with genomes
+
+    Args:
+        tau (float, optional): standard deviation of the log rate perturbation. Defaults to 0.3.
+        min_rate (float, optional): Defaults to 1.
+        max_rate (float, optional): Defaults to 8.
+    """
+    def __init__(self, tau: float=0.3, min_rate: float=1, max_rate: float=8):
+        self.tau = tau
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+
+    def apply(self, offspring: genomes.GenomeStore):
+        perturbation = np.exp(self.tau * np.random.standard_normal(len(offspring)))
+        np.clip(offspring.mut_rates * perturbation, self.min_rate, self.max_rate, out=offspring.mut_rates)
+
+class OperatorScheduler:
+    """Schedules crossover against copying parents (mutation only) by probability matching
+        on running success rates of each operator. Crossover of near identical parents does
+        nothing, so the crossover probability is also scaled down while bit diversity is below
+        diversity_floor
+
+    Args:
+        probability (float, optional): initial crossover probability. Defaults to 0.9.
+        min_probability (float, optional): lowest probability of either operator. Defaults to 0.1.
+        learning_rate (float, optional): weight of the latest generation in running
+            success rates. Defaults to 0.3.
+        diversity_floor (float, optional): Defaults to 0.05.
+    """
+    def __init__(
+        self, probability: float=0.9, min_probability: float=0.1,
+        learning_rate: float=0.3, diversity_floor: float=0.05):
+        self.probability = probability
+        self.min_probability = min_probability
+        self.learning_rate = learning_rate
+        self.diversity_floor = diversity_floor
+        self.quality = np.array([probability, 1 - probability])
+
+    def crossover_mask(self, pairs: int) -> np.ndarray:
+        """Whether each pair of parents is crossed over, or copied
+        """
+        return np.random.rand(pairs) < self.probability
+
+    def update(self, statistics: genetics.OnlineStatistics):
+        rewards = np.array([
+            statistics.latest('crossover_success_rate'), statistics.latest('copy_success_rate')])
+        observed = ~np.isnan(rewards)
+        self.quality[observed] += self.learning_rate * (rewards[observed] - self.quality[observed])
+        total = self.quality.sum()
+        share = self.quality[0] / total if total > 0 else 0.5
+        probability = self.min_probability + (1 - 2 * self.min_probability) * share
+        diversity = statistics.latest('diversity')
+        if not np.isnan(diversity) and diversity < self.diversity_floor:
+            probability *= diversity / self.diversity_floor
+        self.probability = float(np.clip(probability, self.min_probability, 1 - self.min_probability))
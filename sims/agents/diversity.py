@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import numpy as np
+
+from sims.agents import genomes
+
+POPCOUNT_TABLE = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+def popcount(packed: np.ndarray) -> np.ndarray:
+    """Number of set bits of every uint8, with np.bitwise_count where available
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(packed)
+    return POPCOUNT_TABLE[packed]
+
+def hamming_distances(packed: np.ndarray, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Hamming distance of row pairs of a packed bit matrix by popcount of their xor
+
+    Args:
+        packed (np.ndarray): uint8 rows packed with np.packbits(matrix, axis=1)
+        first (np.ndarray): first row of each pair
+        second (np.ndarray): second row of each pair
+
+    Returns:
+        np.ndarray: distance of each pair
+    """
+    return popcount(packed[first] ^ packed[second]).sum(axis=1, dtype=np.int64)
+
+def mean_hamming(matrix: np.ndarray) -> float:
+    """Mean Hamming distance over all pairs of rows in O(rows * width): column j
+        contributes ones_j * zeros_j differing pairs
+    """
+    count = matrix.shape[0]
+    if count < 2:
+        return 0.0
+    ones = matrix.sum(axis=0, dtype=np.int64)
+    return float((ones * (count - ones)).sum() / (count * (count - 1) / 2))
+
+def entropy(matrix: np.ndarray) -> float:
+    """Mean binary entropy of the columns, in bits. 0 once every column has converged
+    """
+    if matrix.size == 0:
+        return 0.0
+    ones = matrix.mean(axis=0)
+    p = np.stack([ones, 1 - ones])
+    logs = np.log2(p, out=np.zeros_like(p), where=p > 0)
+    return float(-(p * logs).sum(axis=0).mean())
+
+def unique_count(packed: np.ndarray, lengths: np.ndarray=None) -> int:
+    """Number of distinct rows of a packed bit matrix. Rows of different lengths are
+        distinct even when left padding makes their bits equal
+
+    Args:
+        packed (np.ndarray): uint8 rows packed with np.packbits(matrix, axis=1)
+        lengths (np.ndarray, optional): genome length of each row. Defaults to None.
+    """
+    if lengths is not None:
+        length_bytes = np.asarray(lengths, dtype='>i8').view(np.uint8).reshape(-1, 8)
+        packed = np.concatenate([packed, length_bytes], axis=1)
+    packed = np.ascontiguousarray(packed)
+    rows = packed.view(np.dtype((np.void, packed.shape[1]))).reshape(-1)
+    return int(np.unique(rows).size)
+
+class Diversity:
+    """Diversity of a generation of bit genomes
+
+    Args:
+        unique (int): number of distinct genomes
+        hamming (float): mean pairwise Hamming distance
+        entropy (float): mean bit-wise entropy
+        width (int): bits per genome after left padding
+    """
+    __slots__ = ('unique', 'hamming', 'entropy', 'width')
+
+    def __init__(self, unique: int, hamming: float, entropy: float, width: int):
+        self.unique = unique
+        self.hamming = hamming
+        self.entropy = entropy
+        self.width = width
+
+    @classmethod
+    def from_store(cls, store: genomes.GenomeStore) -> Diversity:
+        matrix = store.fixed_width()
+        packed = np.packbits(matrix, axis=1)
+        return cls(
+            unique_count(packed, store.lengths), mean_hamming(matrix), entropy(matrix), matrix.shape[1])
+
+    @property
+    def normalized_hamming(self) -> float:
+        return self.hamming / self.width if self.width > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'unique': self.unique,
+            'hamming': self.hamming,
+            'entropy': self.entropy
+        }
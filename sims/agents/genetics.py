@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import copy
+import heapq
 import json
+import os
 import re
 import time
-from unittest.result import TestResult
 
 import numpy as np
 
+from sims.agents import selection
+
 def intable(string: str) -> bool:
     try:
         int(string)
@@ -19,6 +22,7 @@ class Binary:
     """Wrapper class for python built-in binary strings with least significant byte at right
     """
     dtype = np.uint8
+    max_int64_width = 63
     invalid_literal_type_msg = 'attempted to assign literal of invalid type "{literal_type}" to Binary'
     invalid_literal_dtype_msg = 'attempted to assign literal of invalid dtype "{literal_type}" to Binary'
     invalid_literal_value_msg = 'attempted to assign literal with invalid value "{literal}" of invalid dtype to Binary'
@@ -27,6 +31,54 @@ class Binary:
     def array_to_str(arr: np.ndarray):
         return '0b' + ''.join(arr.astype(str))
 
+    @classmethod
+    def encode(cls, values: np.ndarray, width: int=None) -> np.ndarray:
+        """Bits of non-negative integers, most significant bit first
+
+        Args:
+            values (np.ndarray): integers of shape (n,)
+            width (int, optional): bits per row. Defaults to bit length of the largest value.
+
+        Returns:
+            np.ndarray: bit matrix of shape (n, width)
+        """
+        values = np.asarray(values, dtype=np.int64)
+        if width is None:
+            width = max(int(values.max(initial=0)).bit_length(), 1)
+        shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+        return ((values[:, None] >> shifts) & 1).astype(cls.dtype)
+
+    @classmethod
+    def decode(cls, bits: np.ndarray) -> np.ndarray:
+        """Integers of bit rows, most significant bit first. Inverse of encode
+
+        Args:
+            bits (np.ndarray): bits of shape (..., width)
+
+        Returns:
+            np.ndarray: int64 integers of shape (...), or Python ints if width exceeds 63 bits
+        """
+        width = bits.shape[-1]
+        if width > cls.max_int64_width:
+            powers = np.array([1 << shift for shift in range(width - 1, -1, -1)], dtype=object)
+            return bits.astype(object) @ powers
+        powers = np.left_shift(1, np.arange(width - 1, -1, -1, dtype=np.int64))
+        return bits.astype(np.int64) @ powers
+
+    @classmethod
+    def stack(cls, binaries: list[Binary]) -> np.ndarray:
+        """Bit matrix of binaries of different lengths, left padded with zeros so rows decode
+            to the same integers
+
+        Returns:
+            np.ndarray: bit matrix of shape (len(binaries), longest length)
+        """
+        width = max((len(binary) for binary in binaries), default=1)
+        bits = np.zeros((len(binaries), width), dtype=cls.dtype)
+        for row, binary in enumerate(binaries):
+            bits[row, width - len(binary):] = binary.literal
+        return bits
+
     @classmethod
     def validate_literal(cls, new_literal: np.ndarray):
         if not isinstance(new_literal, np.ndarray):
@@ -39,9 +91,12 @@ class Binary:
     def __init__(self, literal: int | str | np.ndarray):
         self._literal = None
         if isinstance(literal, int) or isinstance(literal, self.dtype):
-            self.literal = np.array([*bin(literal)][2:], dtype=self.dtype)
+            literal = int(literal)
+            width = max(literal.bit_length(), 1)
+            packed = np.frombuffer(literal.to_bytes((width + 7) // 8, 'big'), dtype=self.dtype)
+            self.literal = np.unpackbits(packed)[-width:]
         elif isinstance(literal, str):
-            self.literal = np.array([*literal[2:]], dtype=self.dtype)
+            self.literal = np.frombuffer(literal[2:].encode(), dtype=self.dtype) - ord('0')
         elif isinstance(literal, np.ndarray):
             self.literal = literal.astype(self.dtype)
         else:
@@ -51,13 +106,18 @@ class Binary:
         return self.array_to_str(self.literal)
 
     def __int__(self):
-        return int(str(self), 2)
+        return int(self.decode(self.literal))
 
     def __len__(self):
         return self.literal.size
 
     def __eq__(self, other: Binary):
-        return str(self) == str(other)
+        if not isinstance(other, Binary):
+            return NotImplemented
+        return np.array_equal(self.literal, other.literal)
+
+    def __hash__(self):
+        return hash((self.literal.size, self.literal.tobytes()))
 
     def __getitem__(self, key: slice):
         segment = self.literal[key]
@@ -217,10 +277,12 @@ class Node:
         if children is None:
             children = []
         self._children = None
+        self._size = None
+        self._depth = None
+        self.parent = parent
         self.children = children
         for child in self.children:
             child.parent = self
-        self.parent = parent
         self.nodetype = nodetype
 
     def __str__(self):
@@ -243,11 +305,90 @@ class Node:
     def children(self, new: list[Node] | Node | None):
         self.validate_children(new)
         self._children = new
+        self.invalidate()
+
+    def invalidate(self):
+        """Clears cached size and depth of current node and all of its ancestors.
+            Must be called after children are modified in place.
+        """
+        node = self
+        while node is not None:
+            node._size = None
+            node._depth = None
+            node = node.parent
 
     def depth(self):
-        if len(self.children) > 0:
-            return max([child.depth() for child in self.children]) + 1
-        return 1
+        if self._depth is None:
+            if len(self.children) > 0:
+                self._depth = max([child.depth() for child in self.children]) + 1
+            else:
+                self._depth = 1
+        return self._depth
+
+    def size(self) -> int:
+        """Number of nodes in subtree rooted at current node. Cached until invalidated
+
+        Returns:
+            int: number of nodes including current node
+        """
+        if self._size is None:
+            self._size = sum([child.size() for child in self.children]) + 1
+        return self._size
+
+    def level(self) -> int:
+        """Level of current node in its tree
+
+        Returns:
+            int: 1 for root, 2 for root's children, etc.
+        """
+        level = 1
+        node = self.parent
+        while node is not None:
+            level += 1
+            node = node.parent
+        return level
+
+    def child_index(self, child: Node) -> int:
+        """Index of child by identity (__eq__ compares whole subtrees by string)
+
+        Args:
+            child (Node): child of current node
+
+        Raises:
+            ValueError: child is not a child of current node
+
+        Returns:
+            int: index of child
+        """
+        for index, candidate in enumerate(self.children):
+            if candidate is child:
+                return index
+        raise ValueError(f'"{child}" is not a child of "{self}"')
+
+    def descendent(self, index: int) -> Node:
+        """Get descendent at index of the preorder ordering returned by descendents.
+            Uses cached subtree sizes to walk straight to the descendent
+
+        Args:
+            index (int): preorder index. 0 is current node
+
+        Raises:
+            IndexError: index out of range of subtree
+
+        Returns:
+            Node: descendent at index
+        """
+        if index < 0 or index >= self.size():
+            raise IndexError(f'descendent index {index} out of range for subtree of size {self.size()}')
+        node = self
+        while index > 0:
+            index -= 1
+            for child in node.children:
+                if index < child.size():
+                    node = child
+                    break
+                index -= child.size()
+        return node
 
     def pop_child(self, pop_index: int) -> Node:
         """Pops child at pop_index
@@ -260,6 +401,7 @@ class Node:
         """
         popped = self.children.pop(pop_index)
         popped.parent = None
+        self.invalidate()
         return popped
 
     def insert_child(self, index: int, child: Node):
@@ -271,6 +413,7 @@ class Node:
         """
         child.parent = self
         self.children.insert(index, child)
+        self.invalidate()
 
     def descendents(self) -> list[Node]:
         """Get references to current node and all its descendents
@@ -327,6 +470,15 @@ class Genotype:
     def validate_literal(cls, new_literal):
         raise NotImplementedError()
 
+    def mutation_count(self) -> int:
+        """Number of mutation operations: int(mut_rate), plus one with probability of the fractional part
+        """
+        count = int(self.mut_rate)
+        fraction = self.mut_rate - count
+        if fraction > 0 and np.random.rand() < fraction:
+            count += 1
+        return count
+
     def mutate(self):
         raise NotImplementedError()
 
@@ -347,11 +499,23 @@ class Nbit(Genotype):
     def __len__(self):
         return len(self.literal)
 
+    @staticmethod
+    def decode(genotypes: list[Nbit]) -> np.ndarray:
+        """Integers of many genotypes in one vectorized decode, see Binary.decode
+        """
+        return Binary.decode(Binary.stack([genotype.literal for genotype in genotypes]))
+
     def __getitem__(self, key):
         return self.__class__(self.literal[key], self.mut_rate)
 
+    def flips(self) -> int:
+        """Number of bits to flip, see Genotype.mutation_count
+        """
+        return self.mutation_count()
+
     def mutate(self):
-        self.literal.flip_random()
+        for _ in range(self.flips()):
+            self.literal.flip_random()
 
     def append(self, other: np.ndarray | Binary | Nbit):
         if isinstance(other, Nbit):
@@ -375,21 +539,231 @@ class Nbit(Genotype):
         offspring_b.append(self[position:])
         return offspring_a, offspring_b
 
+class TreeGenotype(Genotype):
+    """Genotype wrapping a Node tree for genetic programming.
+        Random nodes are selected through cached subtree sizes, so operators only walk
+        from the root to the selected node instead of collecting all descendents.
+
+    Args:
+        literal (Node): root of tree
+        mut_rate (float): expected number of mutation operators applied by mutate
+        arities (dict[int, int]): number of children of each nodetype. nodetypes of arity 0 are terminals
+        max_depth (int, optional): offspring deeper than max_depth are rejected. Defaults to 8.
+        max_size (int, optional): offspring with more than max_size nodes are rejected. Defaults to None.
+    """
+    invalid_arities_msg = 'arities "{arities}" must contain at least one terminal (arity 0) nodetype'
+    MUTATIONS = ('point', 'hoist', 'grow')
+
+    @classmethod
+    def validate_literal(cls, new_literal):
+        if not isinstance(new_literal, Node):
+            raise ValueError(
+                cls.invalid_literal_msg.format(
+                    literal=new_literal, genotype=cls.__name__))
+
+    @classmethod
+    def grow(
+        cls, arities: dict[int, int], max_depth: int,
+        node_class: type=Node, full: bool=False) -> Node:
+        """Generate random tree no deeper than max_depth
+
+        Args:
+            arities (dict[int, int]): number of children of each nodetype
+            max_depth (int): maximum depth of generated tree
+            node_class (type, optional): Node class of generated nodes. Defaults to Node.
+            full (bool, optional): only pick terminals at max_depth. Defaults to False.
+
+        Returns:
+            Node: root of generated tree
+        """
+        terminals = [nodetype for nodetype, arity in arities.items() if arity == 0]
+        functions = [nodetype for nodetype, arity in arities.items() if arity > 0]
+        if len(terminals) == 0:
+            raise ValueError(cls.invalid_arities_msg.format(arities=arities))
+        if max_depth <= 1 or len(functions) == 0:
+            candidates = terminals
+        elif full:
+            candidates = functions
+        else:
+            candidates = terminals + functions
+        nodetype = candidates[int(np.random.rand() * len(candidates))]
+        children = [
+            cls.grow(arities, max_depth - 1, node_class=node_class, full=full)
+            for _ in range(arities[nodetype])]
+        return node_class(children=children, nodetype=nodetype)
+
+    def __init__(
+        self, literal: Node, mut_rate: float, arities: dict[int, int],
+        max_depth: int=8, max_size: int=None):
+        super().__init__(literal, mut_rate)
+        self.arities = arities
+        self.max_depth = max_depth
+        self.max_size = max_size
+
+    def __len__(self):
+        return self.literal.size()
+
+    def depth(self) -> int:
+        return self.literal.depth()
+
+    def within_limits(self) -> bool:
+        """Bloat control check
+
+        Returns:
+            bool: True if tree is within max_depth and max_size
+        """
+        if self.literal.depth() > self.max_depth:
+            return False
+        return self.max_size is None or self.literal.size() <= self.max_size
+
+    def random_position(self) -> int:
+        return int(np.random.rand() * self.literal.size())
+
+    def detach(self, node: Node) -> tuple[Node, int]:
+        """Detach node from tree
+
+        Args:
+            node (Node): node in tree
+
+        Returns:
+            tuple[Node, int]: former parent and index of node. (None, None) if node was root
+        """
+        if node.parent is None:
+            return None, None
+        parent = node.parent
+        index = parent.child_index(node)
+        parent.pop_child(index)
+        return parent, index
+
+    def attach(self, parent: Node, index: int, node: Node):
+        """Attach node to tree. Node becomes root if parent is None
+        """
+        if parent is None:
+            node.parent = None
+            self.literal = node
+        else:
+            parent.insert_child(index, node)
+
+    def crossover(self, other: TreeGenotype, position: tuple[int, int]=None) -> tuple[TreeGenotype, TreeGenotype]:
+        """Subtree crossover where subtree at position[0] of self and position[1] of other are swapped.
+            Offspring exceeding max_depth or max_size are replaced by copies of their parent
+
+        Args:
+            other (TreeGenotype): other parent
+            position (tuple[int, int], optional): preorder indices of swapped subtrees. Defaults to random.
+
+        Returns:
+            tuple[TreeGenotype, TreeGenotype]: offspring
+        """
+        if position is None:
+            position = self.random_position(), other.random_position()
+        offspring_a = copy.deepcopy(self)
+        offspring_b = copy.deepcopy(other)
+        node_a = offspring_a.literal.descendent(position[0])
+        node_b = offspring_b.literal.descendent(position[1])
+        parent_a, index_a = offspring_a.detach(node_a)
+        parent_b, index_b = offspring_b.detach(node_b)
+        offspring_a.attach(parent_a, index_a, node_b)
+        offspring_b.attach(parent_b, index_b, node_a)
+        if not offspring_a.within_limits():
+            offspring_a = copy.deepcopy(self)
+        if not offspring_b.within_limits():
+            offspring_b = copy.deepcopy(other)
+        return offspring_a, offspring_b
+
+    def point_mutate(self, position: int=None):
+        """Change nodetype of node at position to another nodetype of the same arity
+        """
+        if position is None:
+            position = self.random_position()
+        node = self.literal.descendent(position)
+        candidates = [
+            nodetype for nodetype, arity in self.arities.items()
+            if arity == len(node.children) and nodetype != node.nodetype]
+        if len(candidates) > 0:
+            node.nodetype = candidates[int(np.random.rand() * len(candidates))]
+
+    def hoist_mutate(self, position: int=None):
+        """Replace tree with subtree at position. Never grows the tree
+        """
+        if position is None:
+            position = self.random_position()
+        node = self.literal.descendent(position)
+        self.detach(node)
+        self.attach(None, None, node)
+
+    def grow_mutate(self, position: int=None):
+        """Replace subtree at position with random subtree that keeps the tree within max_depth.
+            Rejected if the result would exceed max_size
+        """
+        if position is None:
+            position = self.random_position()
+        node = self.literal.descendent(position)
+        grown = self.grow(
+            self.arities, self.max_depth - node.level() + 1, node_class=type(self.literal))
+        if self.max_size is not None:
+            if self.literal.size() - node.size() + grown.size() > self.max_size:
+                return
+        parent, index = self.detach(node)
+        self.attach(parent, index, grown)
+
+    def mutate(self):
+        """Apply mutation_count operators, each picked at random from MUTATIONS
+        """
+        for _ in range(self.mutation_count()):
+            mutation = self.MUTATIONS[int(np.random.rand() * len(self.MUTATIONS))]
+            getattr(self, f'{mutation}_mutate')()
+
 class Individual:
-    """Abstract Individual returned by Environment.run
+    """Abstract Individual returned by Environment.run.
+        Parents are referenced by index into the previous generation, so an individual
+        does not keep its ancestors alive.
+
+        fitness is the scalar fitness. objectives is optional vector fitness, all maximized,
+        used by multi-objective selection (see sims.agents.selection).
+        Given a factory instead of a phenotype, the phenotype is built from the genotype on first access.
 
     Raises:
-        ValueError: Raised if fitness or history is accessed before initialization
+        ValueError: Raised if fitness, objectives or history is accessed before initialization
     """
+    __slots__ = (
+        'genotype', 'parents', 'index', '_phenotype', '_factory', '_fitness', '_objectives', '_history')
     uninitialized_post_process = 'post-process data accessed before initialized'
 
-    def __init__(self, genotype: Genotype, phenotype: any, parents: list[Individual]=None):
+    def __init__(
+        self, genotype: Genotype, phenotype: any=None, parents: tuple[int, ...]=None,
+        factory: callable=None):
         self.genotype = genotype
-        self.phenotype = phenotype
+        self._phenotype = phenotype
+        self._factory = factory
         self.parents = parents
+        self.index = None
         self._fitness = None
+        self._objectives = None
         self._history = None
 
+    @property
+    def phenotype(self):
+        if self._phenotype is None and self._factory is not None:
+            self._phenotype = self._factory(self.genotype)
+        return self._phenotype
+
+    @phenotype.setter
+    def phenotype(self, phenotype: any):
+        self._phenotype = phenotype
+
+    @property
+    def materialized(self) -> bool:
+        """Whether the phenotype has been built
+        """
+        return self._phenotype is not None
+
+    @property
+    def evaluated(self) -> bool:
+        """Whether fitness has been set, e.g. for elites carried over from the previous generation
+        """
+        return self._fitness is not None
+
     @property
     def fitness(self):
         if self._fitness is not None:
@@ -400,6 +774,16 @@ class Individual:
     def fitness(self, fitness: float):
         self._fitness = fitness
 
+    @property
+    def objectives(self) -> np.ndarray:
+        if self._objectives is not None:
+            return self._objectives
+        raise ValueError(self.uninitialized_post_process)
+
+    @objectives.setter
+    def objectives(self, objectives: np.ndarray):
+        self._objectives = np.asarray(objectives, dtype=np.float64)
+
     @property
     def history(self):
         if self._history is not None:
@@ -410,12 +794,32 @@ class Individual:
     def history(self, history: float):
         self._history = history
 
-    def report(self) -> IndividualReport:
+    def elite(self) -> Individual:
+        """Copy carried over to the next generation with its evaluation, parented by this individual
+        """
+        elite = self.__class__(copy.deepcopy(self.genotype), parents=(self.index,), factory=self._factory)
+        elite._fitness = self._fitness
+        elite._objectives = self._objectives
+        elite._history = self._history
+        return elite
+
+    def report(self, parent_literals: list[str]=None) -> IndividualReport:
+        """Report of individual
+
+        Args:
+            parent_literals (list[str], optional): genotype literals of the generation parents
+                index in to. Parent literals are omitted if not given. Defaults to None.
+
+        Returns:
+            IndividualReport: report
+        """
         literal = str(self.genotype.literal)
-        parent_literals = None
-        if self.parents is not None:
-            parent_literals = [str(parent.genotype.literal) for parent in self.parents]
-        report = IndividualReport(literal, parent_literals, self.fitness)
+        if self.parents is not None and parent_literals is not None:
+            parent_literals = [parent_literals[parent] for parent in self.parents]
+        else:
+            parent_literals = None
+        objectives = self._objectives.tolist() if self._objectives is not None else None
+        report = IndividualReport(literal, parent_literals, self.fitness, objectives)
         return report
 
 class Report:
@@ -443,17 +847,20 @@ class IndividualReport(Report):
         self,
         genotype_literal: str,
         parent_genotype_literals: list[str],
-        fitness: float):
+        fitness: float,
+        objectives: list[float]=None):
         self.literal = genotype_literal
         self.parent_literals = parent_genotype_literals
         self.fitness = fitness
+        self.objectives = objectives
 
     def to_dict(self) -> dict:
         return {
             'type': 'individual',
             'literal': self.literal,
             'parent_literals': self.parent_literals,
-            'fitness': self.fitness
+            'fitness': self.fitness,
+            'objectives': self.objectives
         }
 
 # TODO: Add generation number to generation report
@@ -462,10 +869,14 @@ class GenerationReport(Report):
         self,
         individuals: list[IndividualReport],
         highest_fitness: float,
-        average_fitness: float):
+        average_fitness: float,
+        pareto_front: list[int]=None,
+        diversity: dict=None):
         self.individuals = individuals
         self.highest_fitness = highest_fitness
         self.average_fitness = average_fitness
+        self.pareto_front = pareto_front
+        self.diversity = diversity
 
     def to_dict(self) -> dict:
         indiv_reports = [individual.to_dict() for individual in self.individuals]
@@ -473,18 +884,328 @@ class GenerationReport(Report):
             'type': 'generation',
             'individuals': indiv_reports,
             'highest_fitness': self.highest_fitness,
-            'average_fitness': self.average_fitness
+            'average_fitness': self.average_fitness,
+            'pareto_front': self.pareto_front,
+            'diversity': self.diversity
         }
 
+class GenerationSummary(GenerationReport):
+    """GenerationReport of an archived generation that keeps a compact fitness array
+        instead of individual reports
+    """
+    def __init__(
+        self, fitnesses: np.ndarray, highest_fitness: float, average_fitness: float,
+        pareto_front: list[int]=None, diversity: dict=None):
+        super().__init__([], highest_fitness, average_fitness, pareto_front, diversity)
+        self.fitnesses = fitnesses
+
+    @classmethod
+    def from_report(cls, report: GenerationReport) -> GenerationSummary:
+        fitnesses = np.array([individual.fitness for individual in report.individuals], dtype=np.float32)
+        return cls(
+            fitnesses, report.highest_fitness, report.average_fitness,
+            report.pareto_front, report.diversity)
+
+    def to_dict(self) -> dict:
+        return {
+            'type': 'generation_summary',
+            'fitnesses': self.fitnesses.tolist(),
+            'highest_fitness': self.highest_fitness,
+            'average_fitness': self.average_fitness,
+            'pareto_front': self.pareto_front,
+            'diversity': self.diversity
+        }
+
+class OnlineStatistics:
+    """Per generation statistics of a population, appended one generation at a time
+        to a preallocated array that doubles when full.
+
+        Success is an offspring scoring above its best parent. Individuals with a NaN parent
+        fitness, such as elites, are not offspring. Success rates are NaN
+        for generations without parents or operator. diversity is the mean pairwise Hamming
+        distance divided by genome width, unique the number of distinct genomes and entropy
+        the mean bit-wise entropy, see sims.agents.diversity. Subclasses of GeneticAlgorithm
+        fill the fields their operators provide
+    """
+    FIELDS = (
+        'best', 'mean', 'std', 'improvement', 'success_rate',
+        'crossover_success_rate', 'copy_success_rate', 'diversity', 'unique', 'entropy')
+
+    def __init__(self, capacity: int=64):
+        self.values = np.full((capacity, len(self.FIELDS)), np.nan)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.values[:self.count, self.FIELDS.index(field)]
+
+    def latest(self, field: str) -> float:
+        return float(self[field][-1]) if self.count > 0 else np.nan
+
+    def update(
+        self, fitnesses: np.ndarray, parent_fitnesses: np.ndarray=None,
+        crossed: np.ndarray=None, diversity: any=None) -> np.ndarray:
+        """Append statistics of a generation
+
+        Args:
+            fitnesses (np.ndarray): fitness of each individual
+            parent_fitnesses (np.ndarray, optional): best parent fitness of each individual,
+                NaN if not bred
+            crossed (np.ndarray, optional): whether each individual was bred by crossover
+            diversity (sims.agents.diversity.Diversity, optional): diversity of the genomes
+
+        Returns:
+            np.ndarray: the appended row, in FIELDS order
+        """
+        if self.count == len(self.values):
+            self.values = np.concatenate([self.values, np.full_like(self.values, np.nan)])
+        fitnesses = np.asarray(fitnesses, dtype=np.float64)
+        row = self.values[self.count]
+        row[0] = fitnesses.max()
+        row[1] = fitnesses.mean()
+        row[2] = fitnesses.std()
+        row[3] = row[0] - self.latest('best') if self.count > 0 else 0.0
+        if parent_fitnesses is not None:
+            bred = ~np.isnan(parent_fitnesses)
+            success = fitnesses[bred] > parent_fitnesses[bred]
+            row[4] = success.mean() if success.size > 0 else np.nan
+            if crossed is not None:
+                crossed = crossed[bred]
+                row[5] = success[crossed].mean() if crossed.any() else np.nan
+                row[6] = success[~crossed].mean() if not crossed.all() else np.nan
+        if diversity is not None:
+            row[7] = diversity.normalized_hamming
+            row[8] = diversity.unique
+            row[9] = diversity.entropy
+        self.count += 1
+        return row
+
+class Genealogy:
+    """Lineage of every individual of a run as an int32 table with one row per individual,
+        in order of generation then index. Parents are rows of the table, -1 when absent, so
+        ancestry is traced across generations by chasing indices one generation at a time,
+        without keeping individuals alive. The table doubles when full
+
+    Args:
+        capacity (int, optional): initial number of rows. Defaults to 1024.
+    """
+    SEED = 0
+    CROSSOVER = 1
+    COPY = 2
+    ELITE = 3
+    OPERATORS = ('seed', 'crossover', 'copy', 'elite')
+    FIELDS = ('generation', 'index', 'parent_a', 'parent_b', 'operator')
+    invalid_parents_msg = 'parent indices must be in [-1, {size}) of the previous generation'
+
+    def __init__(self, capacity: int=1024):
+        self.table = np.full((capacity, len(self.FIELDS)), -1, dtype=np.int32)
+        self.count = 0
+        self.starts = [0]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.table[:self.count, self.FIELDS.index(field)]
+
+    @property
+    def generations(self) -> int:
+        return len(self.starts) - 1
+
+    def rows(self, generation: int) -> np.ndarray:
+        """Rows of the individuals of a generation
+        """
+        return np.arange(self.starts[generation], self.starts[generation + 1])
+
+    def append(self, parents: np.ndarray, operators: np.ndarray) -> np.ndarray:
+        """Append a generation
+
+        Args:
+            parents (np.ndarray): indices of parents in the previous generation,
+                of shape (individuals, 2), -1 when absent
+            operators (np.ndarray): operator of each individual, one of SEED, CROSSOVER, COPY, ELITE
+
+        Returns:
+            np.ndarray: rows of the generation
+        """
+        parents = np.asarray(parents, dtype=np.int64).reshape(-1, 2)
+        size = len(parents)
+        previous_start = self.starts[-2] if self.generations > 0 else 0
+        previous_size = self.starts[-1] - previous_start
+        if ((parents < -1) | (parents >= previous_size)).any():
+            raise ValueError(self.invalid_parents_msg.format(size=previous_size))
+        while self.count + size > len(self.table):
+            self.table = np.concatenate([self.table, np.full_like(self.table, -1)])
+        block = self.table[self.count:self.count + size]
+        block[:, 0] = self.generations
+        block[:, 1] = np.arange(size)
+        block[:, 2:4] = np.where(parents >= 0, parents + previous_start, -1)
+        block[:, 4] = operators
+        rows = np.arange(self.count, self.count + size)
+        self.count += size
+        self.starts.append(self.count)
+        return rows
+
+    def parents(self, rows: np.ndarray) -> np.ndarray:
+        """Parent rows of rows, of shape (rows, 2), -1 when absent
+        """
+        return self.table[rows, 2:4]
+
+    def path(self, row: int) -> np.ndarray:
+        """Rows from a founder to row following the first parent, the direct line of row
+        """
+        path = [row]
+        while self.table[path[-1], 2] >= 0:
+            path.append(int(self.table[path[-1], 2]))
+        return np.array(path[::-1])
+
+    def ancestors(self, rows: np.ndarray) -> np.ndarray:
+        """Bool mask over all rows of every ancestor of rows
+        """
+        mask = np.zeros(self.count, dtype=bool)
+        frontier = np.unique(np.atleast_1d(rows))
+        while frontier.size > 0:
+            parents = self.parents(frontier).ravel()
+            frontier = np.unique(parents[parents >= 0])
+            mask[frontier] = True
+        return mask
+
+    def founders(self, rows: np.ndarray) -> np.ndarray:
+        """Rows without parents that rows descend from, including rows themselves if founders
+        """
+        mask = self.ancestors(rows)
+        mask[rows] = True
+        return np.flatnonzero(mask & (self['parent_a'] < 0) & (self['parent_b'] < 0))
+
+    def descendants(self, rows: np.ndarray) -> np.ndarray:
+        """Bool mask over all rows of every descendant of rows, propagated forward
+            one generation at a time
+        """
+        rows = np.atleast_1d(rows)
+        mask = np.zeros(self.count, dtype=bool)
+        if rows.size == 0:
+            return mask
+        mask[rows] = True
+        first = int(self['generation'][rows].min())
+        for generation in range(first + 1, self.generations):
+            block = slice(self.starts[generation], self.starts[generation + 1])
+            parent_a, parent_b = self.table[block, 2], self.table[block, 3]
+            mask[block] |= ((parent_a >= 0) & mask[parent_a]) | ((parent_b >= 0) & mask[parent_b])
+        mask[rows] = False
+        return mask
+
+    def offspring_counts(self) -> np.ndarray:
+        """Number of children of every row
+        """
+        parent_a, parent_b = self['parent_a'], self['parent_b']
+        counts = np.bincount(parent_a[parent_a >= 0], minlength=self.count)
+        second = (parent_b >= 0) & (parent_b != parent_a)
+        return counts + np.bincount(parent_b[second], minlength=self.count)
+
+    @classmethod
+    def from_dict(cls, as_dict: dict) -> Genealogy:
+        columns = [np.asarray(as_dict[field], dtype=np.int32) for field in cls.FIELDS]
+        genealogy = cls(max(len(columns[0]), 1))
+        genealogy.table[:len(columns[0])] = np.stack(columns, axis=1)
+        genealogy.count = len(columns[0])
+        generations = columns[0]
+        genealogy.starts = np.searchsorted(
+            generations, np.arange(generations.max() + 2 if generations.size else 1)).tolist()
+        return genealogy
+
+    def to_dict(self) -> dict:
+        return {field: self[field].tolist() for field in self.FIELDS}
+
+class HallOfFame:
+    """Bounded archive of the fittest distinct individuals seen in a run. Entries sit in a
+        min-heap keyed on fitness, so the weakest is replaced in O(log capacity), and genomes
+        are deduplicated by hash of their literal. The best individual is tracked on insertion
+
+    Args:
+        capacity (int): most individuals kept
+        key (callable, optional): hashable key of an individual's genome. Defaults to
+            genome_key.
+    """
+    invalid_capacity_msg = 'capacity must be at least 1, got {capacity}'
+
+    @staticmethod
+    def genome_key(individual: Individual):
+        """Genotype literal, or its string when the literal is not hashable
+        """
+        literal = individual.genotype.literal
+        return literal if literal.__hash__ is not None else str(literal)
+
+    def __init__(self, capacity: int, key: callable=None):
+        if capacity < 1:
+            raise ValueError(self.invalid_capacity_msg.format(capacity=capacity))
+        self.capacity = capacity
+        self.key = key if key is not None else self.genome_key
+        self.heap = []
+        self.members = {}
+        self.best = None
+        self._insertions = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, individual: Individual) -> bool:
+        return self.key(individual) in self.members
+
+    def __iter__(self):
+        """Individuals from fittest to weakest
+        """
+        for _, _, key in sorted(self.heap, reverse=True):
+            yield self.members[key]
+
+    def add(self, individual: Individual) -> bool:
+        """Insert individual if its genome is new and it is fitter than the weakest member
+            of a full archive
+
+        Returns:
+            bool: whether individual was inserted
+        """
+        key = self.key(individual)
+        if key in self.members:
+            return False
+        # Insertion order breaks fitness ties so keys are never compared
+        entry = (individual.fitness, -self._insertions, key)
+        if len(self.heap) < self.capacity:
+            heapq.heappush(self.heap, entry)
+        elif entry[0] > self.heap[0][0]:
+            _, _, evicted = heapq.heapreplace(self.heap, entry)
+            del self.members[evicted]
+        else:
+            return False
+        self._insertions += 1
+        self.members[key] = individual
+        if self.best is None or individual.fitness > self.best.fitness:
+            self.best = individual
+        return True
+
+    def update(self, individuals: list[Individual]):
+        for individual in individuals:
+            self.add(individual)
+
+    def reports(self) -> list[IndividualReport]:
+        return [individual.report() for individual in self]
+
 class AlgorithmReport(Report):
     def __init__(
         self,
         generations: list[GenerationReport],
         runtime: float,
-        memory_consumption: float=None):
+        memory_consumption: float=None,
+        termination: str=None,
+        hall_of_fame: list[IndividualReport]=None,
+        genealogy: dict=None):
         self.generations = generations
         self.runtime = runtime
         self.memory_consumption = memory_consumption
+        self.termination = termination
+        self.hall_of_fame = hall_of_fame
+        self.genealogy = genealogy
 
     def to_dict(self) -> dict:
         gen_reports = [generation.to_dict() for generation in self.generations]
@@ -492,21 +1213,87 @@ class AlgorithmReport(Report):
             'type': 'algorithms',
             'generations': gen_reports,
             'runtime': self.runtime,
-            'memory_consumption': self.memory_consumption
+            'memory_consumption': self.memory_consumption,
+            'termination': self.termination,
+            'hall_of_fame': (
+                [individual.to_dict() for individual in self.hall_of_fame]
+                if self.hall_of_fame is not None else None),
+            'genealogy': self.genealogy
         }
 
 class GeneticAlgorithm:
-    def __init__(self, generation_size: int):
+    """Base genetic algorithm.
+
+    Args:
+        generation_size (int): number of individuals per generation
+        retain_generations (int, optional): number of most recent generations kept in full.
+            Older generations are archived as reports. Defaults to None (keep all).
+        archive (str, optional): ARCHIVE_REPORT keeps individual reports of archived generations,
+            ARCHIVE_SUMMARY keeps only a GenerationSummary. Defaults to ARCHIVE_REPORT.
+        spill_path (str, optional): directory archived generation reports are written to as
+            generation_{number}.json. Only a GenerationSummary is kept in memory. Defaults to None.
+        termination (sims.agents.termination.Criterion, optional): checked by check_termination
+            before every generation. Defaults to None (subclass implements check_termination).
+        hall_of_fame_size (int, optional): capacity of the HallOfFame of run individuals.
+            Defaults to 10.
+
+    The lineage of every run individual is kept in self.genealogy, see Genealogy
+    """
+    ARCHIVE_REPORT = 'report'
+    ARCHIVE_SUMMARY = 'summary'
+    invalid_retention_msg = 'retain_generations must be at least 1, got {retain}'
+    invalid_archive_msg = 'invalid archive "{archive}". Must be one of {archives}'
+
+    def __init__(
+        self, generation_size: int, retain_generations: int=None,
+        archive: str=ARCHIVE_REPORT, spill_path: str=None, termination: any=None,
+        hall_of_fame_size: int=10):
+        if retain_generations is not None and retain_generations < 1:
+            raise ValueError(self.invalid_retention_msg.format(retain=retain_generations))
+        if archive not in (self.ARCHIVE_REPORT, self.ARCHIVE_SUMMARY):
+            raise ValueError(self.invalid_archive_msg.format(
+                archive=archive, archives=(self.ARCHIVE_REPORT, self.ARCHIVE_SUMMARY)))
         self.generations = []
+        self.archived = []
         self.generation_size = generation_size
+        self.retain_generations = retain_generations
+        self.archive = archive
+        self.spill_path = spill_path
+        self.termination = termination
+        self.statistics = OnlineStatistics()
+        self.hall_of_fame = HallOfFame(hall_of_fame_size)
+        self.genealogy = Genealogy()
+        self.evaluations = 0
+        self.start_time = None
+        self._archived_literals = None
         self._next_generation = None
 
+    @property
+    def generation_count(self) -> int:
+        """Number of generations run, archived or retained
+        """
+        return len(self.archived) + len(self.generations)
+
+    @property
+    def best(self) -> Individual:
+        """Fittest individual run so far
+        """
+        return self.hall_of_fame.best
+
     @staticmethod
     def phenotype(genotype: Genotype):
         raise NotImplementedError()
 
     def check_termination(self):
-        raise NotImplementedError()
+        if self.termination is None:
+            raise NotImplementedError()
+        return self.termination(self)
+
+    def update_statistics(self, generation: list[Individual]):
+        """Append running statistics of a run generation and enter it into the hall of fame
+        """
+        self.statistics.update([individual.fitness for individual in generation])
+        self.hall_of_fame.update(generation)
 
     def next_generation(self, generation: list[Individual]) -> list[Individual]:
         raise NotImplementedError()
@@ -517,37 +1304,139 @@ class GeneticAlgorithm:
     def run_generation(self, generation: list[Individual]):
         raise NotImplementedError()
 
-    def generation_report(self, generation: list[Individual]) -> GenerationReport:
+    def post_process_generation(self, generation: list[Individual]):
+        """Set the fitness of individuals run by run_generation. Defaults to nothing,
+            for run_generation setting it
+        """
+
+    @staticmethod
+    def unevaluated(generation: list[Individual]) -> list[Individual]:
+        return [individual for individual in generation if not individual.evaluated]
+
+    def evaluation_cost(self) -> int:
+        """Fitness evaluations counted for each individual run, e.g. one per course. Defaults to 1
+        """
+        return 1
+
+    def diversity(self, generation: list[Individual]) -> dict:
+        """Diversity metrics of generation reported in GenerationReport.diversity
+
+        Returns:
+            dict: metrics, or None if not measured for this genotype
+        """
+        return None
+
+    @staticmethod
+    def index_generation(generation: list[Individual]):
+        """Set index of each individual to its position in generation
+        """
+        for index, individual in enumerate(generation):
+            individual.index = index
+
+    def operators(self, generation: list[Individual]) -> np.ndarray:
+        """Genealogy operator of each individual: SEED without parents, ELITE with one parent
+            and CROSSOVER with two. Subclasses tell copies apart
+
+        Returns:
+            np.ndarray: int operator codes
+        """
+        counts = np.array([len(individual.parents or ()) for individual in generation])
+        return np.choose(np.minimum(counts, 2), [Genealogy.SEED, Genealogy.ELITE, Genealogy.CROSSOVER])
+
+    def record_genealogy(self, generation: list[Individual]) -> np.ndarray:
+        """Append an indexed generation to self.genealogy
+
+        Returns:
+            np.ndarray: genealogy rows of the individuals
+        """
+        parents = np.full((len(generation), 2), -1, dtype=np.int64)
+        for individual in generation:
+            individual_parents = individual.parents or ()
+            parents[individual.index, :len(individual_parents)] = individual_parents
+        return self.genealogy.append(parents, self.operators(generation))
+
+    @staticmethod
+    def literals(generation: list[Individual]) -> list[str]:
+        return [str(individual.genotype.literal) for individual in generation]
+
+    def append_generation(self, generation: list[Individual]):
+        """Store run generation, archiving the oldest generations past retain_generations
+        """
+        self.generations.append(generation)
+        if self.retain_generations is None:
+            return
+        while len(self.generations) > self.retain_generations:
+            self.archive_generation()
+
+    def archive_generation(self):
+        """Replace oldest retained generation with its report
+        """
+        generation = self.generations.pop(0)
+        report = self.generation_report(generation, self._archived_literals)
+        self._archived_literals = self.literals(generation)
+        if self.spill_path is not None:
+            os.makedirs(self.spill_path, exist_ok=True)
+            report.to_json(os.path.join(self.spill_path, f'generation_{len(self.archived)}.json'))
+        if self.spill_path is not None or self.archive == self.ARCHIVE_SUMMARY:
+            report = GenerationSummary.from_report(report)
+        self.archived.append(report)
+
+    def generation_report(
+        self, generation: list[Individual],
+        parent_literals: list[str]=None) -> GenerationReport:
         indiv_reports = []
         for individual in generation:
-            indiv_reports.append(individual.report())
-        indiv_reports_sorted = copy.deepcopy(indiv_reports)
-        indiv_reports_sorted.sort(key=(lambda x: x.fitness))
-        average_fitness = np.sum([indiv.fitness for indiv in indiv_reports]) / len(indiv_reports)
+            indiv_reports.append(individual.report(parent_literals))
+        fitnesses = [indiv.fitness for indiv in indiv_reports]
+        average_fitness = np.sum(fitnesses) / len(indiv_reports)
+        objectives = [indiv.objectives for indiv in indiv_reports]
+        pareto_front = None
+        if all(objective is not None for objective in objectives):
+            pareto_front = selection.pareto_front(np.array(objectives)).tolist()
         gen_report = GenerationReport(
             indiv_reports,
-            indiv_reports_sorted[-1].fitness,
-            average_fitness)
+            max(fitnesses),
+            average_fitness,
+            pareto_front,
+            self.diversity(generation))
         return gen_report
 
+    def run_generations(self):
+        """Run generations until check_termination. Only individuals not yet evaluated,
+            unlike elites carried over, count towards self.evaluations
+        """
+        while not self.check_termination():
+            self.index_generation(self._next_generation)
+            self.record_genealogy(self._next_generation)
+            pending = len(self.unevaluated(self._next_generation))
+            self.run_generation(self._next_generation)
+            self.evaluations += pending * self.evaluation_cost()
+            self.post_process_generation(self._next_generation)
+            self.update_statistics(self._next_generation)
+            self.append_generation(self._next_generation)
+            self._next_generation = self.next_generation(self.generations[-1])
+
     def generation_reports(self) -> list[GenerationReport]:
-        reports = []
+        reports = list(self.archived)
+        parent_literals = self._archived_literals
         for generation in self.generations:
-            reports.append(self.generation_report(generation))
+            reports.append(self.generation_report(generation, parent_literals))
+            parent_literals = self.literals(generation)
         return reports
 
     def algorithm_report(self, elapsed, memory=None) -> AlgorithmReport:
         gen_reports = self.generation_reports()
-        algo_report = AlgorithmReport(gen_reports, elapsed, memory_consumption=memory)
+        reason = self.termination.reason if self.termination is not None else None
+        algo_report = AlgorithmReport(
+            gen_reports, elapsed, memory_consumption=memory, termination=reason,
+            hall_of_fame=self.hall_of_fame.reports(), genealogy=self.genealogy.to_dict())
         return algo_report
 
     def run(self):
         start = time.perf_counter()
+        self.start_time = start
         self._next_generation = self.seed_generation()
-        while not self.check_termination():
-            self.run_generation(self._next_generation)
-            self.generations.append(self._next_generation)
-            self._next_generation = self.next_generation(self.generations[-1])
+        self.run_generations()
         end = time.perf_counter()
         elapsed = end - start
         algo_report = self.algorithm_report(elapsed)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import numpy as np
+
+from sims.agents import genetics
+
+def ragged_indices(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenated ranges [start, start + length) of every segment
+
+    Args:
+        starts (np.ndarray): first index of each segment
+        lengths (np.ndarray): length of each segment
+
+    Returns:
+        np.ndarray: flat indices of shape (lengths.sum(),)
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    ends = np.cumsum(lengths)
+    return np.arange(ends[-1] if ends.size else 0) + np.repeat(np.asarray(starts) - ends + lengths, lengths)
+
+class GenomeStore:
+    """Variable length bit genomes of a generation stored ragged array style:
+        one flat bit buffer and offsets, genome i being bits[offsets[i]:offsets[i + 1]].
+        Batch operators reproduce Nbit semantics on every genome at once
+
+    Args:
+        bits (np.ndarray): flat uint8 bit buffer
+        offsets (np.ndarray): int64 offsets of shape (genomes + 1,)
+        mut_rates (np.ndarray, optional): mutation rate of each genome. Defaults to 1.
+    """
+    invalid_offsets_msg = 'offsets must start at 0, be non-decreasing and end at {size}'
+    invalid_width_msg = 'width {width} is shorter than longest genome {longest}'
+
+    def __init__(self, bits: np.ndarray, offsets: np.ndarray, mut_rates: np.ndarray=None):
+        self.bits = np.asarray(bits, dtype=genetics.Binary.dtype)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if (
+            self.offsets.size == 0 or self.offsets[0] != 0 or self.offsets[-1] != self.bits.size
+            or (np.diff(self.offsets) < 0).any()):
+            raise ValueError(self.invalid_offsets_msg.format(size=self.bits.size))
+        if mut_rates is None:
+            mut_rates = np.ones(len(self))
+        self.mut_rates = np.asarray(mut_rates, dtype=np.float64)
+
+    @classmethod
+    def from_genotypes(cls, genotypes: list[genetics.Nbit]) -> GenomeStore:
+        lengths = [len(genotype) for genotype in genotypes]
+        offsets = np.zeros(len(genotypes) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        bits = np.concatenate([genotype.literal.literal for genotype in genotypes] or [[]])
+        return cls(bits, offsets, [genotype.mut_rate for genotype in genotypes])
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray, mut_rates: np.ndarray=None) -> GenomeStore:
+        """Store of fixed width genomes, one per row
+        """
+        genomes, width = matrix.shape
+        return cls(matrix.reshape(-1), np.arange(genomes + 1) * width, mut_rates)
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def __getitem__(self, index: int) -> genetics.Binary:
+        return genetics.Binary(self.bits[self.offsets[index]:self.offsets[index + 1]])
+
+    def genotypes(self) -> list[genetics.Nbit]:
+        """Nbit genotype of each genome. Literals are copies of the buffer
+        """
+        return [genetics.Nbit(self[index], mut_rate) for index, mut_rate in enumerate(self.mut_rates)]
+
+    def positions(self) -> np.ndarray:
+        """Position of every buffer bit within its genome
+        """
+        lengths = self.lengths
+        return np.arange(self.bits.size) - np.repeat(self.offsets[:-1], lengths)
+
+    def decode(self) -> np.ndarray:
+        """Integer of every genome, as int(Nbit), without building Binary objects
+
+        Returns:
+            np.ndarray: int64 integers of shape (genomes,)
+        """
+        lengths = self.lengths
+        if lengths.max(initial=0) > genetics.Binary.max_int64_width:
+            return genetics.Binary.decode(self.fixed_width())
+        exponents = np.repeat(lengths - 1, lengths) - self.positions()
+        weighted = self.bits.astype(np.int64) << exponents
+        values = np.zeros(len(self), dtype=np.int64)
+        np.add.at(values, np.repeat(np.arange(len(self)), lengths), weighted)
+        return values
+
+    def fixed_width(self, width: int=None) -> np.ndarray:
+        """Genomes normalised to a fixed width bit matrix, left padded with zeros so rows
+            decode to the same integers
+
+        Args:
+            width (int, optional): Defaults to length of longest genome.
+
+        Returns:
+            np.ndarray: bit matrix of shape (genomes, width)
+        """
+        lengths = self.lengths
+        longest = int(lengths.max(initial=0))
+        if width is None:
+            width = longest
+        if width < longest:
+            raise ValueError(self.invalid_width_msg.format(width=width, longest=longest))
+        matrix = np.zeros((len(self), width), dtype=self.bits.dtype)
+        rows = np.repeat(np.arange(len(self)), lengths)
+        columns = np.repeat(width - lengths, lengths) + self.positions()
+        matrix[rows, columns] = self.bits
+        return matrix
+
+    def crossover(self, first: np.ndarray, second: np.ndarray, positions: np.ndarray) -> GenomeStore:
+        """Single point crossover of genome pairs, as Nbit.crossover: offspring 2i is
+            first[:position] + second[position:] and offspring 2i + 1 is second[:position] + first[position:]
+
+        Args:
+            first (np.ndarray): genome index of the first parent of each pair
+            second (np.ndarray): genome index of the second parent of each pair
+            positions (np.ndarray): crossover position of each pair
+
+        Returns:
+            GenomeStore: offspring, two per pair
+        """
+        first, second, positions = (np.asarray(array, dtype=np.int64) for array in (first, second, positions))
+        lengths = self.lengths
+        head_parents = np.stack([first, second], axis=1).reshape(-1)
+        tail_parents = np.stack([second, first], axis=1).reshape(-1)
+        cuts = np.repeat(positions, 2)
+        head_lengths = np.minimum(cuts, lengths[head_parents])
+        tail_lengths = np.maximum(lengths[tail_parents] - cuts, 0)
+        starts = np.stack([self.offsets[head_parents], self.offsets[tail_parents] + cuts], axis=1).reshape(-1)
+        segment_lengths = np.stack([head_lengths, tail_lengths], axis=1).reshape(-1)
+        bits = self.bits[ragged_indices(starts, segment_lengths)]
+        offsets = np.zeros(head_parents.size + 1, dtype=np.int64)
+        np.cumsum(head_lengths + tail_lengths, out=offsets[1:])
+        return self.__class__(bits, offsets, self.mut_rates[head_parents])
+
+    def flip(self, positions: np.ndarray):
+        """Flip one bit of every genome in place, as Binary.flip. Empty genomes are skipped
+
+        Args:
+            positions (np.ndarray): position in each genome
+        """
+        nonempty = self.lengths > 0
+        self.bits[self.offsets[:-1][nonempty] + np.asarray(positions)[nonempty]] ^= 1
+
+    def flips(self) -> np.ndarray:
+        """Number of bits to flip in every genome, as Nbit.flips
+        """
+        flips = np.floor(self.mut_rates).astype(np.int64)
+        fraction = self.mut_rates - flips
+        fractional = np.flatnonzero(fraction > 0)
+        if fractional.size > 0:
+            flips[fractional] += np.random.rand(fractional.size) < fraction[fractional]
+        return flips
+
+    def flip_random(self):
+        """Flip random bits of every genome in place, as Nbit.mutate. Random draws match
+            mutating each genome in turn when every mutation rate is an integer
+        """
+        flips = self.flips()
+        lengths = self.lengths
+        genomes = np.repeat(np.arange(len(self)), flips)
+        positions = (np.random.rand(genomes.size) * lengths[genomes]).astype(np.int64)
+        nonempty = lengths[genomes] > 0
+        np.bitwise_xor.at(self.bits, self.offsets[genomes[nonempty]] + positions[nonempty], 1)
@@ -1,29 +1,82 @@
 import copy
 import os
-import time
 
 import numpy as np
 
+from sims.agents import adaptation
+from sims.agents import diversity as diversity_module
 from sims.agents import genetics
+from sims.agents import genomes
+from sims.agents import selection
+from sims.agents import termination as termination_module
+from sims.environments import courses as courses_module
 from sims.environments import hurdles
-from settings import Settings
+from sims.environments import parallel
+from sims.environments import policies
+from sims import sweeps
+import sims.visualize as vis
+from settings import Config, DEFAULT_CONFIG
 
 class ProximityHurdlerTrainer(genetics.GeneticAlgorithm):
+    """Trains ProximityHurdler thresholds.
+        Objectives of each individual are (termination frame, -jump actions in history), both maximized.
+        SELECT_TRUNCATION picks parents by termination frame alone, SELECT_NSGA2 by Pareto rank
+        and crowding distance of the objectives.
+
+        When courses are given, every generation is evaluated on all courses in one batched
+        physics run instead of a Simulation. Fitness is the courses' aggregate termination
+        frame and jump actions are averaged across courses. No history or trace is recorded.
+
+        With batch_operators, crossover and mutation of a whole generation run on a GenomeStore
+        with the same semantics and random draws as breed and mutate.
+
+        Per generation statistics are kept in self.statistics. A mutation_control adapts mutation
+        rates and a scheduler picks crossover or copying for each parent pair from them;
+        both require batch_operators. Once the bit-wise entropy of a generation drops below
+        restart_entropy, the next generation is reseeded keeping only its elites, at least the best.
+
+        termination defaults to stopping once the course is solved, as fitness can not exceed
+        config.frames, or after config.nbit_generations generations, see sims.agents.termination.
+        config defaults to the config of courses, or DEFAULT_CONFIG
+
+        The elitism fittest individuals of each generation are carried over unchanged in place of
+        offspring and are not simulated again. The fittest distinct individuals of the run are kept
+        in self.hall_of_fame, self.best being the fittest
+
+        With courses and workers > 1, generations are evaluated by a parallel.SharedEvaluator,
+        thresholds and results being exchanged with the worker processes through shared memory
+    """
+    SELECT_TRUNCATION = 'truncation'
+    SELECT_NSGA2 = 'nsga2'
     invalid_num_parents_msg = 'Parent set of invalid size {size}. Must be 2.'
+    invalid_selection_msg = 'invalid selection "{selection}". Must be one of {selections}'
+    invalid_adaptation_msg = 'mutation_control and scheduler require batch_operators'
+    invalid_elitism_msg = 'elitism must be in [0, {size}), got {elitism}'
+    invalid_workers_msg = 'workers > 1 requires courses'
+    mismatched_config_msg = 'courses were built with a different config than the trainer'
 
-    @staticmethod
-    def phenotype(genotype: genetics.Genotype) -> hurdles.ProximityHurdler:
-        return hurdles.ProximityHurdler(int(genotype), object_name=f'ProxHurdler{int(genotype)}p')
+    def phenotype(self, genotype: genetics.Genotype) -> hurdles.ProximityHurdler:
+        threshold = int(genotype)
+        return hurdles.ProximityHurdler(threshold, object_name=f'ProxHurdler{threshold}p', config=self.config)
 
     @staticmethod
     def pop_random(series: list):
         return series.pop(int(np.random.rand() * len(series)))
 
-    @staticmethod
-    def post_process_generation(generation: genetics.Individual):
-        for individual in generation:
+    def post_process_generation(self, generation: genetics.Individual):
+        pending = self.unevaluated(generation)
+        if self.courses is not None:
+            termination_frames, jumps = self._course_results
+            scores = self.courses.score(termination_frames)
+            for individual, score, mean_jumps in zip(pending, scores, jumps.mean(axis=1)):
+                individual.fitness = float(score)
+                individual.objectives = (score, -mean_jumps)
+            return
+        for individual in pending:
             individual.fitness = individual.phenotype.termination_state.frame_number
             individual.history = individual.phenotype.history
+            jumps = np.count_nonzero(individual.history == hurdles.Hurdler.JUMP)
+            individual.objectives = (individual.fitness, -jumps)
 
     @classmethod
     def pair(cls, generation: list[genetics.Individual]) -> list[genetics.Individual]:
@@ -31,18 +84,64 @@ class ProximityHurdlerTrainer(genetics.GeneticAlgorithm):
         parent_b = cls.pop_random(generation)
         return parent_a, parent_b
 
-    def __init__(self, generation_size: int, seed_genotype_max: int, to_video: bool=False):
-        super().__init__(generation_size)
+    def __init__(
+        self, generation_size: int, seed_genotype_max: int, to_video: bool=False,
+        retain_generations: int=None, archive: str=genetics.GeneticAlgorithm.ARCHIVE_REPORT,
+        spill_path: str=None, viewer: vis.LiveViewer=None, trace_path: str=None,
+        selection_method: str=SELECT_TRUNCATION, courses: courses_module.Courses=None,
+        batch_operators: bool=True, mutation_control: adaptation.MutationControl=None,
+        scheduler: adaptation.OperatorScheduler=None, restart_entropy: float=None,
+        termination: termination_module.Criterion=None, elitism: int=0, hall_of_fame_size: int=10,
+        config: Config=None, workers: int=1):
+        if workers > 1 and courses is None:
+            raise ValueError(self.invalid_workers_msg)
+        if not 0 <= elitism < generation_size:
+            raise ValueError(self.invalid_elitism_msg.format(size=generation_size, elitism=elitism))
+        if not batch_operators and (mutation_control is not None or scheduler is not None):
+            raise ValueError(self.invalid_adaptation_msg)
+        if selection_method not in (self.SELECT_TRUNCATION, self.SELECT_NSGA2):
+            raise ValueError(self.invalid_selection_msg.format(
+                selection=selection_method, selections=(self.SELECT_TRUNCATION, self.SELECT_NSGA2)))
+        if config is None:
+            config = courses.config if courses is not None else DEFAULT_CONFIG
+        if courses is not None and courses.config != config:
+            raise ValueError(self.mismatched_config_msg)
+        if termination is None:
+            termination = (
+                termination_module.TargetFitness(config.frames)
+                | termination_module.MaxGenerations(config.nbit_generations))
+        super().__init__(
+            generation_size, retain_generations=retain_generations,
+            archive=archive, spill_path=spill_path, termination=termination,
+            hall_of_fame_size=hall_of_fame_size)
+        self.config = config
+        self.selection_method = selection_method
+        self.courses = courses
+        self.batch_operators = batch_operators
+        self.mutation_control = mutation_control
+        self.scheduler = scheduler
+        self.restart_entropy = restart_entropy
+        self.elitism = elitism
+        self.workers = workers
+        self.evaluator = None
+        self.restarts = 0
+        self._offspring_parent_fitnesses = None
+        self._offspring_crossed = None
+        self._course_results = None
         self.to_video = to_video
+        self.viewer = viewer
+        self.trace_path = trace_path
         self.seed_genotype_max = seed_genotype_max
 
-    def check_termination(self):
-        return len(self.generations) >= Settings.nbit_generations
-
     def select(self, generation: list[genetics.Individual]) -> list[genetics.Individual]:
-        generation_copy = copy.deepcopy(generation)
-        generation_copy.sort(key=(lambda x: x.fitness))
-        parent_pool = generation_copy[-int(self.generation_size / 2):]
+        pool_size = int(self.generation_size / 2)
+        if self.selection_method == self.SELECT_NSGA2:
+            objectives = np.array([individual.objectives for individual in generation])
+            parent_pool = [generation[i] for i in selection.nsga2_select(objectives, pool_size)]
+        else:
+            generation_copy = list(generation)
+            generation_copy.sort(key=(lambda x: x.fitness))
+            parent_pool = generation_copy[-pool_size:]
         parent_sets = []
         while len(parent_pool) >= 2:
             parent_sets.append(self.pair(parent_pool))
@@ -50,57 +149,197 @@ class ProximityHurdlerTrainer(genetics.GeneticAlgorithm):
 
     def breed(self, parents: list[genetics.Individual]) -> list[genetics.Individual]:
         if len(parents) != 2:
-            raise ValueError(self.invalid_num_parents_msg.format(len(parents)))
+            raise ValueError(self.invalid_num_parents_msg.format(size=len(parents)))
         parent_genotypes = [parent.genotype for parent in parents]
         parent_genotypes.sort(key=(lambda x: len(x)))
         cross_position = int(np.random.rand() * len(parent_genotypes[0]))
         children_genotypes = parent_genotypes[0].crossover(parent_genotypes[1], cross_position)
-        children_phenotypes = [self.phenotype(child) for child in children_genotypes]
+        parent_indices = tuple(parent.index for parent in parents)
         children = [
-            genetics.Individual(children_genotypes[i], children_phenotypes[i], parents=parents)
-            for i in range(len(children_genotypes))]
+            genetics.Individual(genotype, parents=parent_indices, factory=self.phenotype)
+            for genotype in children_genotypes]
         return children
 
     def mutate(self, individual: genetics.Individual) -> genetics.Individual:
         copy_genotype = copy.deepcopy(individual.genotype)
         copy_genotype.mutate()
-        return genetics.Individual(copy_genotype, self.phenotype(copy_genotype))
+        return genetics.Individual(copy_genotype, parents=individual.parents, factory=self.phenotype)
+
+    def breed_generation(
+        self, generation: list[genetics.Individual],
+        parent_sets: list[tuple[genetics.Individual, ...]]) -> list[genetics.Individual]:
+        """Breed and mutate every parent set at once. Equivalent to mutate of each child of breed
+
+        Args:
+            generation (list[genetics.Individual]): indexed generation parents belong to
+            parent_sets (list[tuple[genetics.Individual, ...]]): pairs of parents
+
+        Returns:
+            list[genetics.Individual]: mutated offspring, two per parent set
+        """
+        for parents in parent_sets:
+            if len(parents) != 2:
+                raise ValueError(self.invalid_num_parents_msg.format(size=len(parents)))
+        store = genomes.GenomeStore.from_genotypes([individual.genotype for individual in generation])
+        pairs = np.array([[parent.index for parent in parents] for parents in parent_sets], dtype=np.int64)
+        pairs = pairs.reshape(-1, 2)
+        lengths = store.lengths
+        swap = lengths[pairs[:, 1]] < lengths[pairs[:, 0]]
+        first = np.where(swap, pairs[:, 1], pairs[:, 0])
+        second = np.where(swap, pairs[:, 0], pairs[:, 1])
+        positions = (np.random.rand(len(pairs)) * lengths[first]).astype(np.int64)
+        crossed = np.ones(len(pairs), dtype=bool)
+        if self.scheduler is not None:
+            crossed = self.scheduler.crossover_mask(len(pairs))
+            positions[~crossed] = 0
+        offspring = store.crossover(first, second, positions)
+        if self.mutation_control is not None:
+            self.mutation_control.apply(offspring)
+        offspring.flip_random()
+        fitnesses = np.array([individual.fitness for individual in generation], dtype=np.float64)
+        self._offspring_parent_fitnesses = np.repeat(fitnesses[pairs].max(axis=1), 2)
+        self._offspring_crossed = np.repeat(crossed, 2)
+        parent_indices = [tuple(pair) for pair in pairs.tolist() for _ in range(2)]
+        return [
+            genetics.Individual(genotype, parents=parents, factory=self.phenotype)
+            for genotype, parents in zip(offspring.genotypes(), parent_indices)]
+
+    def elites(self, generation: list[genetics.Individual], count: int=None) -> list[genetics.Individual]:
+        """Copies of the count fittest individuals of generation, keeping their evaluation.
+            count defaults to elitism
+        """
+        count = self.elitism if count is None else count
+        fitnesses = np.array([individual.fitness for individual in generation], dtype=np.float64)
+        return [generation[index].elite() for index in np.argsort(-fitnesses, kind='stable')[:count]]
+
+    def with_elites(
+        self, generation: list[genetics.Individual],
+        offspring: list[genetics.Individual]) -> list[genetics.Individual]:
+        """Next generation of the elites of generation followed by offspring, the last
+            offspring making room for the elites
+        """
+        if self.elitism == 0:
+            return offspring
+        kept = len(offspring) - self.elitism
+        if self._offspring_parent_fitnesses is not None:
+            self._offspring_parent_fitnesses = np.concatenate([
+                np.full(self.elitism, np.nan), self._offspring_parent_fitnesses[:kept]])
+            self._offspring_crossed = np.concatenate([
+                np.zeros(self.elitism, dtype=bool), self._offspring_crossed[:kept]])
+        return self.elites(generation) + offspring[:kept]
+
+    def operators(self, generation: list[genetics.Individual]) -> np.ndarray:
+        """Genealogy operators, offspring of parent pairs the scheduler copied being COPY
+        """
+        operators = super().operators(generation)
+        crossed = self._offspring_crossed
+        if crossed is not None and len(crossed) == len(generation):
+            operators[(operators == genetics.Genealogy.CROSSOVER) & ~crossed] = genetics.Genealogy.COPY
+        return operators
+
+    @staticmethod
+    def generation_diversity(generation: list[genetics.Individual]) -> diversity_module.Diversity:
+        return diversity_module.Diversity.from_store(
+            genomes.GenomeStore.from_genotypes([individual.genotype for individual in generation]))
+
+    def diversity(self, generation: list[genetics.Individual]) -> dict:
+        return self.generation_diversity(generation).to_dict()
+
+    def converged(self) -> bool:
+        """Whether the last generation's entropy is below restart_entropy
+        """
+        return self.restart_entropy is not None and self.statistics.latest('entropy') < self.restart_entropy
+
+    def restart(self, generation: list[genetics.Individual]) -> list[genetics.Individual]:
+        """Fresh seed generation after the elites of generation, at least its best individual,
+            which are not simulated again
+        """
+        self.restarts += 1
+        kept = self.elites(generation, max(self.elitism, 1))
+        return kept + self.seed_generation()[len(kept):]
+
+    def update_statistics(self, generation: list[genetics.Individual]):
+        """Append statistics of a post-processed generation and adapt operators
+        """
+        fitnesses = np.array([individual.fitness for individual in generation], dtype=np.float64)
+        parent_fitnesses = self._offspring_parent_fitnesses
+        if parent_fitnesses is not None and len(parent_fitnesses) != len(generation):
+            parent_fitnesses = None
+        self.statistics.update(
+            fitnesses, parent_fitnesses,
+            self._offspring_crossed if parent_fitnesses is not None else None,
+            self.generation_diversity(generation))
+        self.hall_of_fame.update(generation)
+        if self.mutation_control is not None:
+            self.mutation_control.update(self.statistics)
+        if self.scheduler is not None:
+            self.scheduler.update(self.statistics)
 
     def seed_generation(self) -> list[genetics.Individual]:
         seed_genotypes = [
             genetics.Nbit(genetics.Binary(int(np.random.rand() * self.seed_genotype_max)), 1)
             for _ in range(self.generation_size)]
         seed_indivs = [
-            genetics.Individual(genotype, self.phenotype(genotype))
+            genetics.Individual(genotype, factory=self.phenotype)
             for genotype in seed_genotypes]
         return seed_indivs
 
     def run_generation(self, generation: list[genetics.Individual]):
-        hurdlers = [individual.phenotype for individual in generation]
-        sim = hurdles.Simulation(hurdlers=hurdlers, hurdles=[hurdles.Hurdle()])
+        """Simulate individuals of generation not yet evaluated
+        """
+        pending = self.unevaluated(generation)
+        if self.courses is not None:
+            thresholds = genetics.Nbit.decode([individual.genotype for individual in pending])
+            if self.evaluator is not None:
+                self._course_results = self.evaluator.evaluate(thresholds)
+            else:
+                self._course_results = self.courses.evaluate(policies.ThresholdPolicy(thresholds))
+            return
+        hurdlers = [individual.phenotype for individual in pending]
+        sim = hurdles.Simulation(
+            hurdlers=hurdlers, hurdles=[hurdles.Hurdle(self.config)],
+            viewer=self.viewer, record_trace=self.trace_path is not None, config=self.config)
         sim.run(self.to_video)
+        if self.trace_path is not None:
+            os.makedirs(self.trace_path, exist_ok=True)
+            sim.trace.save(os.path.join(self.trace_path, f'generation_{self.generation_count}.npz'))
+
+    def evaluation_cost(self) -> int:
+        return len(self.courses) if self.courses is not None else 1
+
+    def next_generation(self, generation: list[genetics.Individual]) -> list[genetics.Individual]:
+        """Offspring of generation after its elites, or a restart once it has converged
+        """
+        self._offspring_parent_fitnesses = None
+        if self.converged():
+            return self.restart(generation)
+        parent_sets = self.select(generation)
+        parent_sets += self.select(generation)
+        if self.batch_operators:
+            offspring = self.breed_generation(generation, parent_sets)
+        else:
+            children = [child for parents in parent_sets for child in self.breed(parents)]
+            offspring = [self.mutate(individual) for individual in children]
+        return self.with_elites(generation, offspring)
 
     def run(self):
-        start = time.perf_counter()
-        self._next_generation = self.seed_generation()
-        while not self.check_termination():
-            self.run_generation(self._next_generation)
-            self.post_process_generation(self._next_generation)
-            self.generations.append(self._next_generation)
-            parent_sets = self.select(self._next_generation)
-            parent_sets += self.select(self._next_generation)
-            next_generation = [child for parents in parent_sets for child in self.breed(parents)]
-            self._next_generation = [self.mutate(individual) for individual in next_generation]
-        end = time.perf_counter()
-        elapsed = end - start
-        algo_report = self.algorithm_report(elapsed)
-        return algo_report
+        if self.workers > 1:
+            self.evaluator = parallel.SharedEvaluator(self.courses, self.generation_size, self.workers)
+        try:
+            return super().run()
+        finally:
+            if self.evaluator is not None:
+                self.evaluator.close()
+                self.evaluator = None
 
 if __name__ == '__main__':
+    vis.configure_logging()
     hurdler_report_dir = os.path.join('sims', 'data', 'reports')
     if not os.path.exists(hurdler_report_dir):
         os.makedirs(hurdler_report_dir)
-    for i in range(Settings.algo_runs):
-        trainer = ProximityHurdlerTrainer(20, 10000, to_video=False)
-        algo_report = trainer.run()
-        algo_report.to_json(os.path.join(hurdler_report_dir, f'proximity_hurdler_report_{i}.json'))
+    with sweeps.SweepStore(os.path.join(hurdler_report_dir, 'sweep.npz')) as store:
+        for i in range(DEFAULT_CONFIG.algo_runs):
+            trainer = ProximityHurdlerTrainer(20, 10000, to_video=False)
+            algo_report = trainer.run()
+            algo_report.to_json(os.path.join(hurdler_report_dir, f'proximity_hurdler_report_{i}.json'))
+            store.add(f'proximity_hurdler_report_{i}', algo_report)
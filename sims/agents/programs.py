@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import numpy as np
+
+from sims.agents import genetics
+
+def protected_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Division that returns 1 where denominator is 0
+    """
+    safe = np.where(denominator == 0, 1.0, denominator)
+    return np.where(denominator == 0, 1.0, numerator / safe)
+
+def less_than(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    return (left < right).astype(np.float64)
+
+class Primitive:
+    """Semantics of a nodetype. Exactly one of function, feature or constant is set
+
+    Args:
+        name (str): display name
+        arity (int): number of children
+        function (callable, optional): vectorized function of children values
+        feature (int, optional): column of feature matrix for terminal
+        constant (float, optional): value for constant terminal
+    """
+    invalid_primitive_msg = 'Primitive "{name}" must have exactly one of function, feature or constant'
+
+    def __init__(
+        self, name: str, arity: int, function: callable=None,
+        feature: int=None, constant: float=None):
+        if [function, feature, constant].count(None) != 2:
+            raise ValueError(self.invalid_primitive_msg.format(name=name))
+        self.name = name
+        self.arity = arity
+        self.function = function
+        self.feature = feature
+        self.constant = constant
+
+class Vocabulary:
+    """Maps nodetypes of a Node tree to Primitives
+
+    Args:
+        primitives (dict[int, Primitive]): primitive of each nodetype
+    """
+    unknown_nodetype_msg = 'nodetype {nodetype} not in vocabulary'
+    invalid_arity_msg = 'nodetype {nodetype} has {children} children, expected {arity}'
+
+    def __init__(self, primitives: dict[int, Primitive]):
+        self.primitives = primitives
+
+    @property
+    def arities(self) -> dict[int, int]:
+        """Arities in the form expected by TreeGenotype
+        """
+        return {nodetype: primitive.arity for nodetype, primitive in self.primitives.items()}
+
+    def primitive(self, node: genetics.Node) -> Primitive:
+        if node.nodetype not in self.primitives:
+            raise ValueError(self.unknown_nodetype_msg.format(nodetype=node.nodetype))
+        primitive = self.primitives[node.nodetype]
+        if len(node.children) != primitive.arity:
+            raise ValueError(self.invalid_arity_msg.format(
+                nodetype=node.nodetype, children=len(node.children), arity=primitive.arity))
+        return primitive
+
+    def evaluate(self, node: genetics.Node, features: np.ndarray) -> np.ndarray:
+        """Reference evaluation by recursive traversal. Use Compiler for repeated evaluation
+
+        Args:
+            node (Node): root of tree
+            features (np.ndarray): feature matrix of shape (batch, features)
+
+        Returns:
+            np.ndarray: value of tree for each row of features
+        """
+        primitive = self.primitive(node)
+        if primitive.feature is not None:
+            value = features[:, primitive.feature]
+        elif primitive.constant is not None:
+            value = primitive.constant
+        else:
+            value = primitive.function(*[self.evaluate(child, features) for child in node.children])
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), features.shape[:1])
+
+HURDLER_FEATURES = ('proximity', 'altitude', 'vertical_velocity')
+HURDLER_VOCABULARY = Vocabulary({
+    0: Primitive('proximity', 0, feature=0),
+    1: Primitive('altitude', 0, feature=1),
+    2: Primitive('vertical_velocity', 0, feature=2),
+    3: Primitive('0', 0, constant=0.0),
+    4: Primitive('1', 0, constant=1.0),
+    5: Primitive('10', 0, constant=10.0),
+    6: Primitive('100', 0, constant=100.0),
+    10: Primitive('add', 2, function=np.add),
+    11: Primitive('subtract', 2, function=np.subtract),
+    12: Primitive('multiply', 2, function=np.multiply),
+    13: Primitive('divide', 2, function=protected_divide),
+    14: Primitive('maximum', 2, function=np.maximum),
+    15: Primitive('minimum', 2, function=np.minimum),
+    16: Primitive('less_than', 2, function=less_than),
+    17: Primitive('negative', 1, function=np.negative),
+})
+
+def structure(node: genetics.Node) -> tuple[int, ...]:
+    """Structural key of tree: preorder (nodetype, number of children) pairs, flattened.
+        Structurally identical trees have equal keys regardless of node identity
+
+    Args:
+        node (Node): root of tree
+
+    Returns:
+        tuple[int, ...]: structural key
+    """
+    key = []
+    stack = [node]
+    while len(stack) > 0:
+        current = stack.pop()
+        key.append(current.nodetype)
+        key.append(len(current.children))
+        stack.extend(reversed(current.children))
+    return tuple(key)
+
+class Program:
+    """Tree compiled to a single NumPy expression
+
+    Args:
+        source (str): generated python source of the program function
+        namespace (dict): globals the source is executed in
+    """
+    FUNCTION_NAME = 'program'
+
+    def __init__(self, source: str, namespace: dict):
+        self.source = source
+        scope = dict(namespace)
+        exec(compile(source, f'<{self.FUNCTION_NAME}>', 'exec'), scope)
+        self._function = scope[self.FUNCTION_NAME]
+
+    def __str__(self):
+        return self.source
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        """Evaluate program over a batch of states
+
+        Args:
+            features (np.ndarray): feature matrix of shape (batch, features)
+
+        Returns:
+            np.ndarray: float64 value for each row of features
+        """
+        value = self._function(features)
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), features.shape[:1])
+
+class Compiler:
+    """Compiles Node trees to Programs. Programs are cached by structure key, so
+        structurally identical trees across a population share one Program.
+
+    Args:
+        vocabulary (Vocabulary, optional): Defaults to HURDLER_VOCABULARY.
+        max_cache (int, optional): maximum number of cached programs. Defaults to 4096.
+    """
+    def __init__(self, vocabulary: Vocabulary=HURDLER_VOCABULARY, max_cache: int=4096):
+        self.vocabulary = vocabulary
+        self.max_cache = max_cache
+        self._cache = {}
+        self._namespace = {
+            f'f{nodetype}': primitive.function
+            for nodetype, primitive in vocabulary.primitives.items()
+            if primitive.function is not None}
+
+    def __len__(self):
+        return len(self._cache)
+
+    def expression(self, node: genetics.Node) -> str:
+        primitive = self.vocabulary.primitive(node)
+        if primitive.feature is not None:
+            return f'features[:, {primitive.feature}]'
+        if primitive.constant is not None:
+            return repr(float(primitive.constant))
+        arguments = ', '.join(self.expression(child) for child in node.children)
+        return f'f{node.nodetype}({arguments})'
+
+    def source(self, node: genetics.Node) -> str:
+        return f'def {Program.FUNCTION_NAME}(features):\n    return {self.expression(node)}\n'
+
+    def compile(self, node: genetics.Node) -> Program:
+        """Compile tree, reusing cached Program of a structurally identical tree
+
+        Args:
+            node (Node): root of tree
+
+        Returns:
+            Program: compiled program
+        """
+        key = structure(node)
+        program = self._cache.get(key)
+        if program is None:
+            program = Program(self.source(node), self._namespace)
+            if len(self._cache) >= self.max_cache:
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = program
+        return program
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import numpy as np
+
+def dominance_matrix(objectives: np.ndarray, block_size: int=1024) -> np.ndarray:
+    """Bit packed dominance matrix. Bit j of row i is set if individual i dominates j,
+        i.e. is no worse in every objective and better in at least one. All objectives are maximized.
+        Computed one objective at a time in blocks of rows so memory stays at (block_size, n)
+
+    Args:
+        objectives (np.ndarray): objectives of shape (n, objectives)
+        block_size (int, optional): rows compared at once. Defaults to 1024.
+
+    Returns:
+        np.ndarray: uint8 array of shape (n, ceil(n / 8)), see np.packbits
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n = objectives.shape[0]
+    packed = np.zeros((n, (n + 7) // 8), dtype=np.uint8)
+    for start in range(0, n, block_size):
+        block = objectives[start:start + block_size]
+        no_worse = np.ones((len(block), n), dtype=bool)
+        better = np.zeros((len(block), n), dtype=bool)
+        for objective in range(objectives.shape[1]):
+            rows = block[:, objective, None]
+            column = objectives[None, :, objective]
+            no_worse &= rows >= column
+            better |= rows > column
+        packed[start:start + block_size] = np.packbits(no_worse & better, axis=1)
+    return packed
+
+def non_dominated_ranks(objectives: np.ndarray, block_size: int=1024) -> np.ndarray:
+    """Pareto rank of every individual. Rank 0 is the non-dominated front, rank 1 is
+        non-dominated once rank 0 is removed, and so on. All objectives are maximized
+
+    Args:
+        objectives (np.ndarray): objectives of shape (n, objectives)
+        block_size (int, optional): see dominance_matrix. Defaults to 1024.
+
+    Returns:
+        np.ndarray: int rank of shape (n,)
+    """
+    n = len(objectives)
+    packed = dominance_matrix(objectives, block_size)
+    dominated_by = np.zeros(n, dtype=np.int64)
+    for start in range(0, n, block_size):
+        dominated_by += np.unpackbits(packed[start:start + block_size], axis=1, count=n).sum(axis=0, dtype=np.int64)
+    ranks = np.full(n, -1, dtype=np.int64)
+    front = np.flatnonzero(dominated_by == 0)
+    rank = 0
+    while front.size > 0:
+        ranks[front] = rank
+        for start in range(0, front.size, block_size):
+            rows = packed[front[start:start + block_size]]
+            dominated_by -= np.unpackbits(rows, axis=1, count=n).sum(axis=0, dtype=np.int64)
+        dominated_by[front] = -1
+        front = np.flatnonzero(dominated_by == 0)
+        rank += 1
+    return ranks
+
+def pareto_front(objectives: np.ndarray) -> np.ndarray:
+    """Indices of non-dominated individuals
+    """
+    return np.flatnonzero(non_dominated_ranks(objectives) == 0)
+
+def crowding_distance(objectives: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """NSGA-II crowding distance of every individual within its front.
+        Boundary individuals of each objective get infinite distance
+
+    Args:
+        objectives (np.ndarray): objectives of shape (n, objectives)
+        ranks (np.ndarray): front of every individual, see non_dominated_ranks
+
+    Returns:
+        np.ndarray: float distance of shape (n,)
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n, count = objectives.shape
+    distance = np.zeros(n)
+    for objective in range(count):
+        order = np.lexsort((objectives[:, objective], ranks))
+        values = objectives[order, objective]
+        sorted_ranks = ranks[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ranks[1:] != sorted_ranks[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        span = np.repeat(values[ends] - values[starts], np.diff(np.r_[starts, n]))
+        gaps = np.zeros(n)
+        gaps[1:-1] = values[2:] - values[:-2]
+        np.divide(gaps, span, out=gaps, where=span > 0)
+        gaps[span == 0] = 0
+        gaps[starts] = np.inf
+        gaps[ends] = np.inf
+        distance[order] += gaps
+    return distance
+
+def nsga2_order(objectives: np.ndarray) -> np.ndarray:
+    """Indices from best to worst by Pareto rank, then by decreasing crowding distance
+    """
+    ranks = non_dominated_ranks(objectives)
+    distance = crowding_distance(objectives, ranks)
+    return np.lexsort((-distance, ranks))
+
+def nsga2_select(objectives: np.ndarray, count: int) -> np.ndarray:
+    """Indices of the count best individuals by NSGA-II environmental selection
+    """
+    return nsga2_order(objectives)[:count]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+class Criterion:
+    """Termination criterion of a GeneticAlgorithm, checked before every generation from
+        its running statistics (see genetics.OnlineStatistics). Criteria compose with | and &.
+        reason describes why the criterion fired
+    """
+    def __call__(self, algorithm) -> bool:
+        raise NotImplementedError()
+
+    def __or__(self, other: Criterion) -> AnyOf:
+        return AnyOf(self, other)
+
+    def __and__(self, other: Criterion) -> AllOf:
+        return AllOf(self, other)
+
+    @property
+    def reason(self) -> str:
+        return self.__class__.__name__
+
+class AnyOf(Criterion):
+    """Fires when any criterion fires. fired holds the first that did
+    """
+    def __init__(self, *criteria: Criterion):
+        self.criteria = [
+            child for criterion in criteria
+            for child in (criterion.criteria if isinstance(criterion, AnyOf) else [criterion])]
+        self.fired = None
+
+    def __call__(self, algorithm) -> bool:
+        for criterion in self.criteria:
+            if criterion(algorithm):
+                self.fired = criterion
+                return True
+        return False
+
+    @property
+    def reason(self) -> str:
+        return self.fired.reason if self.fired is not None else super().reason
+
+class AllOf(Criterion):
+    """Fires when every criterion fires
+    """
+    def __init__(self, *criteria: Criterion):
+        self.criteria = list(criteria)
+
+    def __call__(self, algorithm) -> bool:
+        return all(criterion(algorithm) for criterion in self.criteria)
+
+    @property
+    def reason(self) -> str:
+        return ' & '.join(criterion.reason for criterion in self.criteria)
+
+class MaxGenerations(Criterion):
+    def __init__(self, generations: int):
+        self.generations = generations
+
+    def __call__(self, algorithm) -> bool:
+        return algorithm.generation_count >= self.generations
+
+    @property
+    def reason(self) -> str:
+        return f'{self.generations} generations'
+
+class TargetFitness(Criterion):
+    """Fires once the best fitness of a generation reaches target, e.g. config.frames
+    """
+    def __init__(self, target: float):
+        self.target = target
+
+    def __call__(self, algorithm) -> bool:
+        return algorithm.statistics.latest('best') >= self.target
+
+    @property
+    def reason(self) -> str:
+        return f'target fitness {self.target}'
+
+class Stagnation(Criterion):
+    """Fires when the best fitness has not improved by more than min_improvement
+        over the last generations
+    """
+    def __init__(self, generations: int, min_improvement: float=0):
+        self.generations = generations
+        self.min_improvement = min_improvement
+
+    def __call__(self, algorithm) -> bool:
+        best = algorithm.statistics['best']
+        if best.size <= self.generations:
+            return False
+        return best[-self.generations:].max() - best[:-self.generations].max() <= self.min_improvement
+
+    @property
+    def reason(self) -> str:
+        return f'stagnated for {self.generations} generations'
+
+class WallClock(Criterion):
+    """Fires once seconds have passed since the algorithm started running
+    """
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __call__(self, algorithm) -> bool:
+        return time.perf_counter() - algorithm.start_time >= self.seconds
+
+    @property
+    def reason(self) -> str:
+        return f'wall clock {self.seconds}s'
+
+class EvaluationBudget(Criterion):
+    """Fires once the algorithm has run evaluations fitness evaluations
+    """
+    def __init__(self, evaluations: int):
+        self.evaluations = evaluations
+
+    def __call__(self, algorithm) -> bool:
+        return algorithm.evaluations >= self.evaluations
+
+    @property
+    def reason(self) -> str:
+        return f'{self.evaluations} evaluations'
+
+class DiversityCollapse(Criterion):
+    """Fires once a diversity statistic (entropy, diversity or unique) drops below threshold
+    """
+    def __init__(self, threshold: float, field: str='entropy'):
+        self.threshold = threshold
+        self.field = field
+
+    def __call__(self, algorithm) -> bool:
+        value = algorithm.statistics.latest(self.field)
+        return not np.isnan(value) and value < self.threshold
+
+    @property
+    def reason(self) -> str:
+        return f'{self.field} below {self.threshold}'
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+from sims.agents import adaptation
+from sims.agents import diversity
+from sims.agents import genetics
+from sims.agents import genomes
+
+class TestMutationControl(unittest.TestCase):
+    def statistics(self, success_rate: float) -> genetics.OnlineStatistics:
+        statistics = genetics.OnlineStatistics()
+        successes = int(success_rate * 10)
+        fitnesses = np.array([1] * successes + [0] * (10 - successes))
+        statistics.update(fitnesses, parent_fitnesses=np.zeros(10) + 0.5)
+        return statistics
+
+    def test_one_fifth_rule(self):
+        rule = adaptation.OneFifthRule(rate=2)
+        rule.update(self.statistics(0.5))
+        self.assertAlmostEqual(rule.rate, 2 / 0.85)
+        rule.update(self.statistics(0.1))
+        rule.update(self.statistics(0.1))
+        self.assertAlmostEqual(rule.rate, 2 * 0.85)
+        store = genomes.GenomeStore.from_matrix(np.zeros((3, 4)))
+        rule.apply(store)
+        np.testing.assert_array_almost_equal(store.mut_rates, [1.7] * 3)
+
+    def test_self_adaptive_bounds(self):
+        store = genomes.GenomeStore.from_matrix(np.zeros((200, 4)))
+        adaptation.SelfAdaptive(tau=5, max_rate=3).apply(store)
+        self.assertTrue(((store.mut_rates >= 1) & (store.mut_rates <= 3)).all())
+        self.assertGreater(np.unique(store.mut_rates).size, 2)
+
+    def test_scheduler(self):
+        scheduler = adaptation.OperatorScheduler(probability=0.5)
+        statistics = genetics.OnlineStatistics()
+        for _ in range(10):
+            statistics.update(
+                np.array([1, 1, 0, 0]), parent_fitnesses=np.full(4, 0.5),
+                crossed=np.array([False, False, True, True]),
+                diversity=diversity.Diversity(4, 2, 0.8, 4))
+            scheduler.update(statistics)
+        self.assertLess(scheduler.probability, 0.15)
+        statistics.update(np.array([1, 0]), diversity=diversity.Diversity(1, 0, 0, 4))
+        scheduler.update(statistics)
+        self.assertEqual(scheduler.probability, 0.1)
+
+class TestRates(unittest.TestCase):
+    def test_batch_flips_match_nbit(self):
+        nbits = [genetics.Nbit(genetics.Binary(value), rate) for value, rate in [(157, 2), (12, 1), (99, 3)]]
+        store = genomes.GenomeStore.from_genotypes(nbits)
+        np.random.seed(4)
+        store.flip_random()
+        np.random.seed(4)
+        for nbit in nbits:
+            nbit.mutate()
+        self.assertListEqual(
+            [str(genotype.literal) for genotype in store.genotypes()],
+            [str(nbit.literal) for nbit in nbits])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from sims.agents import diversity
+from sims.agents import genetics
+from sims.agents import genomes
+from sims.agents import hurdler
+from sims.agents import termination
+from sims.environments import courses
+
+class TestDiversity(unittest.TestCase):
+    def setUp(self):
+        self.matrix = np.random.default_rng(0).integers(0, 2, size=(12, 19)).astype(np.uint8)
+        self.packed = np.packbits(self.matrix, axis=1)
+
+    def test_popcount(self):
+        values = np.arange(256, dtype=np.uint8)
+        np.testing.assert_array_equal(diversity.popcount(values), diversity.POPCOUNT_TABLE)
+
+    def test_hamming_distances(self):
+        pairs = np.array(list(itertools.combinations(range(12), 2)))
+        actual = diversity.hamming_distances(self.packed, pairs[:, 0], pairs[:, 1])
+        expected = [np.count_nonzero(self.matrix[a] != self.matrix[b]) for a, b in pairs]
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_mean_hamming(self):
+        actual = diversity.mean_hamming(self.matrix)
+        expected = np.mean([
+            np.count_nonzero(a != b) for a, b in itertools.combinations(self.matrix, 2)])
+        self.assertAlmostEqual(actual, expected)
+
+    def test_entropy(self):
+        self.assertEqual(diversity.entropy(np.ones((5, 4))), 0)
+        self.assertEqual(diversity.entropy(np.array([[0, 1], [1, 0]])), 1)
+
+    def test_unique_count(self):
+        matrix = np.array([[0, 1, 1], [0, 1, 1], [1, 1, 0], [0, 1, 1]], dtype=np.uint8)
+        packed = np.packbits(matrix, axis=1)
+        self.assertEqual(diversity.unique_count(packed), 2)
+        self.assertEqual(diversity.unique_count(packed, np.array([3, 2, 3, 3])), 3)
+
+    def test_from_store(self):
+        genotypes = [genetics.Nbit(genetics.Binary(literal), 1) for literal in ['0b110', '0b0110', '0b110', '0b1']]
+        actual = diversity.Diversity.from_store(genomes.GenomeStore.from_genotypes(genotypes))
+        self.assertEqual(actual.unique, 3)
+        self.assertEqual(actual.width, 4)
+        self.assertAlmostEqual(actual.hamming, 9 / 6)
+
+class TestRestart(unittest.TestCase):
+    def test_restart_keeps_best(self):
+        np.random.seed(0)
+        trainer = hurdler.ProximityHurdlerTrainer(
+            10, 10000, courses=courses.Courses(2), restart_entropy=2)
+        report = trainer.run()
+        self.assertEqual(trainer.restarts, trainer.generation_count)
+        first, second = trainer.generations[:2]
+        best = max(first, key=lambda individual: individual.fitness)
+        self.assertEqual(second[0].parents, (best.index,))
+        self.assertEqual(second[0].genotype.literal, best.genotype.literal)
+        self.assertEqual(second[0].fitness, best.fitness)
+        self.assertEqual(report.generations[0].diversity['unique'], len(set(trainer.literals(first))))
+
+    def test_restart_keeps_elites(self):
+        np.random.seed(0)
+        trainer = hurdler.ProximityHurdlerTrainer(
+            10, 10000, courses=courses.Courses(2), restart_entropy=2, elitism=3,
+            termination=termination.MaxGenerations(2))
+        trainer.run()
+        first, second = trainer.generations[:2]
+        expected = sorted(individual.fitness for individual in first)[-3:][::-1]
+        self.assertListEqual([individual.fitness for individual in second[:3]], expected)
+        self.assertEqual(trainer.evaluations, (10 + 7) * 2)
+
+if __name__ == '__main__':
+    unittest.main()
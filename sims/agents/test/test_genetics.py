@@ -1,9 +1,15 @@
+import itertools
+import os
+import tempfile
 import unittest
 from unittest import mock
 
 import numpy as np
 
+from sims.agents import diversity
 from sims.agents import genetics
+from sims.agents import genomes
+from sims.agents import termination
 
 class TestBinary(unittest.TestCase):
     def setUp(self):
@@ -24,6 +30,11 @@ class TestBinary(unittest.TestCase):
         expected = self.binary
         self.assertEqual(actual, expected)
 
+    def test__eq_other_types(self):
+        self.assertNotEqual(self.binary, 6)
+        self.assertNotEqual(self.binary, '0b110')
+        self.assertNotIn(self.binary, [None, 6])
+
     def test__str(self):
         actual = str(self.binary)
         expected = '0b110'
@@ -34,6 +45,31 @@ class TestBinary(unittest.TestCase):
         expected = 6
         self.assertEqual(actual, expected)
 
+    def test__int_wide(self):
+        literal = (1 << 70) + 5
+        actual = int(genetics.Binary(literal))
+        expected = literal
+        self.assertEqual(actual, expected)
+
+    def test_encode(self):
+        actual = genetics.Binary.encode(np.array([6, 1, 0]))
+        expected = np.array([[1, 1, 0], [0, 0, 1], [0, 0, 0]])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_decode(self):
+        values = np.random.default_rng(0).integers(0, 1 << 40, size=50)
+        actual = genetics.Binary.decode(genetics.Binary.encode(values, width=48))
+        expected = values
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_stack(self):
+        binaries = [genetics.Binary(6), genetics.Binary('0b0001'), genetics.Binary(1)]
+        actual = genetics.Binary.decode(genetics.Binary.stack(binaries))
+        expected = np.array([6, 1, 1])
+        np.testing.assert_array_equal(actual, expected)
+        actual = genetics.Nbit.decode([genetics.Nbit(binary, 1) for binary in binaries])
+        np.testing.assert_array_equal(actual, expected)
+
     def test__len(self):
         actual = len(self.binary)
         expected = 3
@@ -153,8 +189,8 @@ class TestBinary(unittest.TestCase):
 
 class TestNbit(unittest.TestCase):
     def setUp(self):
-        self.nbit_a = genetics.Nbit(genetics.Binary(157), 2)
-        self.nbit_b = genetics.Nbit(genetics.Binary(12), 2)
+        self.nbit_a = genetics.Nbit(genetics.Binary(157), 1)
+        self.nbit_b = genetics.Nbit(genetics.Binary(12), 1)
 
     @mock.patch('sims.agents.genetics.np.random.rand')
     def test_mutate_0th(self, mock_rand):
@@ -180,6 +216,24 @@ class TestNbit(unittest.TestCase):
         expected = '0b10011100'
         self.assertEqual(actual, expected)
 
+    @mock.patch('sims.agents.genetics.np.random.rand')
+    def test_mutate_rate(self, mock_rand):
+        mock_rand.side_effect = [0.125 * 4, 0.125 * 7]
+        self.nbit_a.mut_rate = 2
+        self.nbit_a.mutate()
+        actual = str(self.nbit_a.literal)
+        expected = '0b10010100'
+        self.assertEqual(actual, expected)
+
+    @mock.patch('sims.agents.genetics.np.random.rand')
+    def test_mutate_fractional_rate(self, mock_rand):
+        mock_rand.side_effect = [0.6, 0.125 * 7]
+        self.nbit_a.mut_rate = 1.5
+        self.nbit_a.mutate()
+        actual = str(self.nbit_a.literal)
+        expected = '0b10011100'
+        self.assertEqual(actual, expected)
+
     def test_append_nbit(self):
         self.nbit_a.append(self.nbit_b)
         actual = self.nbit_a.literal
@@ -329,6 +383,34 @@ class TestNode(unittest.TestCase):
         expected = [1, 2, 3, 4, 5, 6, 7, 8]
         self.assertListEqual(actual, expected)
 
+    def test_size(self):
+        mock_node = genetics.Node.from_string('1(2(3,4),5(6(7),8))')
+        actual = mock_node.size(), mock_node.children[1].size()
+        expected = (8, 4)
+        self.assertEqual(actual, expected)
+
+    def test_descendent(self):
+        mock_node = genetics.Node.from_string('1(2(3,4),5(6(7),8))')
+        actual = [mock_node.descendent(i).nodetype for i in range(mock_node.size())]
+        expected = [descendent.nodetype for descendent in mock_node.descendents()]
+        self.assertListEqual(actual, expected)
+        with self.assertRaises(IndexError):
+            mock_node.descendent(8)
+
+    def test_cache_invalidated(self):
+        mock_node = genetics.Node.from_string('1(2(3,4),5)')
+        self.assertEqual((mock_node.size(), mock_node.depth()), (5, 3))
+        mock_node.children[1].insert_child(0, genetics.Node.from_string('6(7(8))'))
+        self.assertEqual((mock_node.size(), mock_node.depth()), (8, 5))
+        mock_node.pop_child(1)
+        self.assertEqual((mock_node.size(), mock_node.depth()), (4, 3))
+
+    def test_level(self):
+        mock_node = genetics.Node.from_string('1(2(3,4),5)')
+        actual = [descendent.level() for descendent in mock_node.descendents()]
+        expected = [1, 2, 3, 3, 2]
+        self.assertListEqual(actual, expected)
+
 class TestBinaryNodeFromString(unittest.TestCase):
     def setUp(self):
         self.mock_binary_tree = genetics.BinaryNode(
@@ -375,5 +457,318 @@ class TestBinaryNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             genetics.BinaryNode(children=too_long_children)
 
+class TestTreeGenotype(unittest.TestCase):
+    def setUp(self):
+        self.arities = {1: 2, 2: 2, 3: 0, 4: 0}
+        self.tree_a = genetics.TreeGenotype(
+            genetics.Node.from_string('1(2(3,4),3)'), 1, self.arities, max_depth=4)
+        self.tree_b = genetics.TreeGenotype(
+            genetics.Node.from_string('2(4,1(4,3))'), 1, self.arities, max_depth=4)
+
+    def test_validate_literal(self):
+        with self.assertRaises(ValueError):
+            genetics.TreeGenotype('1(2,3)', 1, self.arities)
+
+    def test_crossover(self):
+        offspring = self.tree_a.crossover(self.tree_b, (1, 2))
+        actual = str(offspring[0].literal), str(offspring[1].literal)
+        expected = ('Node: 1(1(4,3),3)', 'Node: 2(4,2(3,4))')
+        self.assertEqual(actual, expected)
+        self.assertEqual(str(self.tree_a.literal), 'Node: 1(2(3,4),3)')
+
+    def test_crossover_root(self):
+        offspring = self.tree_a.crossover(self.tree_b, (0, 1))
+        actual = str(offspring[0].literal), str(offspring[1].literal)
+        expected = ('Node: 4', 'Node: 2(1(2(3,4),3),1(4,3))')
+        self.assertEqual(actual, expected)
+
+    def test_crossover_rejects_bloat(self):
+        self.tree_a.max_depth = 3
+        offspring = self.tree_a.crossover(self.tree_b, (2, 0))
+        actual = str(offspring[0].literal), str(offspring[1].literal)
+        expected = ('Node: 1(2(3,4),3)', 'Node: 3')
+        self.assertEqual(actual, expected)
+
+    def test_point_mutate(self):
+        self.tree_a.point_mutate(1)
+        actual = str(self.tree_a.literal)
+        expected = 'Node: 1(1(3,4),3)'
+        self.assertEqual(actual, expected)
+
+    def test_hoist_mutate(self):
+        self.tree_a.hoist_mutate(1)
+        actual = str(self.tree_a.literal), self.tree_a.literal.parent
+        expected = ('Node: 2(3,4)', None)
+        self.assertEqual(actual, expected)
+
+    def test_mutate_rate(self):
+        self.tree_a.mut_rate = 0
+        self.tree_a.mutate()
+        self.assertEqual(str(self.tree_a.literal), 'Node: 1(2(3,4),3)')
+        self.tree_a.mut_rate = 3
+        operators = {mutation: mock.Mock() for mutation in genetics.TreeGenotype.MUTATIONS}
+        for mutation, operator in operators.items():
+            setattr(self.tree_a, f'{mutation}_mutate', operator)
+        self.tree_a.mutate()
+        self.assertEqual(sum(operator.call_count for operator in operators.values()), 3)
+
+    def test_grow_mutate_depth_limited(self):
+        np.random.seed(0)
+        for _ in range(20):
+            self.tree_a.grow_mutate()
+            self.assertLessEqual(self.tree_a.depth(), self.tree_a.max_depth)
+
+    def test_grow_full(self):
+        np.random.seed(0)
+        tree = genetics.TreeGenotype.grow(self.arities, 3, node_class=genetics.BinaryNode, full=True)
+        actual = tree.depth(), tree.size(), type(tree)
+        expected = (3, 7, genetics.BinaryNode)
+        self.assertEqual(actual, expected)
+
+class TestIndividual(unittest.TestCase):
+    def test_report_parent_indices(self):
+        parents = [
+            genetics.Individual(genetics.Nbit(genetics.Binary(5), 1), None),
+            genetics.Individual(genetics.Nbit(genetics.Binary(2), 1), None)]
+        child = genetics.Individual(genetics.Nbit(genetics.Binary(6), 1), None, parents=(1, 0))
+        child.fitness = 3
+        actual = child.report(genetics.GeneticAlgorithm.literals(parents)).parent_literals
+        expected = ['0b10', '0b101']
+        self.assertListEqual(actual, expected)
+        self.assertIsNone(child.report().parent_literals)
+
+    def test_lazy_phenotype(self):
+        factory = mock.Mock(side_effect=int)
+        individual = genetics.Individual(genetics.Nbit(genetics.Binary(5), 1), factory=factory)
+        self.assertFalse(individual.materialized)
+        factory.assert_not_called()
+        self.assertEqual(individual.phenotype, 5)
+        self.assertEqual(individual.phenotype, 5)
+        factory.assert_called_once()
+        self.assertTrue(individual.materialized)
+
+    def test_objectives_uninitialized(self):
+        individual = genetics.Individual(genetics.Nbit(genetics.Binary(5), 1), None)
+        with self.assertRaises(ValueError):
+            individual.objectives
+        individual.fitness = 3
+        self.assertIsNone(individual.report().objectives)
+
+    def test_generation_report_pareto_front(self):
+        generation = [
+            genetics.Individual(genetics.Nbit(genetics.Binary(i + 1), 1), None) for i in range(4)]
+        for individual, objectives in zip(generation, [(10, -4), (10, -2), (6, -1), (5, -3)]):
+            individual.fitness = objectives[0]
+            individual.objectives = objectives
+        report = genetics.GeneticAlgorithm(4).generation_report(generation)
+        actual = report.pareto_front
+        expected = [1, 2]
+        self.assertListEqual(actual, expected)
+        self.assertListEqual(report.individuals[1].objectives, [10, -2])
+
+class TestOnlineStatistics(unittest.TestCase):
+    def test_update(self):
+        statistics = genetics.OnlineStatistics(capacity=1)
+        statistics.update(np.array([1, 3]))
+        statistics.update(
+            np.array([4, 2, 5, 1]), parent_fitnesses=np.array([3, 3, 3, 3]),
+            crossed=np.array([True, True, False, False]))
+        self.assertEqual(len(statistics), 2)
+        np.testing.assert_array_equal(statistics['best'], [3, 5])
+        self.assertEqual(statistics.latest('improvement'), 2)
+        self.assertEqual(statistics.latest('success_rate'), 0.5)
+        self.assertEqual(statistics.latest('crossover_success_rate'), 0.5)
+        self.assertEqual(statistics.latest('copy_success_rate'), 0.5)
+        self.assertTrue(np.isnan(statistics['success_rate'][0]))
+
+    def test_unbred_excluded(self):
+        statistics = genetics.OnlineStatistics()
+        statistics.update(
+            np.array([9, 4, 2]), parent_fitnesses=np.array([np.nan, 3, 3]),
+            crossed=np.array([False, True, True]))
+        self.assertEqual(statistics.latest('success_rate'), 0.5)
+        self.assertEqual(statistics.latest('crossover_success_rate'), 0.5)
+        self.assertTrue(np.isnan(statistics.latest('copy_success_rate')))
+
+    def test_diversity(self):
+        matrix = np.random.default_rng(0).integers(0, 2, size=(12, 9)).astype(np.uint8)
+        statistics = genetics.OnlineStatistics()
+        statistics.update(
+            np.zeros(12), diversity=diversity.Diversity.from_store(genomes.GenomeStore.from_matrix(matrix)))
+        expected = np.mean([np.count_nonzero(a != b) for a, b in itertools.combinations(matrix, 2)]) / 9
+        self.assertAlmostEqual(statistics.latest('diversity'), expected)
+        self.assertEqual(statistics.latest('unique'), len({row.tobytes() for row in matrix}))
+        statistics.update(np.zeros(5), diversity=diversity.Diversity.from_store(
+            genomes.GenomeStore.from_matrix(np.ones((5, 4), dtype=np.uint8))))
+        self.assertEqual(statistics.latest('diversity'), 0)
+        self.assertEqual(statistics.latest('entropy'), 0)
+
+class TestHallOfFame(unittest.TestCase):
+    @staticmethod
+    def individual(value: int | str, fitness: float) -> genetics.Individual:
+        individual = genetics.Individual(genetics.Nbit(genetics.Binary(value), 1), None)
+        individual.fitness = fitness
+        return individual
+
+    def test_bounded(self):
+        hall_of_fame = genetics.HallOfFame(3)
+        hall_of_fame.update([self.individual(value, fitness) for value, fitness in [
+            (1, 5), (2, 9), (3, 1), (4, 7), (5, 2)]])
+        actual = [int(individual.genotype) for individual in hall_of_fame]
+        expected = [2, 4, 1]
+        self.assertListEqual(actual, expected)
+        self.assertEqual(int(hall_of_fame.best.genotype), 2)
+        self.assertFalse(hall_of_fame.add(self.individual(6, 4)))
+        self.assertEqual(len(hall_of_fame.members), 3)
+
+    def test_deduplicated(self):
+        hall_of_fame = genetics.HallOfFame(3)
+        self.assertTrue(hall_of_fame.add(self.individual(6, 5)))
+        self.assertFalse(hall_of_fame.add(self.individual(6, 5)))
+        self.assertTrue(hall_of_fame.add(self.individual('0b0110', 5)))
+        self.assertIn(self.individual(6, 0), hall_of_fame)
+        self.assertEqual(len(hall_of_fame), 2)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            genetics.HallOfFame(0)
+
+class TestGenealogy(unittest.TestCase):
+    def setUp(self):
+        # generation 0: rows 0-3, generation 1: rows 4-7, generation 2: rows 8-9
+        self.genealogy = genetics.Genealogy(capacity=2)
+        seed, crossover, elite = genetics.Genealogy.SEED, genetics.Genealogy.CROSSOVER, genetics.Genealogy.ELITE
+        self.genealogy.append(np.full((4, 2), -1), [seed] * 4)
+        self.genealogy.append([[0, -1], [0, 1], [1, 2], [2, 1]], [elite, crossover, crossover, crossover])
+        self.genealogy.append([[0, 1], [2, 3]], [crossover, crossover])
+
+    def test_append(self):
+        self.assertEqual(len(self.genealogy), 10)
+        self.assertEqual(self.genealogy.generations, 3)
+        np.testing.assert_array_equal(self.genealogy.rows(2), [8, 9])
+        np.testing.assert_array_equal(self.genealogy['index'][4:], [0, 1, 2, 3, 0, 1])
+        np.testing.assert_array_equal(self.genealogy.parents([5, 9]), [[0, 1], [6, 7]])
+        self.assertEqual(self.genealogy.table.dtype, np.int32)
+
+    def test_ancestry(self):
+        np.testing.assert_array_equal(self.genealogy.path(9), [1, 6, 9])
+        np.testing.assert_array_equal(np.flatnonzero(self.genealogy.ancestors(8)), [0, 1, 4, 5])
+        np.testing.assert_array_equal(self.genealogy.founders(8), [0, 1])
+        np.testing.assert_array_equal(self.genealogy.founders([0, 9]), [0, 1, 2])
+        np.testing.assert_array_equal(np.flatnonzero(self.genealogy.descendants(0)), [4, 5, 8])
+        self.assertEqual(self.genealogy.descendants(2).sum(), 3)
+        np.testing.assert_array_equal(self.genealogy.offspring_counts(), [2, 3, 2, 0, 1, 1, 1, 1, 0, 0])
+
+    def test_dict(self):
+        actual = genetics.Genealogy.from_dict(self.genealogy.to_dict())
+        self.assertEqual(actual.starts, self.genealogy.starts)
+        np.testing.assert_array_equal(actual.table[:len(actual)], self.genealogy.table[:10])
+        np.testing.assert_array_equal(np.flatnonzero(actual.descendants(2)), [6, 7, 9])
+
+    def test_invalid_parents(self):
+        with self.assertRaises(ValueError):
+            self.genealogy.append([[2, -1]], [genetics.Genealogy.ELITE])
+
+class CountingAlgorithm(genetics.GeneticAlgorithm):
+    """Each generation is the previous generation incremented by one"""
+    def __init__(self, generations: int, **kwargs):
+        super().__init__(3, **kwargs)
+        self.max_generations = generations
+
+    def check_termination(self):
+        if self.termination is not None:
+            return super().check_termination()
+        return self.generation_count >= self.max_generations
+
+    def seed_generation(self):
+        return [
+            genetics.Individual(genetics.Nbit(genetics.Binary(i + 1), 1), None)
+            for i in range(self.generation_size)]
+
+    def run_generation(self, generation):
+        for individual in generation:
+            individual.fitness = int(individual.genotype)
+
+    def next_generation(self, generation):
+        return [
+            genetics.Individual(
+                genetics.Nbit(genetics.Binary(int(individual.genotype) + 1), 1),
+                None, parents=(individual.index,))
+            for individual in generation]
+
+class ElitistCountingAlgorithm(CountingAlgorithm):
+    """CountingAlgorithm carrying its fittest individual over as an elite"""
+    def next_generation(self, generation):
+        return [generation[-1].elite()] + super().next_generation(generation)[1:]
+
+class TestGeneticAlgorithm(unittest.TestCase):
+    def test_genealogy(self):
+        algorithm = CountingAlgorithm(4, retain_generations=1)
+        report = algorithm.run()
+        genealogy = algorithm.genealogy
+        self.assertEqual(len(genealogy), 12)
+        np.testing.assert_array_equal(genealogy.path(11), [2, 5, 8, 11])
+        np.testing.assert_array_equal(
+            genealogy['operator'], [genetics.Genealogy.SEED] * 3 + [genetics.Genealogy.ELITE] * 9)
+        self.assertEqual(report.to_dict()['genealogy'], genealogy.to_dict())
+
+    def test_retain_all(self):
+        algorithm = CountingAlgorithm(5)
+        report = algorithm.run()
+        self.assertEqual(len(algorithm.generations), 5)
+        actual = [generation.highest_fitness for generation in report.generations]
+        expected = [3, 4, 5, 6, 7]
+        self.assertListEqual(actual, expected)
+
+    def test_retain_generations(self):
+        algorithm = CountingAlgorithm(5, retain_generations=2)
+        report = algorithm.run()
+        self.assertEqual(len(algorithm.generations), 2)
+        self.assertEqual(algorithm.generation_count, 5)
+        actual = [generation.highest_fitness for generation in report.generations]
+        expected = [3, 4, 5, 6, 7]
+        self.assertListEqual(actual, expected)
+        actual_parents = report.generations[3].individuals[0].parent_literals
+        expected_parents = ['0b11']
+        self.assertListEqual(actual_parents, expected_parents)
+
+    def test_archive_summary(self):
+        algorithm = CountingAlgorithm(4, retain_generations=1, archive=genetics.GeneticAlgorithm.ARCHIVE_SUMMARY)
+        report = algorithm.run()
+        self.assertIsInstance(report.generations[0], genetics.GenerationSummary)
+        np.testing.assert_array_equal(report.generations[0].fitnesses, [1, 2, 3])
+        self.assertEqual(len(report.generations[-1].individuals), 3)
+
+    def test_spill(self):
+        with tempfile.TemporaryDirectory() as spill_path:
+            algorithm = CountingAlgorithm(4, retain_generations=1, spill_path=spill_path)
+            algorithm.run()
+            actual = sorted(os.listdir(spill_path))
+            expected = ['generation_0.json', 'generation_1.json', 'generation_2.json']
+            self.assertListEqual(actual, expected)
+            self.assertIsInstance(algorithm.archived[0], genetics.GenerationSummary)
+
+    def test_hall_of_fame(self):
+        algorithm = CountingAlgorithm(4, retain_generations=1, hall_of_fame_size=2)
+        report = algorithm.run()
+        self.assertEqual(int(algorithm.best.genotype), 6)
+        actual = [individual.literal for individual in report.hall_of_fame]
+        expected = ['0b110', '0b101']
+        self.assertListEqual(actual, expected)
+
+    def test_evaluations_skip_elites(self):
+        algorithm = ElitistCountingAlgorithm(4)
+        algorithm.run()
+        self.assertEqual(algorithm.evaluations, 3 + 2 * 3)
+        algorithm = ElitistCountingAlgorithm(10, termination=termination.EvaluationBudget(7))
+        algorithm.run()
+        self.assertEqual(algorithm.generation_count, 3)
+
+    def test_invalid_retention(self):
+        with self.assertRaises(ValueError):
+            CountingAlgorithm(4, retain_generations=0)
+        with self.assertRaises(ValueError):
+            CountingAlgorithm(4, archive='everything')
+
 if __name__ == '__main__':
     unittest.main()
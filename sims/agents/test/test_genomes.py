@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from sims.agents import genetics
+from sims.agents import genomes
+from sims.agents import hurdler
+
+class TestGenomeStore(unittest.TestCase):
+    def setUp(self):
+        self.values = [6, 1, 0, 1000, 37]
+        self.genotypes = [genetics.Nbit(genetics.Binary(value), 1) for value in self.values]
+        self.store = genomes.GenomeStore.from_genotypes(self.genotypes)
+
+    def test_ragged_indices(self):
+        actual = genomes.ragged_indices(np.array([5, 0, 9]), np.array([2, 0, 3]))
+        expected = np.array([5, 6, 9, 10, 11])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_round_trip(self):
+        actual = [str(genotype.literal) for genotype in self.store.genotypes()]
+        expected = [str(genotype.literal) for genotype in self.genotypes]
+        self.assertListEqual(actual, expected)
+
+    def test_decode(self):
+        np.testing.assert_array_equal(self.store.decode(), self.values)
+
+    def test_fixed_width(self):
+        matrix = self.store.fixed_width(12)
+        self.assertEqual(matrix.shape, (5, 12))
+        np.testing.assert_array_equal(genetics.Binary.decode(matrix), self.values)
+        np.testing.assert_array_equal(genomes.GenomeStore.from_matrix(matrix).decode(), self.values)
+        with self.assertRaises(ValueError):
+            self.store.fixed_width(4)
+
+    def test_invalid_offsets(self):
+        with self.assertRaises(ValueError):
+            genomes.GenomeStore(np.zeros(4), np.array([0, 3, 2, 4]))
+        with self.assertRaises(ValueError):
+            genomes.GenomeStore(np.zeros(4), np.array([0, 3]))
+
+    def test_crossover_matches_nbit(self):
+        rng = np.random.default_rng(0)
+        first = rng.integers(0, 5, size=20)
+        second = rng.integers(0, 5, size=20)
+        positions = rng.integers(0, 12, size=20)
+        offspring = self.store.crossover(first, second, positions).genotypes()
+        for pair, (a, b, position) in enumerate(zip(first, second, positions)):
+            expected = self.genotypes[a].crossover(self.genotypes[b], position)
+            self.assertEqual(offspring[2 * pair].literal, expected[0].literal)
+            self.assertEqual(offspring[2 * pair + 1].literal, expected[1].literal)
+
+    def test_flip(self):
+        self.store.flip(np.array([0, 0, 0, 9, 5]))
+        actual = [int(genotype) for genotype in self.store.genotypes()]
+        expected = [2, 0, 1, 1001, 36]
+        self.assertListEqual(actual, expected)
+
+class TestBatchBreeding(unittest.TestCase):
+    def test_matches_breed_and_mutate(self):
+        trainer = hurdler.ProximityHurdlerTrainer(30, 10000)
+        np.random.seed(1)
+        generation = trainer.seed_generation()
+        trainer.index_generation(generation)
+        for individual in generation:
+            individual.fitness = np.random.rand()
+        parent_sets = trainer.select(generation) + trainer.select(generation)
+        state = np.random.get_state()
+        children = [child for parents in parent_sets for child in trainer.breed(parents)]
+        expected = [trainer.mutate(child) for child in children]
+        np.random.set_state(state)
+        actual = trainer.breed_generation(generation, parent_sets)
+        self.assertListEqual(
+            [(str(individual.genotype.literal), individual.parents) for individual in actual],
+            [(str(individual.genotype.literal), individual.parents) for individual in expected])
+        self.assertFalse(any(individual.materialized for individual in actual))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from sims.agents import hurdler
+from sims.environments import courses
+
+class TestElitism(unittest.TestCase):
+    def test_elites_not_reevaluated(self):
+        np.random.seed(0)
+        trainer = hurdler.ProximityHurdlerTrainer(12, 10000, courses=courses.Courses(2), elitism=2)
+        report = trainer.run()
+        actual = [generation.highest_fitness for generation in report.generations]
+        self.assertTrue(np.all(np.diff(actual) >= 0))
+        self.assertEqual(trainer.evaluations, (12 + 10 * (trainer.generation_count - 1)) * 2)
+        self.assertEqual(trainer.best.fitness, max(actual))
+        first, second = trainer.generations[:2]
+        best = max(first, key=lambda individual: individual.fitness)
+        self.assertEqual(second[0].parents, (best.index,))
+        self.assertEqual(second[0].fitness, best.fitness)
+        self.assertFalse(second[0].materialized)
+
+    def test_genealogy(self):
+        np.random.seed(1)
+        trainer = hurdler.ProximityHurdlerTrainer(12, 10000, courses=courses.Courses(2), elitism=2)
+        trainer.run()
+        genealogy = trainer.genealogy
+        self.assertEqual(len(genealogy), 12 * trainer.generation_count)
+        for generation, individuals in enumerate(trainer.generations):
+            rows = genealogy.rows(generation)
+            if generation == 0:
+                self.assertTrue((genealogy['operator'][rows] == genealogy.SEED).all())
+                continue
+            np.testing.assert_array_equal(genealogy['operator'][rows[:2]], genealogy.ELITE)
+            actual = genealogy.parents(rows) - genealogy.starts[generation - 1]
+            expected = [individual.parents + (-1,) * (2 - len(individual.parents)) for individual in individuals]
+            np.testing.assert_array_equal(np.where(genealogy.parents(rows) < 0, -1, actual), expected)
+
+    def test_simulation_elites(self):
+        np.random.seed(0)
+        trainer = hurdler.ProximityHurdlerTrainer(6, 10000, elitism=1)
+        trainer.run()
+        for previous, generation in zip(trainer.generations, trainer.generations[1:]):
+            best = max(previous, key=lambda individual: individual.fitness)
+            self.assertEqual(generation[0].genotype.literal, best.genotype.literal)
+            np.testing.assert_array_equal(generation[0].history, best.history)
+
+    def test_invalid_elitism(self):
+        with self.assertRaises(ValueError):
+            hurdler.ProximityHurdlerTrainer(10, 10000, elitism=10)
+
+class TestWorkers(unittest.TestCase):
+    def test_shared_evaluation_matches_serial(self):
+        reports = []
+        for workers in [1, 2]:
+            np.random.seed(0)
+            trainer = hurdler.ProximityHurdlerTrainer(10, 10000, courses=courses.Courses(2), workers=workers)
+            reports.append([generation.average_fitness for generation in trainer.run().generations])
+            self.assertIsNone(trainer.evaluator)
+        self.assertEqual(reports[1], reports[0])
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            hurdler.ProximityHurdlerTrainer(10, 10000, workers=2)
+
+if __name__ == '__main__':
+    unittest.main()
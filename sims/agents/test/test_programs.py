@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from sims.agents import genetics
+from sims.agents import programs
+
+class TestCompiler(unittest.TestCase):
+    def setUp(self):
+        self.compiler = programs.Compiler()
+        self.features = np.array([
+            [120, 0, 0],
+            [40, 10, -3],
+            [-20, 55, 4]], dtype=np.float64)
+
+    def test_structure(self):
+        actual = programs.structure(genetics.Node.from_string('10(0,12(5,1))'))
+        expected = (10, 2, 0, 0, 12, 2, 5, 0, 1, 0)
+        self.assertEqual(actual, expected)
+
+    def test_source(self):
+        actual = self.compiler.source(genetics.Node.from_string('11(0,6)'))
+        expected = 'def program(features):\n    return f11(features[:, 0], 100.0)\n'
+        self.assertEqual(actual, expected)
+
+    def test_matches_reference(self):
+        np.random.seed(0)
+        arities = programs.HURDLER_VOCABULARY.arities
+        for _ in range(20):
+            tree = genetics.TreeGenotype.grow(arities, 5)
+            actual = self.compiler.compile(tree)(self.features)
+            expected = programs.HURDLER_VOCABULARY.evaluate(tree, self.features)
+            np.testing.assert_allclose(actual, expected)
+
+    def test_constant_broadcast(self):
+        actual = self.compiler.compile(genetics.Node.from_string('5'))(self.features)
+        expected = np.array([10, 10, 10], dtype=np.float64)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_protected_divide(self):
+        actual = self.compiler.compile(genetics.Node.from_string('13(0,3)'))(self.features)
+        expected = np.array([1, 1, 1], dtype=np.float64)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_cache(self):
+        program_a = self.compiler.compile(genetics.Node.from_string('10(0,1)'))
+        program_b = self.compiler.compile(genetics.Node.from_string('10(0,1)'))
+        program_c = self.compiler.compile(genetics.Node.from_string('10(1,0)'))
+        self.assertIs(program_a, program_b)
+        self.assertIsNot(program_a, program_c)
+        self.assertEqual(len(self.compiler), 2)
+
+    def test_invalid_arity(self):
+        with self.assertRaises(ValueError):
+            self.compiler.compile(genetics.Node.from_string('10(0)'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from sims.agents import selection
+
+def reference_ranks(objectives: np.ndarray) -> np.ndarray:
+    ranks = np.full(len(objectives), -1)
+    remaining = set(range(len(objectives)))
+    rank = 0
+    while remaining:
+        front = [
+            i for i in remaining
+            if not any(
+                (objectives[j] >= objectives[i]).all() and (objectives[j] > objectives[i]).any()
+                for j in remaining)]
+        ranks[front] = rank
+        remaining -= set(front)
+        rank += 1
+    return ranks
+
+class TestSelection(unittest.TestCase):
+    def setUp(self):
+        self.objectives = np.array([
+            [10, -1],
+            [5, 0],
+            [10, -3],
+            [7, -1],
+            [5, -2],
+            [10, -1]])
+
+    def test_dominance_matrix(self):
+        packed = selection.dominance_matrix(self.objectives, block_size=4)
+        actual = np.unpackbits(packed, axis=1, count=len(self.objectives))
+        expected = np.array([
+            [0, 0, 1, 1, 1, 0],
+            [0, 0, 0, 0, 1, 0],
+            [0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 1, 0],
+            [0, 0, 0, 0, 0, 0],
+            [0, 0, 1, 1, 1, 0]])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_non_dominated_ranks(self):
+        actual = selection.non_dominated_ranks(self.objectives)
+        expected = np.array([0, 0, 1, 1, 2, 0])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_ranks_match_reference(self):
+        rng = np.random.default_rng(0)
+        objectives = rng.integers(0, 6, size=(300, 3))
+        actual = selection.non_dominated_ranks(objectives, block_size=64)
+        expected = reference_ranks(objectives)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_pareto_front(self):
+        actual = selection.pareto_front(self.objectives)
+        expected = np.array([0, 1, 5])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_crowding_distance(self):
+        objectives = np.array([[0, 4], [1, 3], [3, 1], [4, 0], [0, 0]])
+        ranks = np.array([0, 0, 0, 0, 1])
+        actual = selection.crowding_distance(objectives, ranks)
+        expected = np.array([np.inf, 1.5, 1.5, np.inf, np.inf])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_nsga2_select(self):
+        objectives = np.array([[0, 4], [1, 3], [2, 2], [4, 0], [0, 0], [3, 0.5]])
+        actual = set(selection.nsga2_select(objectives, 3).tolist())
+        expected = {0, 2, 3}
+        self.assertEqual(actual, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import time
+import types
+import unittest
+
+import numpy as np
+
+from sims.agents import genetics
+from sims.agents import termination
+
+def algorithm_state(bests: list[float], **kwargs) -> types.SimpleNamespace:
+    statistics = genetics.OnlineStatistics()
+    for best in bests:
+        statistics.update(np.array([best]))
+    state = {'generation_count': len(bests), 'evaluations': 0, 'start_time': time.perf_counter()}
+    state.update(kwargs)
+    return types.SimpleNamespace(statistics=statistics, **state)
+
+class PlateauAlgorithm(genetics.GeneticAlgorithm):
+    """Fitness of generation n is min(n, 3)"""
+    def seed_generation(self):
+        return [genetics.Individual(genetics.Nbit(genetics.Binary(0), 1), None) for _ in range(self.generation_size)]
+
+    def run_generation(self, generation):
+        for individual in generation:
+            individual.fitness = min(self.generation_count, 3)
+
+    def next_generation(self, generation):
+        return self.seed_generation()
+
+class TestCriteria(unittest.TestCase):
+    def test_max_generations(self):
+        self.assertFalse(termination.MaxGenerations(3)(algorithm_state([1, 2])))
+        self.assertTrue(termination.MaxGenerations(3)(algorithm_state([1, 2, 3])))
+
+    def test_target_fitness(self):
+        self.assertFalse(termination.TargetFitness(1000)(algorithm_state([])))
+        self.assertFalse(termination.TargetFitness(1000)(algorithm_state([1000, 999])))
+        self.assertTrue(termination.TargetFitness(1000)(algorithm_state([5, 1000])))
+
+    def test_stagnation(self):
+        criterion = termination.Stagnation(2)
+        self.assertFalse(criterion(algorithm_state([1, 1])))
+        self.assertFalse(criterion(algorithm_state([1, 2, 1])))
+        self.assertTrue(criterion(algorithm_state([1, 2, 1, 2])))
+        self.assertTrue(termination.Stagnation(2, min_improvement=1)(algorithm_state([1, 2, 2])))
+
+    def test_budgets(self):
+        self.assertTrue(termination.EvaluationBudget(100)(algorithm_state([], evaluations=100)))
+        self.assertFalse(termination.EvaluationBudget(100)(algorithm_state([], evaluations=99)))
+        self.assertTrue(termination.WallClock(1)(algorithm_state([], start_time=time.perf_counter() - 2)))
+        self.assertFalse(termination.WallClock(60)(algorithm_state([])))
+
+    def test_diversity_collapse(self):
+        state = algorithm_state([1])
+        self.assertFalse(termination.DiversityCollapse(0.1)(state))
+        state.statistics.update(np.array([1]), diversity=types.SimpleNamespace(
+            normalized_hamming=0, unique=1, entropy=0.05))
+        self.assertTrue(termination.DiversityCollapse(0.1)(state))
+        self.assertTrue(termination.DiversityCollapse(2, field='unique')(state))
+
+    def test_compose(self):
+        criterion = termination.MaxGenerations(5) | termination.TargetFitness(3) | termination.Stagnation(9)
+        self.assertEqual(len(criterion.criteria), 3)
+        self.assertTrue(criterion(algorithm_state([1, 3])))
+        self.assertEqual(criterion.reason, 'target fitness 3')
+        both = termination.MaxGenerations(2) & termination.TargetFitness(3)
+        self.assertFalse(both(algorithm_state([1, 2])))
+        self.assertTrue(both(algorithm_state([1, 3])))
+
+class TestAlgorithmTermination(unittest.TestCase):
+    def test_stagnation_stops_run(self):
+        algorithm = PlateauAlgorithm(
+            2, termination=termination.Stagnation(2) | termination.MaxGenerations(20))
+        report = algorithm.run()
+        actual = [generation.highest_fitness for generation in report.generations]
+        expected = [0, 1, 2, 3, 3, 3]
+        self.assertListEqual(actual, expected)
+        self.assertEqual(report.termination, 'stagnated for 2 generations')
+        self.assertEqual(algorithm.evaluations, 12)
+
+    def test_default_requires_override(self):
+        with self.assertRaises(NotImplementedError):
+            PlateauAlgorithm(2).check_termination()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import contextlib
+import gc
+import io
+import tracemalloc
+
+import numpy as np
+
+from sims.agents import adaptation
+from sims.agents import hurdler
+from sims.agents import termination
+from sims.environments import courses
+from sims.environments import hurdles
+from settings import DEFAULT_CONFIG
+
+ADAPTATIONS = {
+    'fixed': dict,
+    'one_fifth': lambda: {'mutation_control': adaptation.OneFifthRule(rate=2)},
+    'self_adaptive': lambda: {'mutation_control': adaptation.SelfAdaptive()},
+    'scheduled': lambda: {
+        'mutation_control': adaptation.SelfAdaptive(), 'scheduler': adaptation.OperatorScheduler()},
+}
+
+
+def simulate_without_ui(sim: hurdles.Simulation):
+    """Runs sim like Simulation.run without drawing frames or printing
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not sim.terminate():
+            sim.run_gameobjects()
+            sim.frame_number += 1
+        for gameobject in sim.all_gameobjects():
+            gameobject.terminate(sim.get_state())
+
+def generation_memory(generation_size: int=200) -> float:
+    """Memory retained by a simulated and post-processed generation
+
+    Args:
+        generation_size (int, optional): number of individuals. Defaults to 200.
+
+    Returns:
+        float: bytes retained per individual
+    """
+    np.random.seed(0)
+    trainer = hurdler.ProximityHurdlerTrainer(generation_size, 10000)
+    warmup = trainer.seed_generation()[:1]
+    simulate_without_ui(hurdles.Simulation(
+        hurdlers=[individual.phenotype for individual in warmup], hurdles=[hurdles.Hurdle()]))
+    trainer.post_process_generation(warmup)
+    gc.collect()
+    tracemalloc.start()
+    generation = trainer.seed_generation()
+    sim = hurdles.Simulation(
+        hurdlers=[individual.phenotype for individual in generation],
+        hurdles=[hurdles.Hurdle()])
+    simulate_without_ui(sim)
+    trainer.post_process_generation(generation)
+    del sim
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained / generation_size
+
+def generations_to_target(
+    adaptation_name: str, target: float=888, runs: int=60, max_generations: int=60,
+    generation_size: int=20) -> np.ndarray:
+    """Generations each seeded run needs to reach target mean fitness on 8 courses
+
+    Args:
+        adaptation_name (str): key of ADAPTATIONS
+        target (float, optional): target fitness. Defaults to 888, reached only by
+            thresholds 125 to 145.
+        runs (int, optional): number of seeds. Defaults to 60.
+        max_generations (int, optional): Defaults to 60.
+        generation_size (int, optional): Defaults to 20.
+
+    Returns:
+        np.ndarray: generations of each run, max_generations + 1 if target was not reached
+    """
+    generations = np.zeros(runs, dtype=np.int64)
+    for run in range(runs):
+        np.random.seed(run)
+        reached = termination.TargetFitness(target)
+        trainer = hurdler.ProximityHurdlerTrainer(
+            generation_size, 10000, courses=courses.Courses(8),
+            termination=reached | termination.MaxGenerations(max_generations),
+            **ADAPTATIONS[adaptation_name]())
+        trainer.run()
+        generations[run] = trainer.generation_count if reached(trainer) else max_generations + 1
+    return generations
+
+if __name__ == '__main__':
+    print(f'generation memory: {generation_memory():.0f} B/individual @ {DEFAULT_CONFIG.frames} frames')
+    for name in ADAPTATIONS:
+        generations = generations_to_target(name)
+        print(
+            f'generations to target ({name}): median {np.median(generations):.0f}, '
+            f'mean {generations.mean():.1f}, reached {np.count_nonzero(generations <= 60)}/{generations.size}')
@@ -0,0 +1,387 @@
+"""Command line entry point, run as python -m sims <command>
+
+Commands:
+    train: train ProximityHurdler thresholds over one or more seeds
+    sweep: train over the product of parameter values and seeds
+    bench: time the simulation engines on one population
+    render: render traces recorded by Simulation to video
+    inspect-report: summarize AlgorithmReport json files
+    aggregate: query the fitness curves of a sweep store
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from settings import Config, DEFAULT_CONFIG
+from sims import benchmarks
+from sims import jobs
+from sims import sweeps
+from sims.agents import hurdler
+from sims.agents import termination
+from sims.environments import courses as courses_module
+from sims.environments import hurdles
+from sims.environments import policies
+from sims.environments import trace
+
+ENGINE_OBJECT = 'object'
+ENGINE_BATCH = 'batch'
+ENGINE_EVENT = 'event'
+ENGINE_KERNEL = 'kernel'
+ENGINES = (ENGINE_OBJECT, ENGINE_BATCH, ENGINE_EVENT, ENGINE_KERNEL)
+FORMAT_TEXT = 'text'
+FORMAT_JSON = 'json'
+FORMAT_CSV = 'csv'
+FORMATS = (FORMAT_TEXT, FORMAT_JSON, FORMAT_CSV)
+ADAPTATIONS = ('fixed', 'one_fifth', 'self_adaptive', 'scheduled')
+SWEPT = ('generation_size', 'elitism', 'adaptation', 'selection', 'courses')
+UNHASHED = ('checkpoint_dir', 'eval_workers')
+STORE_NAME = 'sweep.npz'
+invalid_override_msg = 'invalid config override "{override}". Must be KEY=VALUE'
+
+def parse_override(override: str) -> tuple[str, any]:
+    """KEY=VALUE config override, VALUE parsed as json when possible, e.g. frames=500 or gravity=[0,-2]
+    """
+    key, separator, value = override.partition('=')
+    if separator == '' or key == '':
+        raise argparse.ArgumentTypeError(invalid_override_msg.format(override=override))
+    try:
+        return key, json.loads(value)
+    except json.JSONDecodeError:
+        return key, value
+
+def build_config(overrides: list[tuple[str, any]]) -> Config:
+    return DEFAULT_CONFIG.replace(**dict(overrides or []))
+
+def emit(rows: list[dict], output_format: str, stream=None):
+    """Write rows as an aligned text table, a json list or csv
+    """
+    stream = stream or sys.stdout
+    if output_format == FORMAT_JSON:
+        json.dump(rows, stream, indent=4)
+        stream.write('\n')
+        return
+    if len(rows) == 0:
+        return
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    if output_format == FORMAT_CSV:
+        writer = csv.DictWriter(stream, columns, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    cells = [columns] + [[format_cell(row.get(column, '')) for column in columns] for row in rows]
+    widths = [max(len(line[index]) for line in cells) for index in range(len(columns))]
+    for line in cells:
+        stream.write('  '.join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() + '\n')
+
+def format_cell(value: any) -> str:
+    if isinstance(value, float):
+        return f'{value:.4g}'
+    return str(value)
+
+def map_runs(
+    function: callable, specs: list[dict], workers: int, on_result: callable=None,
+    timeout: float=None) -> list:
+    """function of every spec, in order, as jobs of a jobs.JobQueue of process workers
+        when workers > 1. on_result is called with each spec and its result as soon as it finishes.
+        Runs that fail or time out return their exception, so the other runs carry on
+    """
+    kind = jobs.JobQueue.PROCESS if workers > 1 else jobs.JobQueue.THREAD
+    with jobs.JobQueue(max(workers, 1), kind=kind) as job_queue:
+        return job_queue.map(function, specs, timeout=timeout, on_result=on_result, return_exceptions=True)
+
+def error_row(row: dict, error: BaseException) -> dict:
+    return {**row, 'error': f'{type(error).__name__}: {error}'}
+
+def spec_hash(spec: dict) -> str:
+    """Stable hash of everything in spec that changes the result of a run
+    """
+    hashed = {key: value for key, value in spec.items() if key not in UNHASHED}
+    return hashlib.sha256(json.dumps(hashed, sort_keys=True).encode()).hexdigest()[:12]
+
+def report_path(checkpoint_dir: str, spec: dict) -> str:
+    """Report file of a spec, named by its SWEPT parameters and seed and told apart from runs with
+        other overrides, generations, termination, engine or seed_max by spec_hash
+    """
+    name = '_'.join(f'{key}-{spec[key]}' for key in SWEPT) + f'_seed-{spec["seed"]}_{spec_hash(spec)}.json'
+    return os.path.join(checkpoint_dir, name)
+
+def summarize_report(report: dict) -> dict:
+    generations = report['generations']
+    return {
+        'generations': len(generations),
+        'best': max(generation['highest_fitness'] for generation in generations),
+        'final_average': generations[-1]['average_fitness'],
+        'termination': report.get('termination'),
+        'runtime': report['runtime'],
+    }
+
+def run_training(spec: dict) -> tuple[dict, np.ndarray]:
+    """Train on one spec, or load its report from the checkpoint directory when already run
+
+    Args:
+        spec (dict): seed, SWEPT parameters, generations, target, stagnation, engine,
+            seed_max, eval_workers, config overrides and checkpoint_dir
+
+    Returns:
+        tuple[dict, np.ndarray]: SWEPT parameters, seed and summary of the run, and its sweeps.run_curves
+    """
+    row = {key: spec[key] for key in SWEPT}
+    row['seed'] = spec['seed']
+    path = None
+    if spec['checkpoint_dir'] is not None:
+        path = report_path(spec['checkpoint_dir'], spec)
+        if os.path.exists(path):
+            with open(path) as report_file:
+                report = json.load(report_file)
+            return {**row, **summarize_report(report), 'resumed': True}, sweeps.run_curves(report)
+    config = build_config(spec['overrides'])
+    courses = None
+    if spec['engine'] != ENGINE_OBJECT:
+        courses = courses_module.Courses(spec['courses'], config=config, engine=spec['engine'])
+    target = spec['target'] if spec['target'] is not None else config.frames
+    criterion = (
+        termination.TargetFitness(target)
+        | termination.MaxGenerations(spec['generations'] or config.nbit_generations))
+    if spec['stagnation'] is not None:
+        criterion = termination.Stagnation(spec['stagnation']) | criterion
+    np.random.seed(spec['seed'])
+    trainer = hurdler.ProximityHurdlerTrainer(
+        spec['generation_size'], spec['seed_max'], courses=courses, config=config,
+        selection_method=spec['selection'], elitism=spec['elitism'], termination=criterion,
+        workers=spec['eval_workers'] if courses is not None else 1,
+        **benchmarks.ADAPTATIONS[spec['adaptation']]())
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = trainer.run()
+    if path is not None:
+        os.makedirs(spec['checkpoint_dir'], exist_ok=True)
+        report.to_json(path)
+    report = report.to_dict()
+    return {**row, **summarize_report(report), 'resumed': False}, sweeps.run_curves(report)
+
+def training_specs(args: argparse.Namespace, grid: dict) -> list[dict]:
+    """One spec per combination of grid values and seed
+    """
+    specs = []
+    for values in itertools.product(*(grid[key] for key in SWEPT)):
+        for seed in range(args.seed, args.seed + args.runs):
+            specs.append({
+                **dict(zip(SWEPT, values)), 'seed': seed, 'generations': args.generations,
+                'target': args.target, 'stagnation': args.stagnation, 'engine': args.engine,
+                'seed_max': args.seed_max, 'eval_workers': args.eval_workers, 'overrides': args.set,
+                'checkpoint_dir': args.checkpoint_dir})
+    return specs
+
+def run_grid(args: argparse.Namespace, grid: dict) -> list[dict]:
+    """Train every spec of grid. With a checkpoint directory, the curves of every run are added
+        to its sweeps.SweepStore as soon as the run finishes, saved periodically and once all
+        runs are done. Runs missing from a store interrupted before saving are added on resume
+    """
+    on_result = None
+    store = None
+    if args.checkpoint_dir is not None:
+        store = sweeps.SweepStore(os.path.join(args.checkpoint_dir, STORE_NAME))
+
+        def on_result(spec: dict, result: tuple[dict, np.ndarray] | BaseException):
+            if isinstance(result, BaseException):
+                return
+            row, curves = result
+            key = os.path.splitext(os.path.basename(report_path(args.checkpoint_dir, spec)))[0]
+            if key not in store:
+                store.add_curves(key, curves, {name: row[name] for name in SWEPT + ('seed',)})
+    specs = training_specs(args, grid)
+    try:
+        results = map_runs(run_training, specs, args.workers, on_result, args.timeout)
+    finally:
+        if store is not None:
+            store.flush()
+    return [
+        error_row({key: spec[key] for key in SWEPT + ('seed',)}, result) if isinstance(result, BaseException)
+        else result[0]
+        for spec, result in zip(specs, results)]
+
+def train(args: argparse.Namespace) -> list[dict]:
+    grid = {
+        'generation_size': [args.generation_size], 'elitism': [args.elitism],
+        'adaptation': [args.adaptation], 'selection': [args.selection], 'courses': [args.courses]}
+    return run_grid(args, grid)
+
+def sweep(args: argparse.Namespace) -> list[dict]:
+    grid = {
+        'generation_size': args.generation_sizes, 'elitism': args.elitisms,
+        'adaptation': args.adaptations, 'selection': args.selections, 'courses': args.course_counts}
+    return run_grid(args, grid)
+
+def time_engine(spec: dict) -> dict:
+    """Seconds to run a population of random thresholds on one course with an engine
+    """
+    config = build_config(spec['overrides'])
+    thresholds = np.random.default_rng(spec['seed']).integers(0, spec['threshold_max'], spec['population'])
+    start = time.perf_counter()
+    if spec['engine'] == ENGINE_OBJECT:
+        hurdlers = [hurdles.ProximityHurdler(int(threshold), config=config) for threshold in thresholds]
+        benchmarks.simulate_without_ui(hurdles.Simulation(hurdlers, [hurdles.Hurdle(config)], config=config))
+    else:
+        courses = courses_module.Courses(spec['courses'], config=config, engine=spec['engine'])
+        courses.evaluate(policies.ThresholdPolicy(thresholds))
+    return {
+        'engine': spec['engine'], 'population': spec['population'],
+        'courses': 1 if spec['engine'] == ENGINE_OBJECT else spec['courses'],
+        'seconds': time.perf_counter() - start}
+
+def bench(args: argparse.Namespace) -> list[dict]:
+    specs = [
+        {'engine': engine, 'population': args.population, 'courses': args.courses, 'seed': args.seed,
+         'threshold_max': args.threshold_max, 'overrides': args.set}
+        for engine in args.engines]
+    results = map_runs(time_engine, specs, args.workers, timeout=args.timeout)
+    return [
+        error_row({'engine': spec['engine'], 'population': spec['population']}, result)
+        if isinstance(result, BaseException) else result
+        for spec, result in zip(specs, results)]
+
+def render(args: argparse.Namespace) -> list[dict]:
+    config = build_config(args.set)
+    os.makedirs(args.out, exist_ok=True)
+    rows = []
+    for trace_path in args.traces:
+        recorded = trace.Trace.load(trace_path)
+        if args.hurdlers is not None:
+            recorded = recorded.select('Hurdler', args.hurdlers)
+        video_path = os.path.join(args.out, os.path.splitext(os.path.basename(trace_path))[0] + '.avi')
+        recorded.render(video_path, fps=args.fps, config=config)
+        rows.append({'trace': trace_path, 'video': video_path, 'frames': len(recorded)})
+    return rows
+
+def inspect_report(args: argparse.Namespace) -> list[dict]:
+    """One row per generation of every report, or one summary row per report
+    """
+    rows = []
+    for path in args.reports:
+        with open(path) as report_file:
+            report = json.load(report_file)
+        if args.summary:
+            rows.append({'report': path, **summarize_report(report)})
+            continue
+        for number, generation in enumerate(report['generations']):
+            diversity = generation.get('diversity') or {}
+            rows.append({
+                'report': path, 'generation': number,
+                'highest_fitness': generation['highest_fitness'],
+                'average_fitness': generation['average_fitness'],
+                'unique': diversity.get('unique'), 'entropy': diversity.get('entropy')})
+    return rows
+
+def aggregate(args: argparse.Namespace) -> list[dict]:
+    """Mean curves of every stat across the runs of a sweep store matching --where, or the keys
+        of the runs converged by --converged-by
+    """
+    if args.reports:
+        store = sweeps.SweepStore.from_reports(args.reports, args.store)
+    else:
+        store = sweeps.SweepStore.load(args.store)
+    runs = store.select(**dict(args.where or []))
+    if args.plot is not None:
+        import matplotlib.pyplot as plt
+
+        figure, ax = plt.subplots()
+        store.plot(args.stat, runs, ax=ax)
+        figure.savefig(args.plot)
+        plt.close(figure)
+    if args.converged_by is not None:
+        converged = set(store.converged(args.converged_by, args.target))
+        return [{'run': store.keys[run]} for run in runs if store.keys[run] in converged]
+    means = {stat: store.mean_curve(stat, runs) for stat in sweeps.STATS}
+    counts = store.reached(runs)
+    return [
+        {'generation': generation, 'runs': int(counts[generation]),
+         **{stat: float(means[stat][generation]) for stat in sweeps.STATS}}
+        for generation in range(len(counts))]
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--seed', type=int, default=0, help='first random seed')
+    common.add_argument('--workers', type=int, default=1, help='worker processes')
+    common.add_argument('--timeout', type=float, help='seconds each run or benchmark may take')
+    common.add_argument('--format', choices=FORMATS, default=FORMAT_TEXT, help='output format')
+    common.add_argument(
+        '--set', type=parse_override, action='append', metavar='KEY=VALUE',
+        help='config override, e.g. frames=500. Repeatable')
+    training = argparse.ArgumentParser(add_help=False)
+    training.add_argument('--engine', choices=ENGINES, default=ENGINE_BATCH)
+    training.add_argument('--runs', type=int, default=1, help='seeds per parameter combination')
+    training.add_argument('--generations', type=int, help='defaults to config nbit_generations')
+    training.add_argument('--target', type=float, help='stop once the best fitness reaches target')
+    training.add_argument('--stagnation', type=int, help='stop after generations without improvement')
+    training.add_argument('--seed-max', type=int, default=10000, help='largest seed threshold')
+    training.add_argument(
+        '--eval-workers', type=int, default=1,
+        help='processes evaluating each generation through shared memory, batch and event engines')
+    training.add_argument(
+        '--checkpoint-dir', help='directory reports are written to. Runs with a report are not run again')
+
+    parser = argparse.ArgumentParser(prog='python -m sims', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', parents=[common, training], help='train thresholds')
+    train_parser.add_argument('--generation-size', type=int, default=20)
+    train_parser.add_argument('--courses', type=int, default=8, help='courses of batch and event engines')
+    train_parser.add_argument('--elitism', type=int, default=0)
+    train_parser.add_argument('--adaptation', choices=ADAPTATIONS, default='fixed')
+    train_parser.add_argument('--selection', choices=('truncation', 'nsga2'), default='truncation')
+    train_parser.set_defaults(handler=train)
+
+    sweep_parser = commands.add_parser('sweep', parents=[common, training], help='train over a parameter grid')
+    sweep_parser.add_argument('--generation-sizes', type=int, nargs='+', default=[20])
+    sweep_parser.add_argument('--course-counts', type=int, nargs='+', default=[8])
+    sweep_parser.add_argument('--elitisms', type=int, nargs='+', default=[0])
+    sweep_parser.add_argument('--adaptations', choices=ADAPTATIONS, nargs='+', default=['fixed'])
+    sweep_parser.add_argument('--selections', choices=('truncation', 'nsga2'), nargs='+', default=['truncation'])
+    sweep_parser.set_defaults(handler=sweep)
+
+    bench_parser = commands.add_parser('bench', parents=[common], help='time simulation engines')
+    bench_parser.add_argument('--engines', choices=ENGINES, nargs='+', default=list(ENGINES))
+    bench_parser.add_argument('--population', type=int, default=200)
+    bench_parser.add_argument('--courses', type=int, default=1)
+    bench_parser.add_argument('--threshold-max', type=int, default=600)
+    bench_parser.set_defaults(handler=bench)
+
+    render_parser = commands.add_parser('render', parents=[common], help='render traces to video')
+    render_parser.add_argument('traces', nargs='+', help='trace .npz files, e.g. one per generation')
+    render_parser.add_argument('--out', default='.', help='directory videos are written to')
+    render_parser.add_argument('--hurdlers', type=int, nargs='*', help='indices of hurdlers to render')
+    render_parser.add_argument('--fps', type=int, help='defaults to config video_fps')
+    render_parser.set_defaults(handler=render)
+
+    inspect_parser = commands.add_parser('inspect-report', parents=[common], help='summarize reports')
+    inspect_parser.add_argument('reports', nargs='+', help='AlgorithmReport json files')
+    inspect_parser.add_argument('--summary', action='store_true', help='one row per report')
+    inspect_parser.set_defaults(handler=inspect_report)
+
+    aggregate_parser = commands.add_parser('aggregate', parents=[common], help='query a sweep store')
+    aggregate_parser.add_argument('store', help=f'sweep store, e.g. CHECKPOINT_DIR/{STORE_NAME}')
+    aggregate_parser.add_argument('--reports', nargs='+', help='build the store from report json files first')
+    aggregate_parser.add_argument(
+        '--where', type=parse_override, action='append', metavar='PARAMETER=VALUE',
+        help='only runs with a parameter value, e.g. elitism=2. Repeatable')
+    aggregate_parser.add_argument('--converged-by', type=int, metavar='GENERATION', help='list converged runs')
+    aggregate_parser.add_argument('--target', type=float, help='fitness runs converge at. Defaults to their final best')
+    aggregate_parser.add_argument('--stat', choices=sweeps.STATS, default='best', help='stat plotted')
+    aggregate_parser.add_argument('--plot', metavar='PATH', help='save a plot of the mean curve of --stat')
+    aggregate_parser.set_defaults(handler=aggregate)
+    return parser
+
+def main(argv: list[str]=None, stream=None) -> int:
+    args = build_parser().parse_args(argv)
+    emit(args.handler(args), args.format, stream)
+    return 0
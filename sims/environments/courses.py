@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import numpy as np
+
+from settings import Config, DEFAULT_CONFIG
+from sims.environments import physics
+from sims.environments import policies
+
+class Courses:
+    """Seeded hurdle layouts every policy is evaluated on in one batched HurdlesPhysics run.
+        Row i * len(courses) + k of the batch runs hurdler i on course k
+
+    Args:
+        count (int): number of courses
+        hurdles (int, optional): hurdles per course. Defaults to 2.
+        seed (int, optional): seed of the layouts. Defaults to 0.
+        aggregate (str, optional): MEAN, MIN or QUANTILE of scores across courses. Defaults to MEAN.
+        quantile (float, optional): quantile used by QUANTILE. Defaults to 0.1.
+        mode (str, optional): HurdlesPhysics mode. Defaults to HurdlesPhysics.PRECISE.
+        config (Config, optional): Defaults to DEFAULT_CONFIG.
+        engine (str, optional): BATCH runs HurdlesPhysics frame by frame, EVENT runs
+            EventPhysics and KERNEL runs KernelPhysics. Results are the same. Defaults to BATCH.
+    """
+    MEAN = 'mean'
+    MIN = 'min'
+    QUANTILE = 'quantile'
+    BATCH = 'batch'
+    EVENT = 'event'
+    KERNEL = 'kernel'
+    ENGINES = {BATCH: physics.HurdlesPhysics, EVENT: physics.EventPhysics, KERNEL: physics.KernelPhysics}
+    invalid_aggregate_msg = 'invalid aggregate "{aggregate}". Must be one of {aggregates}'
+    invalid_engine_msg = 'invalid engine "{engine}". Must be one of {engines}'
+
+    def __init__(
+        self, count: int, hurdles: int=2, seed: int=0, aggregate: str=MEAN,
+        quantile: float=0.1, mode: str=physics.HurdlesPhysics.PRECISE, config: Config=None,
+        engine: str=BATCH):
+        if aggregate not in (self.MEAN, self.MIN, self.QUANTILE):
+            raise ValueError(self.invalid_aggregate_msg.format(
+                aggregate=aggregate, aggregates=(self.MEAN, self.MIN, self.QUANTILE)))
+        if engine not in self.ENGINES:
+            raise ValueError(self.invalid_engine_msg.format(engine=engine, engines=tuple(self.ENGINES)))
+        self.engine = engine
+        self.aggregate = aggregate
+        self.quantile = quantile
+        self.mode = mode
+        self.seed = seed
+        self.config = config if config is not None else DEFAULT_CONFIG
+        nearest = self.config.hurdler_x_spawn + self.config.hurdler_width + self.config.hurdle_width
+        rng = np.random.default_rng(seed)
+        self.hurdle_x = rng.integers(
+            nearest, self.config.hurdle_spawn_x, size=(count, hurdles), endpoint=True)
+
+    def __len__(self):
+        return self.hurdle_x.shape[0]
+
+    def evaluate(self, policy: policies.Policy, frames: int=None) -> tuple[np.ndarray, np.ndarray]:
+        """Run every hurdler of policy on every course
+
+        Args:
+            policy (policies.Policy): batch policy of the population
+            frames (int, optional): Defaults to config.frames.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: termination frames and jump counts of shape (population, courses)
+        """
+        population = len(policy)
+        engine = self.ENGINES[self.engine](
+            population * len(self), mode=self.mode, hurdle_x=self.hurdle_x, config=self.config)
+        tiled = policy[np.repeat(np.arange(population), len(self))]
+        termination_frames, jumps = engine.run(tiled, frames=frames)
+        shape = (population, len(self))
+        return termination_frames.reshape(shape), jumps.reshape(shape)
+
+    def score(self, values: np.ndarray) -> np.ndarray:
+        """Aggregate per course values of shape (population, courses) to shape (population,)
+        """
+        if self.aggregate == self.MIN:
+            return values.min(axis=1)
+        if self.aggregate == self.QUANTILE:
+            return np.quantile(values, self.quantile, axis=1)
+        return values.mean(axis=1)
@@ -2,60 +2,191 @@ from __future__ import annotations
 
 import numpy as np
 
-from settings import Settings
+from settings import Config, DEFAULT_CONFIG
 import sims.visualize as vis
+from sims.environments import policies
+from sims.environments.trace import Trace
 
 class Simulation:
-    def __init__(self, hurdlers: list[Hurdler], hurdles: list[Hurdle]):
+    """Hurdles simulation of gameobjects.
+
+    Args:
+        hurdlers (list[Hurdler]): hurdlers
+        hurdles (list[Hurdle]): hurdles
+        viewer (vis.LiveViewer, optional): started viewer each frame is published to. Defaults to None.
+        record_trace (bool, optional): record positions of every gameobject each frame in
+            self.trace, to be rendered after the run. Defaults to False.
+        config (Config, optional): configuration the gameobjects were built with.
+            Defaults to DEFAULT_CONFIG.
+    """
+    mismatched_config_msg = 'gameobject {name} was built with a different config than the simulation'
+
+    def __init__(
+        self, hurdlers: list[Hurdler], hurdles: list[Hurdle],
+        viewer: vis.LiveViewer=None, record_trace: bool=False, config: Config=None):
+        self.config = config if config is not None else DEFAULT_CONFIG
+        for gameobject in [*hurdlers, *hurdles]:
+            if gameobject.config is not self.config and gameobject.config != self.config:
+                raise ValueError(self.mismatched_config_msg.format(name=gameobject.object_name))
         self.frame_number = 0
         self.gameobjects = {}
         self.gameobjects[Hurdler.name] = hurdlers
         self.gameobjects[Hurdle.name] = hurdles
+        self.positions = {
+            Hurdler.name: self.bind_rows(hurdlers, 'displacement'),
+            Hurdle.name: self.bind_rows(hurdles, 'displacement')}
+        self.hurdler_velocities = self.bind_rows(hurdlers, 'velocity')
+        self._features = np.zeros((len(hurdlers), len(policies.FEATURES)), dtype=np.float64)
+        self.policies, self.per_object_hurdlers = self.build_policies(hurdlers)
+        self.alive = {name: np.ones(len(positions), dtype=bool) for name, positions in self.positions.items()}
+        self._rows = {
+            id(gameobject): row
+            for gameobjects in self.gameobjects.values()
+            for row, gameobject in enumerate(gameobjects)}
+        self._snapshots = {name: np.array(positions) for name, positions in self.positions.items()}
+        self._snapshot_views = {}
+        for name, snapshot in self._snapshots.items():
+            self._snapshot_views[name] = snapshot.view()
+            self._snapshot_views[name].flags.writeable = False
+        self.state = None
         self.frames = []
-        # TODO: decouple ui from simulation
-        self.ui = vis.Cv(Settings.map_shape, Settings.video_out_path)
+        self.ui = None
+        self.viewer = viewer
+        self.traced = [list(hurdles), list(hurdlers)] if record_trace else None
+        self.trace = Trace.empty(self.config.frames, self.traced) if record_trace else None
+
+    @staticmethod
+    def bind_rows(gameobjects: list[GameObject], attribute: str) -> np.ndarray:
+        """Gather a vector attribute (displacement, velocity) of gameobjects in to one preallocated
+            array and rebind each gameobject's attribute to its row, so it is updated in place
+
+        Args:
+            gameobjects (list[GameObject]): gameobjects of a single kind
+            attribute (str): attribute of shape (2,)
+
+        Returns:
+            np.ndarray: array of shape (len(gameobjects), 2)
+        """
+        rows = np.array([getattr(gameobject, attribute) for gameobject in gameobjects]).reshape(-1, 2)
+        for row, gameobject in enumerate(gameobjects):
+            setattr(gameobject, attribute, rows[row])
+        return rows
+
+    @staticmethod
+    def build_policies(hurdlers: list[Hurdler]) -> tuple[list[tuple[np.ndarray, policies.Policy]], set[int]]:
+        """Group hurdlers by class in to batch policies
+
+        Returns:
+            tuple[list[tuple[np.ndarray, policies.Policy]], set[int]]: rows and batch policy of each
+                hurdler class, and rows of hurdlers whose class only decides per object
+        """
+        rows_by_class = {}
+        for row, hurdler in enumerate(hurdlers):
+            rows_by_class.setdefault(type(hurdler), []).append(row)
+        batch_policies = []
+        per_object = []
+        for hurdler_class, rows in rows_by_class.items():
+            policy = hurdler_class.policy([hurdlers[row] for row in rows])
+            if policy is None:
+                per_object += rows
+            else:
+                batch_policies.append((np.array(rows), policy))
+        return batch_policies, set(per_object)
 
     def all_gameobjects(self):
         return [go for gos in self.gameobjects.values() for go in gos]
 
     def terminate(self) -> int:
-        return self.frame_number == Settings.frames
+        return self.frame_number == self.config.frames
 
     def remove_gameobject(self, gameobject):
         gameobjects_list = self.gameobjects[gameobject.name]
         gameobjects_list.remove(gameobject)
+        self.alive[gameobject.name][self._rows[id(gameobject)]] = False
+
+    def snapshot(self) -> StatePacket:
+        """Copy positions in to the preallocated snapshot arrays once per frame.
+            Gameobjects all receive the same read-only view of positions at the start of the frame
+
+        Returns:
+            StatePacket: state of current frame
+        """
+        for name, positions in self.positions.items():
+            np.copyto(self._snapshots[name], positions)
+        self.state = StatePacket(
+            self.frame_number,
+            self._snapshot_views[Hurdler.name],
+            self._snapshot_views[Hurdle.name])
+        return self.state
 
     def get_state(self) -> StatePacket:
-        return StatePacket(self.frame_number, self.gameobjects[Hurdle.name], self.gameobjects[Hurdler.name])
+        if self.state is None or self.state.frame_number != self.frame_number:
+            return self.snapshot()
+        return self.state
+
+    def hurdler_features(self, state: StatePacket) -> np.ndarray:
+        """Start of frame features of every hurdler row, columns in policies.FEATURES order
+        """
+        self._features[:, 0] = policies.proximity(state.hurdlers[:, 0], state.hurdles[:, 0])
+        self._features[:, 1] = state.hurdlers[:, 1]
+        self._features[:, 2] = self.hurdler_velocities[:, 1]
+        return self._features
+
+    def decide_hurdlers(self) -> np.ndarray:
+        """Jump decisions of every hurdler row for the current frame.
+            One batch policy call per hurdler class instead of one decision per hurdler
 
-    def run_gameobject(self, gameobject: GameObject):
+        Returns:
+            np.ndarray: bool decision of each hurdler row
+        """
+        state = self.get_state()
+        decisions = np.zeros(len(self._features), dtype=bool)
+        if len(self.policies) > 0:
+            features = self.hurdler_features(state)
+            for rows, policy in self.policies:
+                decisions[rows] = policy(features[rows])
+        hurdlers = self.gameobjects[Hurdler.name]
+        if len(self.per_object_hurdlers) > 0:
+            for hurdler in hurdlers:
+                row = self._rows[id(hurdler)]
+                if row in self.per_object_hurdlers:
+                    decisions[row] = hurdler.decide(state)
+        return decisions
+
+    def run_gameobject(self, gameobject: GameObject, jump: bool=None):
         """Run gameobject.
-            1. Calls gameobject's act function with state.
+            1. Calls gameobject's act function with state, or steps hurdler with its jump decision.
             2. Checks for Hurdler to Hrudle collsisions
             3. Terminates if terminated
 
         Args:
             gameobject (GameObject): gameobject
+            jump (bool, optional): decision of hurdler made by decide_hurdlers. Defaults to None.
         """
         state = self.get_state()
-        gameobject.act(state)
+        if jump is None:
+            gameobject.act(state)
+        else:
+            gameobject.step(jump)
         if isinstance(gameobject, Hurdler):
             if gameobject.check_hurdle_collisions(self.gameobjects[Hurdle.name]):
-                gameobject.terminate(self.get_state())
+                gameobject.terminate(state, collided=True)
         if gameobject.terminated:
             self.remove_gameobject(gameobject)
             print(f"terminated {gameobject.object_name} @ frame {self.frame_number}")
             return
 
     def run_hurdles(self):
-        for hurdle in self.gameobjects[Hurdle.name]:
+        for hurdle in list(self.gameobjects[Hurdle.name]):
             self.run_gameobject(hurdle)
 
     def run_hurdlers(self):
-        for hurdler in self.gameobjects[Hurdler.name]:
-            self.run_gameobject(hurdler)
+        decisions = self.decide_hurdlers()
+        for hurdler in list(self.gameobjects[Hurdler.name]):
+            self.run_gameobject(hurdler, bool(decisions[self._rows[id(hurdler)]]))
 
     def run_gameobjects(self):
+        self.snapshot()
         self.run_hurdlers()
         self.run_hurdles()
 
@@ -65,10 +196,24 @@ class Simulation:
             frame = gameobject.draw(frame)
         self.frames.append(frame)
 
+    def frame_snapshot(self) -> vis.FrameSnapshot:
+        """Compact copy of positions of gameobjects still in the simulation
+        """
+        layers = [
+            (self.positions[kind.name][self.alive[kind.name]], *kind.size(self.config), kind.color)
+            for kind in (Hurdle, Hurdler)]
+        return vis.FrameSnapshot(self.frame_number, layers)
+
     def main(self):
         self.run_gameobjects()
         self.frame_number += 1
-        self.draw()
+        if self.ui is not None:
+            self.draw()
+        if self.viewer is not None:
+            self.viewer.publish(self.frame_snapshot())
+        if self.trace is not None:
+            self.trace.record(
+                self.frame_number - 1, self.positions[Hurdle.name], self.positions[Hurdler.name])
 
     def run(self, to_video: bool):
         """Runs Hurdles simulation until termination condition. In loop:
@@ -77,6 +222,8 @@ class Simulation:
         """
         print(f'running HURDLES with {len(self.gameobjects[Hurdler.name])} hurdlers...')
         self.frame_number = 0
+        if to_video:
+            self.ui = vis.Cv(self.config.map_shape, self.config.video_out_path)
         while True:
             if self.terminate():
                 print(f"HURDLES terminated at frame {self.frame_number}")
@@ -84,23 +231,55 @@ class Simulation:
                     gameobject.terminate(self.get_state())
                 break
             self.main()
+        if self.trace is not None:
+            self.trace.termination_frames[:] = [
+                gameobject.termination_state.frame_number
+                for gameobjects in self.traced for gameobject in gameobjects]
         if to_video:
             print('video processing...')
-            self.ui.to_video(self.frames, Settings.video_fps)
+            self.ui.to_video(self.frames, self.config.video_fps)
             print('video processing finished')
 
 class StatePacket:
-    def __init__(self, frame_number: int, hurdlers: list[Hurdler], hurdles: list[Hurdle]):
+    """Read-only view of the world at the start of a frame. Position arrays are shared by all
+        gameobjects and overwritten next frame, so they must not be kept past act
+
+    Args:
+        frame_number (int): frame number
+        hurdlers (np.ndarray): read-only hurdler positions of shape (hurdlers, 2).
+            Terminated hurdlers keep their position at termination
+        hurdles (np.ndarray): read-only hurdle positions of shape (hurdles, 2)
+    """
+    __slots__ = ('frame_number', 'hurdlers', 'hurdles')
+
+    def __init__(self, frame_number: int, hurdlers: np.ndarray, hurdles: np.ndarray):
         self.frame_number = frame_number
         self.hurdlers = hurdlers
         self.hurdles = hurdles
 
+class TerminationState:
+    """Minimal record of a gameobject's termination. Unlike StatePacket, safe to keep
+
+    Args:
+        frame_number (int): frame of termination
+        collided (bool, optional): terminated by collision. Defaults to False.
+    """
+    __slots__ = ('frame_number', 'collided')
+
+    def __init__(self, frame_number: int, collided: bool=False):
+        self.frame_number = frame_number
+        self.collided = collided
+
 # NOTE: Rectangular objects are centered at bottom left
 class GameObject:
+    __slots__ = (
+        'terminated', 'termination_state', 'displacement',
+        'velocity', 'acceleration', 'object_name', 'config')
     name = None
-    terminated = False
 
-    def __init__(self, object_name: str=None):
+    def __init__(self, object_name: str=None, config: Config=None):
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.terminated = False
         self.termination_state = None
         self.displacement = 0
         self.velocity = 0
@@ -112,16 +291,29 @@ class GameObject:
     def name(self):
         return self.__class__.name
 
-    def terminate(self, state: StatePacket):
+    def terminate(self, state: StatePacket, collided: bool=False):
         self.terminated = True
-        self.termination_state = state
+        self.termination_state = TerminationState(state.frame_number, collided)
 
 class Square(GameObject):
-    width = 0
-    height = 0
+    __slots__ = ()
+
+    def __init__(self, object_name: str=None, config: Config=None):
+        super().__init__(object_name=object_name or 'SquareGameObject', config=config)
+
+    @classmethod
+    def size(cls, config: Config) -> tuple[int, int]:
+        """(width, height) of squares of this class under config
+        """
+        return 0, 0
 
-    def __init__(self, object_name: str=None):
-        super().__init__(object_name=object_name or 'SquareGameObject')
+    @property
+    def width(self) -> int:
+        return self.size(self.config)[0]
+
+    @property
+    def height(self) -> int:
+        return self.size(self.config)[1]
 
     def top(self):
         return self.displacement[1] + self.height - 1
@@ -145,15 +337,49 @@ class Square(GameObject):
         return True
 
 class Hurdler(Square):
+    """Square that jumps. Actions (NO_ACTION or JUMP) are recorded one bit per frame
+        in a history buffer preallocated to config.frames
+    """
+    __slots__ = ('_history', '_history_length')
     name = 'Hurdler'
     color = 2
-    spawn_x = Settings.hurdler_x_spawn
-    width = Settings.hurdler_width
-    height = Settings.hurdler_height
-    def __init__(self, history: list=None, object_name: str=None):
-        super().__init__(object_name=object_name or 'Hurdler')
-        self.history = history or []
+    NO_ACTION = 0
+    JUMP = 1
+
+    def __init__(self, history: list | np.ndarray=None, object_name: str=None, config: Config=None):
+        super().__init__(object_name=object_name or 'Hurdler', config=config)
+        if history is None:
+            history = []
+        self._history_length = len(history)
+        self._history = np.zeros(
+            (max(self.config.frames, self._history_length) + 7) // 8, dtype=np.uint8)
+        if self._history_length > 0:
+            packed = np.packbits(np.asarray(history, dtype=np.uint8))
+            self._history[:packed.size] = packed
         self.displacement = np.array([self.spawn_x, 0], np.float64)
+        self.velocity = np.zeros(2, dtype=np.float64)
+
+    @classmethod
+    def size(cls, config: Config) -> tuple[int, int]:
+        return config.hurdler_width, config.hurdler_height
+
+    @property
+    def spawn_x(self) -> int:
+        return self.config.hurdler_x_spawn
+
+    @property
+    def history(self) -> np.ndarray:
+        """Recorded actions, unpacked from history buffer
+        """
+        return np.unpackbits(self._history, count=self._history_length).astype(np.int8)
+
+    def record(self, action: int):
+        byte, bit = divmod(self._history_length, 8)
+        if byte == self._history.size:
+            self._history = np.append(self._history, np.zeros(max(self._history.size, 1), np.uint8))
+        if action:
+            self._history[byte] |= 0x80 >> bit
+        self._history_length += 1
 
     def isgrounded(self):
         return self.displacement[1] <= 0
@@ -161,19 +387,62 @@ class Hurdler(Square):
     def jump(self):
         if self.isgrounded():
             print(f'{self.object_name} jumped')
-            self.velocity += np.array([0, Settings.hurdler_jump_speed], dtype=np.float64)
+            self.velocity += np.array([0, self.config.hurdler_jump_speed], dtype=np.float64)
 
-    def act(self, state: StatePacket):
+    @classmethod
+    def policy(cls, hurdlers: list[Hurdler]) -> policies.Policy:
+        """Batch policy making the same decisions as decide for hurdlers of this class
+
+        Returns:
+            policies.Policy: policy, or None if the class only decides per object
+        """
+        return None
+
+    def decide(self, state: StatePacket) -> bool:
         raise NotImplementedError()
 
+    def step(self, jump: bool):
+        """Jump if decided, move and record the action
+        """
+        action = self.NO_ACTION
+        if jump:
+            self.jump()
+            action = self.JUMP
+        self.move()
+        self.record(action)
+
+    def act(self, state: StatePacket):
+        self.step(self.decide(state))
+
+    def proximity(self, hurdles: np.ndarray) -> np.ndarray:
+        """Signed horizontal distance to each hurdle. Negative once a hurdle has been passed
+
+        Args:
+            hurdles (np.ndarray): hurdle positions of shape (hurdles, 2)
+        """
+        return hurdles[:, 0] - self.displacement[0]
+
+    def closest_hurdle(self, hurdles: np.ndarray) -> tuple[int, float]:
+        """Hurdle of smallest signed proximity
+
+        Args:
+            hurdles (np.ndarray): hurdle positions of shape (hurdles, 2)
+
+        Returns:
+            tuple[int, float]: index and proximity of closest hurdle
+        """
+        proximities = self.proximity(hurdles)
+        closest = int(np.argmin(proximities))
+        return closest, proximities[closest]
+
     def move(self):
         self.acceleration = 0
         if not self.isgrounded():
-            self.acceleration = Settings.gravity
+            self.acceleration = self.config.gravity
         self.velocity += self.acceleration
         self.displacement += self.velocity
         if self.isgrounded():
-            self.displacement = np.array([self.displacement[0], 0], dtype=np.float64)
+            self.displacement[1] = 0
 
     def check_hurdle_collisions(self, hurdles: list[Hurdle]):
         for hurdle in hurdles:
@@ -189,57 +458,77 @@ class Hurdler(Square):
         return frame_copy
 
 class ConstantHurdler(Hurdler):
-    def __init__(self, period: int, history: list=None, object_name: str=None):
-        super().__init__(history=history, object_name=object_name or 'ConstantHurdler')
+    __slots__ = ('period',)
+
+    def __init__(self, period: int, history: list=None, object_name: str=None, config: Config=None):
+        super().__init__(history=history, object_name=object_name or 'ConstantHurdler', config=config)
         self.period = period
 
-    def act(self, state: StatePacket):
-        action = None
-        if state.frame_number % self.period == 0 and state.frame_number != 0:
-            self.jump()
-            action = 'j'
-        self.move()
-        self.history.append(action)
+    def decide(self, state: StatePacket) -> bool:
+        return state.frame_number % self.period == 0 and state.frame_number != 0
 
 class ProximityHurdler(Hurdler):
-    def __init__(self, threshold: int, history: list=None, object_name: str=None):
-        super().__init__(history=history, object_name=object_name or 'ProximityHurdler')
+    __slots__ = ('threshold',)
+
+    def __init__(self, threshold: int, history: list=None, object_name: str=None, config: Config=None):
+        super().__init__(history=history, object_name=object_name or 'ProximityHurdler', config=config)
         self.threshold = threshold
 
-    def proximity(self, hurdle: Hurdle):
-        return hurdle.displacement[0] - self.displacement[0]
+    @classmethod
+    def policy(cls, hurdlers: list[ProximityHurdler]) -> policies.ThresholdPolicy:
+        return policies.ThresholdPolicy([hurdler.threshold for hurdler in hurdlers])
 
-    def closest_hurdle(self, hurdles: list[Hurdle]):
-        closest = hurdles[0]
-        for hurdle in hurdles:
-            if self.proximity(hurdle) < self.proximity(closest):
-                closest = hurdle
-        return hurdle, self.proximity(closest)
-    
-    def act(self, state: StatePacket):
-        action = None
-        _, prox = self.closest_hurdle(state.hurdlers)
-        if prox < self.threshold:
-            self.jump()
-            action = 'j'
-        self.move()
-        self.history.append(action)
+    def decide(self, state: StatePacket) -> bool:
+        _, prox = self.closest_hurdle(state.hurdles)
+        return prox < self.threshold
+
+class ProgramHurdler(Hurdler):
+    """Hurdler controlled by a compiled expression tree (see sims.agents.programs).
+        Jumps when the program evaluates above 0
+
+    Args:
+        program (callable): maps feature matrix of shape (batch, 3) with columns
+            (proximity, altitude, vertical velocity) to values of shape (batch,)
+    """
+    __slots__ = ('program',)
+
+    def __init__(self, program: callable, history: list=None, object_name: str=None, config: Config=None):
+        super().__init__(history=history, object_name=object_name or 'ProgramHurdler', config=config)
+        self.program = program
+
+    @classmethod
+    def policy(cls, hurdlers: list[ProgramHurdler]) -> policies.ProgramPolicy:
+        return policies.ProgramPolicy([hurdler.program for hurdler in hurdlers])
+
+    def features(self, state: StatePacket) -> np.ndarray:
+        _, prox = self.closest_hurdle(state.hurdles)
+        return np.array([[prox, self.displacement[1], self.velocity[1]]], dtype=np.float64)
+
+    def decide(self, state: StatePacket) -> bool:
+        return self.program(self.features(state))[0] > 0
 
 class Hurdle(Square):
+    __slots__ = ()
     name = 'Hurdle'
     color = 3
-    width = Settings.hurdle_width
-    height = Settings.hurdle_height
-    spawn_x = Settings.hurdle_spawn_x
-    def __init__(self):
-        super().__init__()
+
+    def __init__(self, config: Config=None):
+        super().__init__(config=config)
         self.displacement = np.array([self.spawn_x, 0])
 
+    @classmethod
+    def size(cls, config: Config) -> tuple[int, int]:
+        return config.hurdle_width, config.hurdle_height
+
+    @property
+    def spawn_x(self) -> int:
+        return self.config.hurdle_spawn_x
+
     def act(self, state: StatePacket):
         self.move()
 
     def move(self):
-        self.displacement += Settings.hurdle_drift
+        self.displacement += self.config.hurdle_drift
         if self.displacement[0] < 0:
             self.displacement[0] = self.spawn_x
 
@@ -255,4 +544,4 @@ if __name__ == '__main__':
         ProximityHurdler(100),
         ]
     hurdle = Simulation(hurdlers=hurdlers, hurdles=[Hurdle()])
-    hurdle.run()
+    hurdle.run(False)
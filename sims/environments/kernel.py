@@ -0,0 +1,121 @@
+"""Whole run kernels of threshold hurdlers on precomputed hurdle tables, see physics.KernelPhysics.
+    Threshold decisions only depend on proximity, which only depends on the frame and course,
+    so a run needs no policy calls: the kernels loop over every frame in one call.
+
+    run_rows is plain Python over scalars, compiled by Numba when it is installed.
+    run_columns is its NumPy fallback, looping over frames on the live hurdlers at once
+"""
+from __future__ import annotations
+
+import importlib.util
+
+import numpy as np
+
+NUMBA = 'numba'
+NUMPY = 'numpy'
+BACKENDS = (NUMBA, NUMPY)
+invalid_backend_msg = 'invalid backend "{backend}". Must be one of {backends}'
+missing_numba_msg = 'backend "numba" requires numba to be installed'
+
+_compiled = {}
+
+def numba_available() -> bool:
+    return importlib.util.find_spec('numba') is not None
+
+def default_backend() -> str:
+    return NUMBA if numba_available() else NUMPY
+
+def run_rows(
+    thresholds: np.ndarray, course: np.ndarray, proximity: np.ndarray, overlap: np.ndarray,
+    jump_speed: int, gravity_step: int, hurdle_top: int, substeps: int,
+    termination_frames: np.ndarray, jumps: np.ndarray):
+    """Run every hurdler through every frame one at a time, writing termination frames and jumps.
+        Same semantics as HurdlesPhysics.step
+
+    Args:
+        thresholds (np.ndarray): float64 proximity threshold of each hurdler
+        course (np.ndarray): int64 course of each hurdler
+        proximity (np.ndarray): float64 proximity table of shape (frames, courses)
+        overlap (np.ndarray): bool overlap table of shape (frames, courses)
+        jump_speed (int): fixed point jump speed
+        gravity_step (int): fixed point gravity of one substep
+        hurdle_top (int): fixed point altitude hurdlers collide at or below
+        substeps (int): integration substeps per frame
+        termination_frames (np.ndarray): int32 output of shape (hurdlers,)
+        jumps (np.ndarray): int32 output of shape (hurdlers,)
+    """
+    frames = proximity.shape[0]
+    for row in range(thresholds.shape[0]):
+        column = course[row]
+        threshold = thresholds[row]
+        altitude = 0
+        velocity = 0
+        count = 0
+        termination = frames
+        for frame in range(frames):
+            if proximity[frame, column] < threshold:
+                count += 1
+                if altitude <= 0:
+                    velocity += jump_speed
+            for _ in range(substeps):
+                if altitude > 0:
+                    velocity += gravity_step
+                altitude += velocity // substeps
+                if altitude < 0:
+                    altitude = 0
+            if overlap[frame, column] and altitude <= hurdle_top:
+                termination = frame
+                break
+        termination_frames[row] = termination
+        jumps[row] = count
+
+def run_columns(
+    thresholds: np.ndarray, course: np.ndarray, proximity: np.ndarray, overlap: np.ndarray,
+    jump_speed: int, gravity_step: int, hurdle_top: int, substeps: int,
+    termination_frames: np.ndarray, jumps: np.ndarray):
+    """NumPy run_rows: every frame advances all live hurdlers at once.
+        Live hurdlers are kept compacted, so terminated ones cost nothing
+    """
+    frames = proximity.shape[0]
+    rows = np.arange(thresholds.shape[0])
+    thresholds = thresholds[rows]
+    column = course[rows]
+    altitude = np.zeros(rows.size, dtype=np.int64)
+    velocity = np.zeros(rows.size, dtype=np.int64)
+    count = np.zeros(rows.size, dtype=np.int32)
+    termination_frames[:] = frames
+    for frame in range(frames):
+        if rows.size == 0:
+            break
+        jump = proximity[frame, column] < thresholds
+        count += jump
+        velocity += jump_speed * (jump & (altitude <= 0))
+        for _ in range(substeps):
+            velocity += gravity_step * (altitude > 0)
+            altitude += velocity // substeps
+            np.maximum(altitude, 0, out=altitude)
+        collided = overlap[frame, column] & (altitude <= hurdle_top)
+        if collided.any():
+            termination_frames[rows[collided]] = frame
+            jumps[rows[collided]] = count[collided]
+            kept = ~collided
+            rows, thresholds, column = rows[kept], thresholds[kept], column[kept]
+            altitude, velocity, count = altitude[kept], velocity[kept], count[kept]
+    jumps[rows] = count
+
+def compiled() -> callable:
+    """run_rows compiled by Numba on first use, so importing this module never imports numba
+    """
+    if NUMBA not in _compiled:
+        import numba
+        _compiled[NUMBA] = numba.njit(nogil=True)(run_rows)
+    return _compiled[NUMBA]
+
+def kernel(backend: str) -> callable:
+    if backend not in BACKENDS:
+        raise ValueError(invalid_backend_msg.format(backend=backend, backends=BACKENDS))
+    if backend == NUMBA:
+        if not numba_available():
+            raise ValueError(missing_numba_msg)
+        return compiled()
+    return run_columns
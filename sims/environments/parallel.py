@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from sims import jobs
+from sims.environments import courses as courses_module
+from sims.environments import policies
+
+class SharedArray:
+    """numpy array backed by a multiprocessing.shared_memory block. Other processes attach
+        to it by spec, a small (name, shape, dtype) tuple, so the data itself is never pickled.
+        The creating process owns the block and unlinks it on close
+
+    Args:
+        shape (tuple): shape of the array
+        dtype (np.dtype): dtype of the array
+        name (str, optional): name of an existing block to attach to. Defaults to None,
+            creating a new block.
+    """
+    def __init__(self, shape: tuple, dtype: np.dtype, name: str=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+        size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+        self.block = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.block.buf)
+
+    @classmethod
+    def attach(cls, spec: tuple) -> SharedArray:
+        name, shape, dtype = spec
+        return cls(shape, dtype, name=name)
+
+    @property
+    def spec(self) -> tuple:
+        return self.block.name, self.shape, self.dtype.str
+
+    def close(self):
+        if self.block is None:
+            return
+        self.array = None
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+        self.block = None
+
+_worker = {}
+
+def attach_worker(courses: courses_module.Courses, decode: callable, specs: dict):
+    """Pool initializer attaching a worker process to the shared buffers of a SharedEvaluator
+    """
+    _worker['courses'] = courses
+    _worker['decode'] = decode
+    _worker['buffers'] = {key: SharedArray.attach(spec) for key, spec in specs.items()}
+
+def evaluate_range(start: int, stop: int, frames: int):
+    """Evaluate genomes[start:stop] in a worker, writing results in place
+    """
+    buffers = _worker['buffers']
+    policy = _worker['decode'](buffers['genomes'].array[start:stop])
+    termination_frames, jumps = _worker['courses'].evaluate(policy, frames=frames)
+    buffers['termination_frames'].array[start:stop] = termination_frames
+    buffers['jumps'].array[start:stop] = jumps
+
+class SharedEvaluator:
+    """Evaluates populations on courses in worker processes without pickling them.
+        Genomes and results are kept in shared memory blocks sized for capacity individuals.
+        Workers of a jobs.JobQueue build the policy of their slice of genomes with decode and
+        write termination frames and jump counts in place, so only index ranges are queued.
+        Results are the same as courses.evaluate of the whole population
+
+    Args:
+        courses (courses_module.Courses): courses sent once to each worker
+        capacity (int): largest population evaluated
+        workers (int): worker processes
+        decode (callable, optional): picklable callable building a policies.Policy
+            from genome rows. Defaults to policies.ThresholdPolicy.
+        genome_shape (tuple, optional): shape of one genome. Defaults to (), one integer.
+        genome_dtype (np.dtype, optional): Defaults to np.int64.
+        chunks (int, optional): ranges each population is split in. Defaults to workers.
+    """
+    invalid_capacity_msg = 'population of {population} exceeds capacity {capacity}'
+    invalid_workers_msg = 'workers must be positive, got {workers}'
+    closed_msg = 'SharedEvaluator is closed'
+
+    def __init__(
+        self, courses: courses_module.Courses, capacity: int, workers: int,
+        decode: callable=policies.ThresholdPolicy, genome_shape: tuple=(),
+        genome_dtype: np.dtype=np.int64, chunks: int=None):
+        if workers < 1:
+            raise ValueError(self.invalid_workers_msg.format(workers=workers))
+        self.courses = courses
+        self.capacity = capacity
+        self.workers = workers
+        self.chunks = chunks or workers
+        self.buffers = {
+            'genomes': SharedArray((capacity, *genome_shape), genome_dtype),
+            'termination_frames': SharedArray((capacity, len(courses)), np.int64),
+            'jumps': SharedArray((capacity, len(courses)), np.int64),
+        }
+        specs = {key: buffer.spec for key, buffer in self.buffers.items()}
+        self.jobs = jobs.JobQueue(
+            workers, kind=jobs.JobQueue.PROCESS, max_pending=self.chunks,
+            initializer=attach_worker, initargs=(courses, decode, specs))
+
+    def __enter__(self) -> SharedEvaluator:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def bounds(self, population: int) -> np.ndarray:
+        """Start and stop of the ranges a population is split in, empty ranges dropped
+        """
+        edges = np.unique(np.linspace(0, population, self.chunks + 1).astype(np.int64))
+        return np.stack([edges[:-1], edges[1:]], axis=1)
+
+    def evaluate(self, genomes: np.ndarray, frames: int=None) -> tuple[np.ndarray, np.ndarray]:
+        """Run the policy of every genome on every course
+
+        Args:
+            genomes (np.ndarray): genomes of shape (population, *genome_shape)
+            frames (int, optional): Defaults to courses' config.frames.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: termination frames and jump counts of shape (population, courses)
+        """
+        if self.jobs is None:
+            raise ValueError(self.closed_msg)
+        population = len(genomes)
+        if population > self.capacity:
+            raise ValueError(self.invalid_capacity_msg.format(population=population, capacity=self.capacity))
+        self.buffers['genomes'].array[:population] = genomes
+        futures = [
+            self.jobs.submit(evaluate_range, (int(start), int(stop), frames))
+            for start, stop in self.bounds(population)]
+        for future in futures:
+            future.result()
+        return (
+            self.buffers['termination_frames'].array[:population].copy(),
+            self.buffers['jumps'].array[:population].copy())
+
+    def close(self):
+        """Shut the workers down and free the shared memory blocks
+        """
+        if self.jobs is None:
+            return
+        self.jobs.close()
+        self.jobs = None
+        for buffer in self.buffers.values():
+            buffer.close()
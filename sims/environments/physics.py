@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import numpy as np
+
+from settings import Config, DEFAULT_CONFIG
+from sims.environments import kernel as kernel_module
+from sims.environments import policies
+
+class HurdlesPhysics:
+    """Vectorized physics core of the hurdles environment. Reproduces the frame semantics
+        of hurdles.Simulation for a whole population at once: every frame, hurdlers decide
+        from the start of frame state, jump if grounded, move, collide with the (not yet
+        moved) hurdles, then hurdles drift.
+
+        State is kept in flat integer arrays in fixed point, with 2**fraction_bits sub-units per
+        world unit, so results are deterministic across platforms. Hurdler motion is integrated
+        in substeps; substeps=1 reproduces Simulation trajectories exactly.
+
+        Several courses run in the same batch when hurdle_x has shape (courses, hurdles):
+        row i of the population runs on course i % courses, see sims.environments.courses.
+
+    Args:
+        population (int): number of hurdlers
+        mode (str, optional): PRECISE uses int64 fixed point and allows substeps.
+            FAST uses int32 world units and a single step per frame. Defaults to PRECISE.
+        substeps (int, optional): integration substeps per frame in PRECISE mode. Defaults to 1.
+        hurdle_x (np.ndarray, optional): initial hurdle x positions of shape (hurdles,)
+            or (courses, hurdles). Defaults to one course of one hurdle at spawn.
+        config (Config, optional): Defaults to DEFAULT_CONFIG.
+    """
+    PRECISE = 'precise'
+    FAST = 'fast'
+    FRACTION_BITS = 16
+    FEATURES = policies.FEATURES
+    invalid_mode_msg = 'invalid mode "{mode}". Must be one of {modes}'
+    invalid_substeps_msg = (
+        'substeps must be a power of two no larger than {max_substeps} in {mode} mode, got {substeps}')
+    invalid_courses_msg = 'population {population} is not a multiple of {courses} courses'
+
+    def __init__(
+        self, population: int, mode: str=PRECISE, substeps: int=1,
+        hurdle_x: np.ndarray=None, config: Config=None):
+        if mode not in (self.PRECISE, self.FAST):
+            raise ValueError(self.invalid_mode_msg.format(mode=mode, modes=(self.PRECISE, self.FAST)))
+        fraction_bits = self.FRACTION_BITS if mode == self.PRECISE else 0
+        max_substeps = 1 << (fraction_bits // 2)
+        if substeps < 1 or substeps > max_substeps or substeps & (substeps - 1) != 0:
+            raise ValueError(self.invalid_substeps_msg.format(
+                max_substeps=max_substeps, mode=mode, substeps=substeps))
+        self.population = population
+        self.mode = mode
+        self.substeps = substeps
+        self.scale = 1 << fraction_bits
+        self.dtype = np.int64 if mode == self.PRECISE else np.int32
+        self.config = config if config is not None else DEFAULT_CONFIG
+
+        self.hurdler_x = self.config.hurdler_x_spawn
+        self.hurdler_width = self.config.hurdler_width
+        self.jump_speed = self.config.hurdler_jump_speed * self.scale
+        self.gravity_step = int(self.config.gravity[1]) * self.scale // substeps
+        self.hurdle_width = self.config.hurdle_width
+        self.hurdle_top = (self.config.hurdle_height - 1) * self.scale
+        self.hurdle_drift = int(self.config.hurdle_drift[0])
+        self.hurdle_spawn_x = self.config.hurdle_spawn_x
+        if hurdle_x is None:
+            hurdle_x = [self.hurdle_spawn_x]
+        self.initial_hurdle_x = np.array(hurdle_x, dtype=self.dtype, ndmin=2)
+        self.courses = self.initial_hurdle_x.shape[0]
+        if population % self.courses != 0:
+            raise ValueError(self.invalid_courses_msg.format(population=population, courses=self.courses))
+        self.course = np.arange(population) % self.courses
+
+        self.altitude = np.zeros(population, dtype=self.dtype)
+        self.velocity = np.zeros(population, dtype=self.dtype)
+        self.alive = np.ones(population, dtype=bool)
+        self.termination_frames = np.zeros(population, dtype=np.int32)
+        self.jumps = np.zeros(population, dtype=np.int32)
+        self.hurdle_x = np.array(self.initial_hurdle_x)
+        self.frame_number = 0
+        self._features = np.zeros((population, len(self.FEATURES)), dtype=np.float64)
+        self._airborne = np.zeros(population, dtype=bool)
+
+    def reset(self):
+        self.altitude[:] = 0
+        self.velocity[:] = 0
+        self.alive[:] = True
+        self.termination_frames[:] = 0
+        self.jumps[:] = 0
+        self.hurdle_x[:] = self.initial_hurdle_x
+        self.frame_number = 0
+
+    def features(self) -> np.ndarray:
+        """Start of frame features of every hurdler, columns in FEATURES order.
+            Proximity is the signed distance to the closest hurdle, as in Hurdler.closest_hurdle
+
+        Returns:
+            np.ndarray: float64 features of shape (population, 3). Overwritten every frame
+        """
+        self._features[:, 0] = policies.proximity(self.hurdler_x, self.hurdle_x)[self.course]
+        np.divide(self.altitude, self.scale, out=self._features[:, 1])
+        np.divide(self.velocity, self.scale, out=self._features[:, 2])
+        return self._features
+
+    def overlap(self, hurdle_x: np.ndarray) -> np.ndarray:
+        """Whether any hurdle of each course overlaps the hurdler column horizontally
+
+        Args:
+            hurdle_x (np.ndarray): hurdle x positions of shape (courses, hurdles)
+
+        Returns:
+            np.ndarray: bool of shape (courses,)
+        """
+        return (
+            (hurdle_x <= self.hurdler_x + self.hurdler_width - 1)
+            & (hurdle_x + self.hurdle_width - 1 >= self.hurdler_x)).any(axis=1)
+
+    def hurdle_tables(self, frames: int) -> tuple[np.ndarray, np.ndarray]:
+        """Proximity and overlap of the hurdles of every course at the start of every frame
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: float64 proximity and bool overlap of shape (frames, courses)
+        """
+        hurdle_x = np.array(self.initial_hurdle_x)
+        proximity = np.zeros((frames, self.courses), dtype=np.float64)
+        overlap = np.zeros((frames, self.courses), dtype=bool)
+        for frame in range(frames):
+            proximity[frame] = policies.proximity(self.hurdler_x, hurdle_x)
+            overlap[frame] = self.overlap(hurdle_x)
+            hurdle_x += self.hurdle_drift
+            hurdle_x[hurdle_x < 0] = self.hurdle_spawn_x
+        return proximity, overlap
+
+    def step(self, jump: np.ndarray):
+        """Advance one frame
+
+        Args:
+            jump (np.ndarray): bool jump decision of every hurdler
+        """
+        jump = jump & self.alive
+        self.jumps += jump
+        np.add(self.velocity, self.jump_speed, out=self.velocity, where=jump & (self.altitude <= 0))
+        for _ in range(self.substeps):
+            np.greater(self.altitude, 0, out=self._airborne)
+            self._airborne &= self.alive
+            np.add(self.velocity, self.gravity_step, out=self.velocity, where=self._airborne)
+            np.add(self.altitude, self.velocity // self.substeps, out=self.altitude, where=self.alive)
+            np.maximum(self.altitude, 0, out=self.altitude)
+        overlap = self.overlap(self.hurdle_x)
+        if overlap.any():
+            collided = self.alive & (self.altitude <= self.hurdle_top)
+            if self.courses > 1:
+                collided &= overlap[self.course]
+            self.termination_frames[collided] = self.frame_number
+            self.alive &= ~collided
+        self.hurdle_x += self.hurdle_drift
+        self.hurdle_x[self.hurdle_x < 0] = self.hurdle_spawn_x
+        self.frame_number += 1
+
+    def run(self, policy: callable, frames: int=None, record: bool=False) -> tuple[np.ndarray, np.ndarray]:
+        """Run policy until frames or until every hurdler terminated
+
+        Args:
+            policy (callable): maps features of shape (population, 3) to bool jump decisions,
+                e.g. a policies.Policy
+            frames (int, optional): Defaults to config.frames.
+            record (bool, optional): store world altitude of every hurdler each frame
+                in self.trajectory of shape (frames, population). Defaults to False.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: termination frame and jump count of every hurdler
+        """
+        if frames is None:
+            frames = self.config.frames
+        self.reset()
+        self.trajectory = np.zeros((frames, self.population)) if record else None
+        while self.frame_number < frames and self.alive.any():
+            frame_number = self.frame_number
+            self.step(np.asarray(policy(self.features()), dtype=bool))
+            if record:
+                self.trajectory[frame_number] = self.altitude / self.scale
+        if record and self.frame_number < frames:
+            self.trajectory[self.frame_number:] = self.altitude / self.scale
+        self.termination_frames[self.alive] = frames
+        return self.termination_frames, self.jumps
+
+class EventPhysics(HurdlesPhysics):
+    """Event driven HurdlesPhysics with the same results. Hurdle positions only depend on the
+        frame, so every hurdler runs on its own clock and is advanced from event to event:
+        a jump from the ground, a collision or the last frame. In between, its trajectory is
+        ballistic or grounded in closed form, and its decisions over a window of frames
+        ahead are made in one policy call. Decisions in the air only count as jumps.
+
+        A run takes a few dozen iterations instead of one per frame and skips terminated
+        hurdlers, which pays off for small or short lived populations. Every frame of a live
+        hurdler is still decided, so large populations that survive long run faster frame
+        by frame in HurdlesPhysics. Supports substeps=1 only and does not record trajectories.
+
+    Args:
+        population (int): number of hurdlers
+        mode (str, optional): see HurdlesPhysics. Defaults to PRECISE.
+        substeps (int, optional): must be 1. Defaults to 1.
+        hurdle_x (np.ndarray, optional): see HurdlesPhysics. Defaults to None.
+        config (Config, optional): Defaults to DEFAULT_CONFIG.
+        window (int, optional): frames decided ahead per policy call. Defaults to 32.
+    """
+    invalid_event_substeps_msg = 'EventPhysics supports substeps=1 only, got {substeps}'
+    unsupported_record_msg = 'EventPhysics does not record trajectories'
+
+    def __init__(
+        self, population: int, mode: str=HurdlesPhysics.PRECISE, substeps: int=1,
+        hurdle_x: np.ndarray=None, config: Config=None, window: int=32):
+        if substeps != 1:
+            raise ValueError(self.invalid_event_substeps_msg.format(substeps=substeps))
+        super().__init__(population, mode=mode, substeps=substeps, hurdle_x=hurdle_x, config=config)
+        self.window = window
+        self.clock = np.zeros(population, dtype=np.int64)
+
+    def reset(self):
+        super().reset()
+        self.clock[:] = 0
+
+    def coast(self, altitude: np.ndarray, velocity: np.ndarray, steps: int) -> tuple[np.ndarray, np.ndarray]:
+        """Altitude and velocity after 0 to steps frames without jumping from the ground.
+            Airborne hurdlers follow a parabola until they land, then keep their velocity on the ground
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: altitude and velocity of shape (hurdlers, steps + 1)
+        """
+        k = np.arange(steps + 1, dtype=self.dtype)
+        raw = altitude[:, None] + k * velocity[:, None] + self.gravity_step * (k * (k + 1) // 2)
+        landed = np.logical_or.accumulate(raw <= 0, axis=1)
+        landing = landed.argmax(axis=1)
+        free_velocity = velocity[:, None] + k * self.gravity_step
+        landed_velocity = velocity + landing * self.gravity_step
+        return np.where(landed, 0, raw), np.where(landed, landed_velocity[:, None], free_velocity)
+
+    def run(self, policy: policies.Policy, frames: int=None, record: bool=False) -> tuple[np.ndarray, np.ndarray]:
+        """Run policy until frames or until every hurdler terminated
+
+        Args:
+            policy (policies.Policy): batch policy, indexed to decide a window of frames of
+                several hurdlers in one call
+            frames (int, optional): Defaults to config.frames.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: termination frame and jump count of every hurdler
+        """
+        if record:
+            raise ValueError(self.unsupported_record_msg)
+        if frames is None:
+            frames = self.config.frames
+        self.reset()
+        self.trajectory = None
+        proximity, overlap = (table.reshape(-1) for table in self.hurdle_tables(frames))
+        window = self.window
+        offsets = np.arange(window)
+        active = np.flatnonzero(self.alive)
+        while active.size > 0:
+            count = active.size
+            altitude, velocity = self.coast(self.altitude[active], self.velocity[active], window)
+            frame = self.clock[active, None] + offsets
+            in_range = frame < frames
+            np.minimum(frame, frames - 1, out=frame)
+            # Flat index in to the (frames, courses) tables
+            cell = frame * self.courses + self.course[active, None]
+            features = np.empty((count, window, len(self.FEATURES)), dtype=np.float64)
+            np.take(proximity, cell, out=features[..., 0])
+            np.divide(altitude[:, :window], self.scale, out=features[..., 1])
+            np.divide(velocity[:, :window], self.scale, out=features[..., 2])
+            decisions = np.asarray(
+                policy[np.repeat(active, window)](features.reshape(-1, len(self.FEATURES))),
+                dtype=bool).reshape(count, window) & in_range
+            collisions = np.take(overlap, cell) & (altitude[:, 1:] <= self.hurdle_top)
+            events = (decisions & (altitude[:, :window] <= 0)) | collisions | ~in_range
+            first = np.where(events.any(axis=1), events.argmax(axis=1), window)
+            rows = np.arange(count)
+            self.jumps[active] += (decisions & (offsets < first[:, None])).sum(axis=1)
+            self.altitude[active] = altitude[rows, first]
+            self.velocity[active] = velocity[rows, first]
+            self.clock[active] += first
+            stepped = (first < window) & in_range[rows, np.minimum(first, window - 1)]
+            self.step_rows(active[stepped], decisions[rows[stepped], first[stepped]], overlap)
+            active = active[self.alive[active] & (self.clock[active] < frames)]
+        self.frame_number = frames
+        self.termination_frames[self.alive] = frames
+        return self.termination_frames, self.jumps
+
+    def step_rows(self, rows: np.ndarray, jump: np.ndarray, overlap: np.ndarray):
+        """Advance hurdlers one frame of their own clocks, as HurdlesPhysics.step
+
+        Args:
+            rows (np.ndarray): hurdlers to advance
+            jump (np.ndarray): bool jump decision of each
+            overlap (np.ndarray): flattened overlap table of hurdle_tables
+        """
+        self.jumps[rows] += jump
+        altitude = self.altitude[rows]
+        velocity = self.velocity[rows]
+        velocity += np.where(jump & (altitude <= 0), self.jump_speed, 0).astype(self.dtype)
+        velocity += np.where(altitude > 0, self.gravity_step, 0).astype(self.dtype)
+        altitude = np.maximum(altitude + velocity, 0)
+        frame = self.clock[rows]
+        collided = overlap[frame * self.courses + self.course[rows]] & (altitude <= self.hurdle_top)
+        self.termination_frames[rows[collided]] = frame[collided]
+        self.alive[rows[collided]] = False
+        self.altitude[rows] = altitude
+        self.velocity[rows] = velocity
+        self.clock[rows] += 1
+
+class KernelPhysics(HurdlesPhysics):
+    """HurdlesPhysics running ThresholdPolicy populations on proximity in a single kernel call,
+        see sims.environments.kernel. The kernel is compiled with Numba when it is installed and
+        falls back to NumPy otherwise. Other policies and recorded runs use HurdlesPhysics.run
+
+    Args:
+        population (int): number of hurdlers
+        mode (str, optional): see HurdlesPhysics. Defaults to PRECISE.
+        substeps (int, optional): see HurdlesPhysics. Defaults to 1.
+        hurdle_x (np.ndarray, optional): see HurdlesPhysics. Defaults to None.
+        config (Config, optional): Defaults to DEFAULT_CONFIG.
+        backend (str, optional): kernel.NUMBA or kernel.NUMPY. Defaults to kernel.default_backend().
+    """
+    def __init__(
+        self, population: int, mode: str=HurdlesPhysics.PRECISE, substeps: int=1,
+        hurdle_x: np.ndarray=None, config: Config=None, backend: str=None):
+        super().__init__(population, mode=mode, substeps=substeps, hurdle_x=hurdle_x, config=config)
+        self.backend = backend if backend is not None else kernel_module.default_backend()
+        self.kernel = kernel_module.kernel(self.backend)
+
+    @staticmethod
+    def supports(policy: callable) -> bool:
+        return isinstance(policy, policies.ThresholdPolicy) and policy.feature == 0
+
+    def run(self, policy: callable, frames: int=None, record: bool=False) -> tuple[np.ndarray, np.ndarray]:
+        """Run policy for frames, see HurdlesPhysics.run
+        """
+        if record or not self.supports(policy):
+            return super().run(policy, frames=frames, record=record)
+        if frames is None:
+            frames = self.config.frames
+        self.reset()
+        self.trajectory = None
+        proximity, overlap = self.hurdle_tables(frames)
+        thresholds = np.broadcast_to(np.asarray(policy.thresholds, dtype=np.float64), (self.population,))
+        self.kernel(
+            np.ascontiguousarray(thresholds), self.course, proximity, overlap,
+            self.jump_speed, self.gravity_step, self.hurdle_top, self.substeps,
+            self.termination_frames, self.jumps)
+        self.alive[:] = self.termination_frames >= frames
+        self.frame_number = frames
+        return self.termination_frames, self.jumps
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import numpy as np
+
+FEATURES = ('proximity', 'altitude', 'vertical_velocity')
+
+def proximity(hurdler_x: np.ndarray, hurdle_x: np.ndarray) -> np.ndarray:
+    """Signed horizontal distance from every hurdler to its closest hurdle,
+        as in Hurdler.closest_hurdle. Negative once a hurdle has been passed
+
+    Args:
+        hurdler_x (np.ndarray): hurdler x positions of shape (hurdlers,)
+        hurdle_x (np.ndarray): hurdle x positions of shape (hurdles,),
+            or (courses, hurdles) with hurdler_x broadcastable to (courses,)
+
+    Returns:
+        np.ndarray: proximity of shape (hurdlers,) or (courses,)
+    """
+    return hurdle_x.min(axis=-1) - hurdler_x
+
+class Policy:
+    """Batch controller of a population of hurdlers. Maps the features of every hurdler,
+        columns in FEATURES order, to jump decisions in one call per frame
+    """
+    def __len__(self):
+        raise NotImplementedError()
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        """Jump decisions
+
+        Args:
+            features (np.ndarray): features of shape (population, len(FEATURES))
+
+        Returns:
+            np.ndarray: bool decisions of shape (population,)
+        """
+        raise NotImplementedError()
+
+    def __getitem__(self, key) -> Policy:
+        """Policy of a subset of the population
+        """
+        raise NotImplementedError()
+
+class ThresholdPolicy(Policy):
+    """Jump when a feature is below each hurdler's threshold. With the default
+        proximity feature this is ProximityHurdler's policy
+
+    Args:
+        thresholds (np.ndarray): threshold of each hurdler
+        feature (int, optional): feature column compared. Defaults to 0 (proximity).
+    """
+    def __init__(self, thresholds: np.ndarray, feature: int=0):
+        self.thresholds = np.asarray(thresholds)
+        self.feature = feature
+
+    def __len__(self):
+        return self.thresholds.size
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        return features[:, self.feature] < self.thresholds
+
+    def __getitem__(self, key) -> ThresholdPolicy:
+        return self.__class__(self.thresholds[key], self.feature)
+
+class LinearPolicy(Policy):
+    """Jump when a weighted sum of features is above 0
+
+    Args:
+        weights (np.ndarray): weights of shape (population, len(FEATURES))
+        bias (np.ndarray): bias of shape (population,)
+    """
+    def __init__(self, weights: np.ndarray, bias: np.ndarray):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = np.asarray(bias, dtype=np.float64)
+
+    def __len__(self):
+        return self.bias.size
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        return np.einsum('ij,ij->i', features, self.weights) + self.bias > 0
+
+    def __getitem__(self, key) -> LinearPolicy:
+        return self.__class__(self.weights[key], self.bias[key])
+
+class LookupPolicy(Policy):
+    """Jump decision looked up from a per-hurdler table of bins of one feature
+
+    Args:
+        edges (np.ndarray): increasing bin edges shared by the population, of shape (bins - 1,)
+        tables (np.ndarray): bool decision of each bin, of shape (population, bins)
+        feature (int, optional): binned feature column. Defaults to 0 (proximity).
+    """
+    def __init__(self, edges: np.ndarray, tables: np.ndarray, feature: int=0):
+        self.edges = np.asarray(edges)
+        self.tables = np.asarray(tables, dtype=bool)
+        self.feature = feature
+
+    def __len__(self):
+        return self.tables.shape[0]
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        bins = np.searchsorted(self.edges, features[:, self.feature], side='right')
+        return self.tables[np.arange(len(self)), bins]
+
+    def __getitem__(self, key) -> LookupPolicy:
+        return self.__class__(self.edges, self.tables[key], self.feature)
+
+class ProgramPolicy(Policy):
+    """Jump when a compiled program (see sims.agents.programs) evaluates above 0.
+        Hurdlers sharing a Program, e.g. through the Compiler cache, are evaluated in one call
+
+    Args:
+        programs (list[callable]): program of each hurdler
+    """
+    def __init__(self, programs: list[callable]):
+        self.programs = list(programs)
+        self._groups = {}
+        for row, program in enumerate(self.programs):
+            self._groups.setdefault(id(program), (program, []))[1].append(row)
+        self._groups = [(program, np.array(rows)) for program, rows in self._groups.values()]
+
+    def __len__(self):
+        return len(self.programs)
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        decisions = np.zeros(len(self), dtype=bool)
+        for program, rows in self._groups:
+            decisions[rows] = program(features[rows]) > 0
+        return decisions
+
+    def __getitem__(self, key) -> ProgramPolicy:
+        rows = np.arange(len(self))[key]
+        return self.__class__([self.programs[row] for row in np.atleast_1d(rows)])
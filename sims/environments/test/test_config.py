@@ -0,0 +1,83 @@
+import contextlib
+import io
+import pickle
+import unittest
+
+import numpy as np
+
+from settings import Config, DEFAULT_CONFIG
+from sims.agents import hurdler
+from sims.environments import courses
+from sims.environments import hurdles
+from sims.environments import physics
+
+class TestConfig(unittest.TestCase):
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            DEFAULT_CONFIG.frames = 10
+        with self.assertRaises(ValueError):
+            DEFAULT_CONFIG.gravity[1] = -2
+
+    def test_replace(self):
+        config = DEFAULT_CONFIG.replace(frames=10, gravity=[0, -2])
+        self.assertEqual(config.frames, 10)
+        np.testing.assert_array_equal(config.gravity, [0, -2])
+        self.assertEqual(DEFAULT_CONFIG.frames, Config.DEFAULTS['frames'])
+        self.assertNotEqual(config, DEFAULT_CONFIG)
+        self.assertEqual(config, Config(frames=10, gravity=np.array([0, -2])))
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            Config(fps=10)
+        with self.assertRaises(ValueError):
+            Config(frames=0)
+        with self.assertRaises(ValueError):
+            Config(hurdle_drift=[10, 0])
+        with self.assertRaises(ValueError):
+            Config(map_shape=[640])
+
+    def test_pickle(self):
+        config = DEFAULT_CONFIG.replace(frames=10)
+        actual = pickle.loads(pickle.dumps(config))
+        self.assertEqual(actual, config)
+        with self.assertRaises(AttributeError):
+            actual.frames = 20
+
+class TestExplicitConfig(unittest.TestCase):
+    def test_configs_side_by_side(self):
+        """Simulations of different configs in one process match physics of the same config
+        """
+        thresholds = [0, 60, 120]
+        for config in (DEFAULT_CONFIG.replace(frames=200), DEFAULT_CONFIG.replace(frames=200, gravity=[0, -2])):
+            hurdlers = [hurdles.ProximityHurdler(threshold, config=config) for threshold in thresholds]
+            sim = hurdles.Simulation(list(hurdlers), [hurdles.Hurdle(config)], config=config)
+            with contextlib.redirect_stdout(io.StringIO()):
+                sim.run(False)
+            actual = [hurdler.termination_state.frame_number for hurdler in hurdlers]
+            expected, _ = physics.HurdlesPhysics(len(thresholds), config=config).run(
+                lambda features: features[:, 0] < np.array(thresholds))
+            self.assertListEqual(actual, expected.tolist())
+
+    def test_mismatched_config(self):
+        config = DEFAULT_CONFIG.replace(frames=200)
+        with self.assertRaises(ValueError):
+            hurdles.Simulation([hurdles.ProximityHurdler(0)], [hurdles.Hurdle()], config=config)
+        with self.assertRaises(ValueError):
+            hurdler.ProximityHurdlerTrainer(10, 100, courses=courses.Courses(2), config=config)
+
+    def test_trainer_config(self):
+        config = DEFAULT_CONFIG.replace(frames=50, nbit_generations=3)
+        trainer = hurdler.ProximityHurdlerTrainer(10, 1, courses=courses.Courses(2, config=config))
+        trainer.run()
+        self.assertEqual(trainer.generation_count, 3)
+        self.assertLess(trainer.best.fitness, 50)
+
+    def test_trainer_stops_once_solved(self):
+        config = DEFAULT_CONFIG.replace(frames=50, nbit_generations=3)
+        trainer = hurdler.ProximityHurdlerTrainer(10, 100, courses=courses.Courses(2, config=config))
+        trainer.run()
+        self.assertEqual(trainer.generation_count, 1)
+        self.assertEqual(trainer.best.fitness, 50)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from sims.environments import courses
+from sims.environments import physics
+from sims.environments import policies
+
+class TestCourses(unittest.TestCase):
+    frames = 400
+
+    def setUp(self):
+        self.courses = courses.Courses(5, seed=3)
+        self.thresholds = np.array([0, 60, 100, 150, 250, 400])
+
+    def test_seeded(self):
+        np.testing.assert_array_equal(courses.Courses(5, seed=3).hurdle_x, self.courses.hurdle_x)
+        self.assertFalse(np.array_equal(courses.Courses(5, seed=4).hurdle_x, self.courses.hurdle_x))
+
+    def test_batch_matches_sequential(self):
+        actual_frames, actual_jumps = self.courses.evaluate(
+            policies.ThresholdPolicy(self.thresholds), frames=self.frames)
+        for course, hurdle_x in enumerate(self.courses.hurdle_x):
+            engine = physics.HurdlesPhysics(len(self.thresholds), hurdle_x=hurdle_x)
+            expected_frames, expected_jumps = engine.run(
+                policies.ThresholdPolicy(self.thresholds), frames=self.frames)
+            np.testing.assert_array_equal(actual_frames[:, course], expected_frames)
+            np.testing.assert_array_equal(actual_jumps[:, course], expected_jumps)
+
+    def test_engines_match_batch(self):
+        policy = policies.ThresholdPolicy(self.thresholds)
+        expected = self.courses.evaluate(policy, frames=self.frames)
+        for engine in [courses.Courses.EVENT, courses.Courses.KERNEL]:
+            actual = courses.Courses(5, seed=3, engine=engine).evaluate(policy, frames=self.frames)
+            for actual_values, expected_values in zip(actual, expected):
+                np.testing.assert_array_equal(actual_values, expected_values)
+
+    def test_score(self):
+        values = np.array([[10, 20, 30, 40], [5, 5, 5, 5]])
+        actual = courses.Courses(4).score(values)
+        np.testing.assert_array_equal(actual, [25, 5])
+        actual = courses.Courses(4, aggregate=courses.Courses.MIN).score(values)
+        np.testing.assert_array_equal(actual, [10, 5])
+        actual = courses.Courses(4, aggregate=courses.Courses.QUANTILE, quantile=0.5).score(values)
+        np.testing.assert_array_equal(actual, [25, 5])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            courses.Courses(4, aggregate='median')
+        with self.assertRaises(ValueError):
+            courses.Courses(4, engine='gpu')
+        with self.assertRaises(ValueError):
+            physics.HurdlesPhysics(3, hurdle_x=self.courses.hurdle_x)
+
+if __name__ == '__main__':
+    unittest.main()
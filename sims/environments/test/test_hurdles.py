@@ -0,0 +1,88 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+from sims.environments import hurdles
+
+class TestHurdler(unittest.TestCase):
+    def setUp(self):
+        self.hurdler = hurdles.ProximityHurdler(100)
+
+    def test_record(self):
+        actions = [0, 1, 1, 0, 0, 0, 0, 0, 1, 0]
+        for action in actions:
+            self.hurdler.record(action)
+        actual = self.hurdler.history
+        expected = np.array(actions, dtype=np.int8)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_record_past_capacity(self):
+        capacity = self.hurdler._history.size * 8
+        for _ in range(capacity):
+            self.hurdler.record(hurdles.Hurdler.NO_ACTION)
+        self.hurdler.record(hurdles.Hurdler.JUMP)
+        actual = self.hurdler.history[-2:]
+        expected = np.array([0, 1], dtype=np.int8)
+        np.testing.assert_array_equal(actual, expected)
+        self.assertEqual(len(self.hurdler.history), capacity + 1)
+
+    def test_history_from_list(self):
+        actual = hurdles.ProximityHurdler(100, history=[1, 0, 1]).history
+        expected = np.array([1, 0, 1], dtype=np.int8)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_slots(self):
+        for gameobject in [self.hurdler, hurdles.Hurdle(), hurdles.ConstantHurdler(3)]:
+            self.assertFalse(hasattr(gameobject, '__dict__'))
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.hurdlers = [hurdles.ProximityHurdler(100), hurdles.ProximityHurdler(0)]
+        self.hurdles = [hurdles.Hurdle()]
+        self.sim = hurdles.Simulation(list(self.hurdlers), list(self.hurdles))
+
+    def run_frames(self, frames: int):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(frames):
+                self.sim.run_gameobjects()
+                self.sim.frame_number += 1
+
+    def test_positions_bound(self):
+        self.run_frames(3)
+        actual = self.sim.positions[hurdles.Hurdle.name][0]
+        expected = self.hurdles[0].displacement
+        np.testing.assert_array_equal(actual, expected)
+        self.assertTrue(np.shares_memory(actual, expected))
+
+    def test_snapshot_read_only(self):
+        state = self.sim.snapshot()
+        with self.assertRaises(ValueError):
+            state.hurdles[0, 0] = 0
+
+    def test_snapshot_start_of_frame(self):
+        self.run_frames(1)
+        state = self.sim.get_state()
+        self.assertEqual(state.frame_number, 1)
+        before = np.array(state.hurdles)
+        self.hurdles[0].move()
+        np.testing.assert_array_equal(self.sim.get_state().hurdles, before)
+
+    def test_termination_state_frozen(self):
+        self.run_frames(120)
+        terminated = [hurdler for hurdler in self.hurdlers if hurdler.terminated]
+        self.assertGreater(len(terminated), 0)
+        frames = [hurdler.termination_state.frame_number for hurdler in terminated]
+        self.run_frames(10)
+        self.assertListEqual([hurdler.termination_state.frame_number for hurdler in terminated], frames)
+        self.assertTrue(all(hurdler.termination_state.collided for hurdler in terminated))
+
+    def test_closest_hurdle(self):
+        positions = np.array([[400, 0], [150, 0], [300, 0]])
+        actual = self.hurdlers[0].closest_hurdle(positions)
+        expected = (1, 50)
+        self.assertEqual(actual, expected)
+
+if __name__ == '__main__':
+    unittest.main()
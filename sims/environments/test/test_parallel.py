@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from sims.environments import courses
+from sims.environments import parallel
+from sims.environments import policies
+
+class TestSharedArray(unittest.TestCase):
+    def test_attach(self):
+        shared = parallel.SharedArray((3, 2), np.int64)
+        spec = shared.spec
+        try:
+            attached = parallel.SharedArray.attach(spec)
+            attached.array[1] = [4, 5]
+            np.testing.assert_array_equal(shared.array, [[0, 0], [4, 5], [0, 0]])
+            attached.close()
+        finally:
+            shared.close()
+        with self.assertRaises(FileNotFoundError):
+            parallel.SharedArray.attach(spec)
+
+class TestSharedEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.courses = courses.Courses(3, seed=1)
+        self.thresholds = np.random.default_rng(0).integers(0, 600, 23)
+
+    def test_matches_courses(self):
+        expected = self.courses.evaluate(policies.ThresholdPolicy(self.thresholds), frames=300)
+        with parallel.SharedEvaluator(self.courses, 30, 2, chunks=5) as evaluator:
+            for population in [23, 7]:
+                actual = evaluator.evaluate(self.thresholds[:population], frames=300)
+                for actual_values, expected_values in zip(actual, expected):
+                    np.testing.assert_array_equal(actual_values, expected_values[:population])
+
+    def test_bounds(self):
+        with parallel.SharedEvaluator(self.courses, 10, 1, chunks=4) as evaluator:
+            np.testing.assert_array_equal(evaluator.bounds(10), [[0, 2], [2, 5], [5, 7], [7, 10]])
+            np.testing.assert_array_equal(evaluator.bounds(2), [[0, 1], [1, 2]])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parallel.SharedEvaluator(self.courses, 10, 0)
+        evaluator = parallel.SharedEvaluator(self.courses, 10, 1)
+        with self.assertRaises(ValueError):
+            evaluator.evaluate(self.thresholds)
+        evaluator.close()
+        with self.assertRaises(ValueError):
+            evaluator.evaluate(self.thresholds[:5])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+from settings import DEFAULT_CONFIG
+from sims.environments import hurdles
+from sims.environments import kernel
+from sims.environments import physics
+from sims.environments import policies
+
+def simulate(thresholds: list[int], frames: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Reference run of hurdles.Simulation recording hurdler altitudes every frame"""
+    hurdlers = [hurdles.ProximityHurdler(threshold) for threshold in thresholds]
+    sim = hurdles.Simulation(list(hurdlers), [hurdles.Hurdle()])
+    altitudes = np.zeros((frames, len(hurdlers)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in range(frames):
+            sim.run_gameobjects()
+            sim.frame_number += 1
+            altitudes[frame] = sim.positions[hurdles.Hurdler.name][:, 1]
+        for hurdler in sim.gameobjects[hurdles.Hurdler.name]:
+            hurdler.terminate(sim.get_state())
+    termination_frames = np.array([hurdler.termination_state.frame_number for hurdler in hurdlers])
+    jumps = np.array([hurdler.history.sum() for hurdler in hurdlers])
+    return altitudes, termination_frames, jumps
+
+class TestHurdlesPhysics(unittest.TestCase):
+    frames = 300
+
+    def setUp(self):
+        self.thresholds = np.array([0, 10, 60, 100, 150, 200, 250, 400, 600, 10000])
+        self.policy = lambda features: features[:, 0] < self.thresholds
+        self.expected = simulate(self.thresholds, self.frames)
+
+    def assert_matches_simulation(self, engine: physics.HurdlesPhysics):
+        termination_frames, jumps = engine.run(self.policy, frames=self.frames, record=True)
+        expected_altitudes, expected_frames, expected_jumps = self.expected
+        np.testing.assert_array_equal(engine.trajectory, expected_altitudes)
+        np.testing.assert_array_equal(termination_frames, expected_frames)
+        np.testing.assert_array_equal(jumps, expected_jumps)
+
+    def test_fast_matches_simulation(self):
+        self.assert_matches_simulation(physics.HurdlesPhysics(len(self.thresholds), mode=physics.HurdlesPhysics.FAST))
+
+    def test_precise_matches_simulation(self):
+        self.assert_matches_simulation(physics.HurdlesPhysics(len(self.thresholds)))
+
+    def test_substeps_converge_to_continuous_apex(self):
+        speed, gravity = DEFAULT_CONFIG.hurdler_jump_speed, -DEFAULT_CONFIG.gravity[1]
+        apex = speed ** 2 / (2 * gravity)
+        errors = []
+        for substeps in [1, 4, 16]:
+            engine = physics.HurdlesPhysics(1, substeps=substeps)
+            engine.run(lambda features: features[:, 1] == 0, frames=2 * speed, record=True)
+            errors.append(abs(engine.trajectory.max() - apex))
+        self.assertEqual(errors, sorted(errors, reverse=True))
+        self.assertLess(errors[-1], 1)
+
+    def test_deterministic(self):
+        engine = physics.HurdlesPhysics(len(self.thresholds), substeps=8)
+        first = [np.array(result) for result in engine.run(self.policy, frames=self.frames)]
+        second = engine.run(self.policy, frames=self.frames)
+        for actual, expected in zip(second, first):
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_invalid_substeps(self):
+        with self.assertRaises(ValueError):
+            physics.HurdlesPhysics(1, mode=physics.HurdlesPhysics.FAST, substeps=2)
+        with self.assertRaises(ValueError):
+            physics.HurdlesPhysics(1, substeps=3)
+
+class TestEventPhysics(unittest.TestCase):
+    frames = 600
+
+    def assert_matches_batch(self, policy: policies.Policy, population: int, **kwargs):
+        for mode in [physics.HurdlesPhysics.PRECISE, physics.HurdlesPhysics.FAST]:
+            expected = physics.HurdlesPhysics(population, mode=mode, **kwargs).run(policy, frames=self.frames)
+            actual = physics.EventPhysics(population, mode=mode, **kwargs).run(policy, frames=self.frames)
+            for actual_values, expected_values in zip(actual, expected):
+                np.testing.assert_array_equal(actual_values, expected_values)
+
+    def test_threshold_matches_batch(self):
+        thresholds = np.array([0, 10, 60, 100, 150, 200, 250, 400, 600, 10000])
+        self.assert_matches_batch(policies.ThresholdPolicy(thresholds), len(thresholds))
+
+    def test_linear_matches_batch(self):
+        rng = np.random.default_rng(0)
+        policy = policies.LinearPolicy(rng.normal(size=(50, len(policies.FEATURES))), rng.normal(size=50))
+        self.assert_matches_batch(policy, 50)
+
+    def test_courses_match_batch(self):
+        rng = np.random.default_rng(1)
+        hurdle_x = np.sort(rng.integers(300, 3000, size=(12, 4)), axis=1)
+        thresholds = rng.integers(0, 400, 12)
+        self.assert_matches_batch(policies.ThresholdPolicy(thresholds), 12, hurdle_x=hurdle_x)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            physics.EventPhysics(1, substeps=2)
+        with self.assertRaises(ValueError):
+            physics.EventPhysics(1).run(policies.ThresholdPolicy(np.array([0])), frames=10, record=True)
+
+class TestKernelPhysics(unittest.TestCase):
+    frames = 300
+
+    def setUp(self):
+        self.thresholds = np.array([-10, 0, 10, 60, 100, 150, 200, 250, 400, 600, 10000])
+        self.policy = policies.ThresholdPolicy(self.thresholds)
+        self.expected = simulate(self.thresholds, self.frames)[1:]
+
+    def assert_matches_simulation(self, actual: tuple[np.ndarray, np.ndarray]):
+        for actual_values, expected_values in zip(actual, self.expected):
+            np.testing.assert_array_equal(actual_values, expected_values)
+
+    def test_numpy_matches_simulation(self):
+        for mode in [physics.HurdlesPhysics.PRECISE, physics.HurdlesPhysics.FAST]:
+            engine = physics.KernelPhysics(len(self.thresholds), mode=mode, backend=kernel.NUMPY)
+            self.assert_matches_simulation(engine.run(self.policy, frames=self.frames))
+
+    def test_rows_match_simulation(self):
+        engine = physics.KernelPhysics(len(self.thresholds), backend=kernel.NUMPY)
+        proximity, overlap = engine.hurdle_tables(self.frames)
+        termination_frames = np.zeros(len(self.thresholds), dtype=np.int32)
+        jumps = np.zeros(len(self.thresholds), dtype=np.int32)
+        kernel.run_rows(
+            self.thresholds.astype(np.float64), engine.course, proximity, overlap, engine.jump_speed,
+            engine.gravity_step, engine.hurdle_top, engine.substeps, termination_frames, jumps)
+        self.assert_matches_simulation((termination_frames, jumps))
+
+    @unittest.skipUnless(kernel.numba_available(), 'numba is not installed')
+    def test_numba_matches_simulation(self):
+        engine = physics.KernelPhysics(len(self.thresholds), backend=kernel.NUMBA)
+        self.assert_matches_simulation(engine.run(self.policy, frames=self.frames))
+
+    def test_matches_batch(self):
+        rng = np.random.default_rng(2)
+        hurdle_x = np.sort(rng.integers(200, 640, size=(4, 3)), axis=1)
+        policy = policies.ThresholdPolicy(rng.integers(-50, 600, 40))
+        for substeps in [1, 4]:
+            expected = physics.HurdlesPhysics(40, substeps=substeps, hurdle_x=hurdle_x).run(policy, frames=800)
+            actual = physics.KernelPhysics(
+                40, substeps=substeps, hurdle_x=hurdle_x, backend=kernel.NUMPY).run(policy, frames=800)
+            for actual_values, expected_values in zip(actual, expected):
+                np.testing.assert_array_equal(actual_values, expected_values)
+
+    def test_other_policies_run_frame_by_frame(self):
+        engine = physics.KernelPhysics(len(self.thresholds), backend=kernel.NUMPY)
+        self.assertFalse(engine.supports(lambda features: features[:, 0] < self.thresholds))
+        self.assertFalse(engine.supports(policies.ThresholdPolicy(self.thresholds, feature=1)))
+        self.assert_matches_simulation(
+            engine.run(lambda features: features[:, 0] < self.thresholds, frames=self.frames))
+
+    def test_default_backend(self):
+        expected = kernel.NUMBA if kernel.numba_available() else kernel.NUMPY
+        self.assertEqual(physics.KernelPhysics(1).backend, expected)
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            physics.KernelPhysics(1, backend='cuda')
+        if not kernel.numba_available():
+            with self.assertRaises(ValueError):
+                physics.KernelPhysics(1, backend=kernel.NUMBA)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+from sims.agents import genetics
+from sims.agents import programs
+from sims.environments import hurdles
+from sims.environments import physics
+from sims.environments import policies
+
+class TestPolicies(unittest.TestCase):
+    def setUp(self):
+        self.features = np.array([
+            [120, 0, 0],
+            [40, 10, -3],
+            [-20, 55, 4]], dtype=np.float64)
+
+    def test_proximity(self):
+        actual = policies.proximity(np.array([100, 150]), np.array([400, 250, 600]))
+        expected = np.array([150, 100])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_threshold(self):
+        policy = policies.ThresholdPolicy([100, 30, 0])
+        np.testing.assert_array_equal(policy(self.features), [False, False, True])
+        np.testing.assert_array_equal(policy[1:](self.features[1:]), [False, True])
+
+    def test_linear(self):
+        policy = policies.LinearPolicy([[-1, 0, 0], [0, 1, 0], [0, 0, 1]], [50, -20, -5])
+        np.testing.assert_array_equal(policy(self.features), [False, False, False])
+        policy = policies.LinearPolicy([[-1, 0, 0], [0, 1, 0], [0, 0, 1]], [150, -5, 0])
+        np.testing.assert_array_equal(policy(self.features), [True, True, True])
+
+    def test_lookup(self):
+        tables = [[True, False, False], [False, True, False], [False, False, True]]
+        policy = policies.LookupPolicy([0, 100], tables)
+        np.testing.assert_array_equal(policy(self.features), [False, True, False])
+
+    def test_program(self):
+        compiler = programs.Compiler()
+        below_100 = compiler.compile(genetics.Node.from_string('16(0,6)'))
+        airborne = compiler.compile(genetics.Node.from_string('1'))
+        policy = policies.ProgramPolicy([below_100, airborne, below_100])
+        np.testing.assert_array_equal(policy(self.features), [False, True, True])
+        self.assertEqual(len(policy._groups), 2)
+
+    def test_physics_accepts_policy(self):
+        thresholds = np.array([0, 100, 600])
+        engine = physics.HurdlesPhysics(3)
+        expected = [np.array(result) for result in engine.run(lambda features: features[:, 0] < thresholds, frames=200)]
+        actual = engine.run(policies.ThresholdPolicy(thresholds), frames=200)
+        for actual_result, expected_result in zip(actual, expected):
+            np.testing.assert_array_equal(actual_result, expected_result)
+
+class TestSimulationPolicies(unittest.TestCase):
+    def test_batch_matches_per_object(self):
+        program = programs.Compiler().compile(genetics.Node.from_string('16(0,6)'))
+        hurdlers = [
+            hurdles.ProximityHurdler(100), hurdles.ConstantHurdler(7),
+            hurdles.ProgramHurdler(program), hurdles.ProximityHurdler(300)]
+        sim = hurdles.Simulation(list(hurdlers), [hurdles.Hurdle()])
+        self.assertEqual(sim.per_object_hurdlers, {1})
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(60):
+                sim.snapshot()
+                decisions = sim.decide_hurdlers()
+                state = sim.get_state()
+                live = [row for row, hurdler in enumerate(hurdlers) if not hurdler.terminated]
+                expected = [hurdlers[row].decide(state) for row in live]
+                np.testing.assert_array_equal(decisions[live], expected)
+                sim.run_hurdlers()
+                sim.run_hurdles()
+                sim.frame_number += 1
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from settings import DEFAULT_CONFIG
+from sims.environments import hurdles
+from sims.environments import trace
+
+class TestTrace(unittest.TestCase):
+    frames = 80
+
+    def setUp(self):
+        config = DEFAULT_CONFIG.replace(frames=self.frames)
+        self.hurdlers = [
+            hurdles.ProximityHurdler(100, config=config), hurdles.ProximityHurdler(0, config=config)]
+        self.sim = hurdles.Simulation(
+            list(self.hurdlers), [hurdles.Hurdle(config)], record_trace=True, config=config)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.sim.run(False)
+
+    def test_recorded(self):
+        recorded = self.sim.trace
+        self.assertEqual(recorded.positions.shape, (self.frames, 3, 2))
+        self.assertEqual(recorded.positions.dtype, np.int16)
+        np.testing.assert_array_equal(recorded.positions[-1, 0], self.sim.positions[hurdles.Hurdle.name][0])
+        actual = recorded.termination_frames.tolist()
+        expected = [self.frames] + [hurdler.termination_state.frame_number for hurdler in self.hurdlers]
+        self.assertListEqual(actual, expected)
+        self.assertListEqual(recorded.kind_names.tolist(), [hurdles.Hurdle.name, hurdles.Hurdler.name])
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.npz')
+            self.sim.trace.save(path)
+            loaded = trace.Trace.load(path)
+        np.testing.assert_array_equal(loaded.positions, self.sim.trace.positions)
+        np.testing.assert_array_equal(loaded.names, self.sim.trace.names)
+
+    def test_select(self):
+        selected = self.sim.trace.select(hurdles.Hurdler.name, [1])
+        actual = selected.names.tolist()
+        expected = ['SquareGameObject', 'ProximityHurdler']
+        self.assertListEqual(actual, expected)
+        self.assertEqual(selected.termination_frames[1], self.hurdlers[1].termination_state.frame_number)
+
+    def test_snapshot_hides_terminated(self):
+        terminated_at = self.hurdlers[1].termination_state.frame_number
+        before = self.sim.trace.snapshot(terminated_at - 1)
+        after = self.sim.trace.snapshot(terminated_at)
+        self.assertEqual(len(before.layers[1][0]), 2)
+        self.assertEqual(len(after.layers[1][0]), 1)
+
+    def test_render(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.avi')
+            self.sim.trace.select(hurdles.Hurdler.name, [0]).render(path)
+            self.assertGreater(os.path.getsize(path), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import argparse
+import os
+
+import numpy as np
+
+from settings import Config, DEFAULT_CONFIG
+import sims.visualize as vis
+
+class Trace:
+    """Compact record of every gameobject's position each frame, rendered to video on demand.
+        Costs 4 bytes per gameobject per frame before compression, instead of a full frame.
+
+    Args:
+        positions (np.ndarray): int16 positions of shape (frames, gameobjects, 2)
+        termination_frames (np.ndarray): frame each gameobject terminated. A gameobject is drawn
+            in frames before its termination frame
+        names (np.ndarray): object_name of each gameobject
+        kinds (np.ndarray): index in to kind_names of each gameobject
+        kind_names (np.ndarray): name of each kind, e.g. Hurdle.name
+        sprites (np.ndarray): (width, height, color) of each kind
+    """
+    dtype = np.int16
+    invalid_kind_msg = 'trace has no gameobjects of kind "{kind}"'
+
+    @classmethod
+    def empty(cls, frames: int, gameobjects: list[list]) -> Trace:
+        """Preallocate trace for gameobjects grouped by kind
+
+        Args:
+            frames (int): number of frames
+            gameobjects (list[list[GameObject]]): gameobjects of each kind, in drawing order
+        """
+        groups = [gameobject_list for gameobject_list in gameobjects if len(gameobject_list) > 0]
+        kinds = [group[0] for group in groups]
+        names = [gameobject.object_name for group in groups for gameobject in group]
+        return cls(
+            np.zeros((frames, len(names), 2), dtype=cls.dtype),
+            np.full(len(names), frames, dtype=np.int32),
+            np.array(names, dtype=str),
+            np.repeat(np.arange(len(groups)), [len(group) for group in groups]),
+            np.array([kind.name for kind in kinds], dtype=str),
+            np.array([(kind.width, kind.height, kind.color) for kind in kinds], dtype=np.int32).reshape(-1, 3))
+
+    @classmethod
+    def load(cls, path: str) -> Trace:
+        with np.load(path) as data:
+            return cls(
+                data['positions'], data['termination_frames'], data['names'],
+                data['kinds'], data['kind_names'], data['sprites'])
+
+    def __init__(
+        self, positions: np.ndarray, termination_frames: np.ndarray, names: np.ndarray,
+        kinds: np.ndarray, kind_names: np.ndarray, sprites: np.ndarray):
+        self.positions = positions
+        self.termination_frames = termination_frames
+        self.names = names
+        self.kinds = kinds
+        self.kind_names = kind_names
+        self.sprites = sprites
+
+    def __len__(self):
+        return self.positions.shape[0]
+
+    def record(self, frame_number: int, *positions: np.ndarray):
+        """Record positions of all gameobjects, in the order of the trace
+
+        Args:
+            frame_number (int): frame
+            positions (np.ndarray): positions of each kind, of shape (gameobjects of kind, 2)
+        """
+        start = 0
+        for kind_positions in positions:
+            self.positions[frame_number, start: start + len(kind_positions)] = kind_positions
+            start += len(kind_positions)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path, positions=self.positions, termination_frames=self.termination_frames,
+            names=self.names, kinds=self.kinds, kind_names=self.kind_names, sprites=self.sprites)
+
+    def select(self, kind_name: str, indices: list[int]) -> Trace:
+        """Trace keeping only the chosen gameobjects of a kind, e.g. chosen individuals
+
+        Args:
+            kind_name (str): kind to select from. Gameobjects of other kinds are kept
+            indices (list[int]): indices of gameobjects to keep among gameobjects of the kind
+        """
+        if kind_name not in self.kind_names:
+            raise ValueError(self.invalid_kind_msg.format(kind=kind_name))
+        kind = int(np.flatnonzero(self.kind_names == kind_name)[0])
+        of_kind = np.flatnonzero(self.kinds == kind)
+        keep = np.ones(len(self.kinds), dtype=bool)
+        keep[of_kind] = False
+        keep[of_kind[indices]] = True
+        return self.__class__(
+            self.positions[:, keep], self.termination_frames[keep], self.names[keep],
+            self.kinds[keep], self.kind_names, self.sprites)
+
+    def snapshot(self, frame_number: int) -> vis.FrameSnapshot:
+        alive = self.termination_frames > frame_number
+        layers = []
+        for kind, (width, height, color) in enumerate(self.sprites):
+            positions = self.positions[frame_number, alive & (self.kinds == kind)]
+            layers.append((positions, int(width), int(height), int(color)))
+        return vis.FrameSnapshot(frame_number, layers)
+
+    def render(self, path: str, fps: int=None, shape: np.ndarray=None, config: Config=None):
+        """Rebuild frames from trace and encode them to video
+
+        Args:
+            path (str): output video path
+            fps (int, optional): Defaults to config.video_fps.
+            shape (np.ndarray, optional): map shape. Defaults to config.map_shape.
+            config (Config, optional): Defaults to DEFAULT_CONFIG.
+        """
+        config = config if config is not None else DEFAULT_CONFIG
+        ui = vis.Ui(config.map_shape if shape is None else shape)
+        images = (ui.render(self.snapshot(frame_number)) for frame_number in range(len(self)))
+        vis.write_video(path, images, fps or config.video_fps)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='render traces recorded by Simulation to video')
+    parser.add_argument('traces', type=str, nargs='+', help='trace .npz files, e.g. one per generation')
+    parser.add_argument('--out', type=str, default='.', help='directory videos are written to')
+    parser.add_argument('--hurdlers', type=int, nargs='*', help='indices of hurdlers to render')
+    parser.add_argument('--fps', type=int, default=DEFAULT_CONFIG.video_fps)
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for trace_path in args.traces:
+        trace = Trace.load(trace_path)
+        if args.hurdlers is not None:
+            trace = trace.select('Hurdler', args.hurdlers)
+        video_path = os.path.join(args.out, os.path.splitext(os.path.basename(trace_path))[0] + '.avi')
+        trace.render(video_path, fps=args.fps)
+        print(f'rendered {trace_path} to {video_path}')
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import concurrent.futures
+import itertools
+import pickle
+import queue
+import sqlite3
+import threading
+
+class Journal:
+    """SQLite record of the jobs of a JobQueue and their states, so jobs left unfinished by
+        an interrupted process can be resumed. Jobs are stored pickled, so their functions
+        must be importable, as for process workers
+
+    Args:
+        path (str): database file, created if missing
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    TIMED_OUT = 'timed_out'
+    UNFINISHED = (PENDING, RUNNING)
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs '
+            '(id INTEGER PRIMARY KEY, name TEXT, payload BLOB, state TEXT, error TEXT)')
+
+    def add(self, name: str, payload: bytes) -> int:
+        with self.lock:
+            cursor = self.connection.execute(
+                'INSERT INTO jobs (name, payload, state) VALUES (?, ?, ?)', (name, payload, self.PENDING))
+            return cursor.lastrowid
+
+    def update(self, job_id: int, state: str, error: str=None):
+        with self.lock:
+            self.connection.execute('UPDATE jobs SET state = ?, error = ? WHERE id = ?', (state, error, job_id))
+
+    def states(self) -> dict[int, str]:
+        with self.lock:
+            return dict(self.connection.execute('SELECT id, state FROM jobs ORDER BY id'))
+
+    def unfinished(self) -> list[tuple[int, bytes]]:
+        """Ids and payloads of jobs pending or running when their process stopped
+        """
+        with self.lock:
+            return list(self.connection.execute(
+                'SELECT id, payload FROM jobs WHERE state IN (?, ?) ORDER BY id', self.UNFINISHED))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class Job:
+    __slots__ = ('id', 'function', 'args', 'kwargs', 'timeout', 'future', 'running', 'timer')
+
+    def __init__(self, job_id: int, function: callable, args: tuple, kwargs: dict, timeout: float):
+        self.id = job_id
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.future = concurrent.futures.Future()
+        self.running = None
+        self.timer = None
+
+    @property
+    def name(self) -> str:
+        return getattr(self.function, '__qualname__', repr(self.function))
+
+class JobQueue:
+    """Queue of simulation and evaluation jobs run by a pool of thread or process workers,
+        with results reported through concurrent.futures.Future.
+
+        A dispatcher thread hands jobs to the pool only when a worker is free, so at most
+        max_pending jobs wait in the queue and submit blocks beyond that (backpressure).
+        Waiting jobs are cancelled with future.cancel(). A job's timeout counts from the moment
+        it is dispatched; its future then fails with TimeoutError. Process workers are then
+        terminated and replaced, and the other jobs running on them are started again on the new
+        workers. Threads can not be interrupted, so a timed out THREAD job keeps its worker until
+        it returns.
+
+        With a journal, jobs and their states are recorded in SQLite and resume resubmits
+        the jobs a previous process did not finish
+
+    Args:
+        workers (int, optional): Defaults to 1.
+        kind (str, optional): THREAD or PROCESS workers. Defaults to THREAD.
+        max_pending (int, optional): jobs waiting for a worker before submit blocks.
+            Defaults to 2 * workers.
+        journal (str | Journal, optional): journal, or path of a database the queue opens
+            and closes. Defaults to None.
+        initializer (callable, optional): run once in every worker, as in concurrent.futures.
+        initargs (tuple, optional): arguments of initializer.
+    """
+    THREAD = 'thread'
+    PROCESS = 'process'
+    invalid_kind_msg = 'invalid kind "{kind}". Must be one of {kinds}'
+    invalid_workers_msg = 'workers must be positive, got {workers}'
+    closed_msg = 'JobQueue is closed'
+    timeout_msg = 'job {name} timed out after {timeout} s'
+
+    def __init__(
+        self, workers: int=1, kind: str=THREAD, max_pending: int=None, journal: str | Journal=None,
+        initializer: callable=None, initargs: tuple=()):
+        if kind not in (self.THREAD, self.PROCESS):
+            raise ValueError(self.invalid_kind_msg.format(kind=kind, kinds=(self.THREAD, self.PROCESS)))
+        if workers < 1:
+            raise ValueError(self.invalid_workers_msg.format(workers=workers))
+        self.workers = workers
+        self.kind = kind
+        self.max_pending = max_pending if max_pending is not None else 2 * workers
+        self.owns_journal = isinstance(journal, str)
+        self.journal = Journal(journal) if self.owns_journal else journal
+        self.initializer = initializer
+        self.initargs = initargs
+        self.executor = self.start_executor()
+        self.lock = threading.RLock()
+        self.running = set()
+        self.pending = queue.Queue(maxsize=self.max_pending)
+        self.slots = threading.Semaphore(workers)
+        self.closed = False
+        self._ids = itertools.count()
+        self.dispatcher = threading.Thread(target=self.dispatch, name='JobQueue', daemon=True)
+        self.dispatcher.start()
+
+    def start_executor(self) -> concurrent.futures.Executor:
+        executor = (
+            concurrent.futures.ThreadPoolExecutor if self.kind == self.THREAD
+            else concurrent.futures.ProcessPoolExecutor)
+        return executor(max_workers=self.workers, initializer=self.initializer, initargs=self.initargs)
+
+    def __enter__(self) -> JobQueue:
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(cancel=exc_type is not None)
+
+    def submit(
+        self, function: callable, args: tuple=(), kwargs: dict=None, timeout: float=None,
+        block: bool=True) -> concurrent.futures.Future:
+        """Queue function(*args, **kwargs)
+
+        Args:
+            function (callable): job, picklable for PROCESS workers or a journal
+            args (tuple, optional): positional arguments. Defaults to ().
+            kwargs (dict, optional): keyword arguments. Defaults to None.
+            timeout (float, optional): seconds the job may run. Defaults to None, no limit.
+            block (bool, optional): wait while max_pending jobs are queued, else raise queue.Full.
+                Defaults to True.
+
+        Returns:
+            concurrent.futures.Future: result of the job
+        """
+        if self.closed:
+            raise ValueError(self.closed_msg)
+        kwargs = kwargs or {}
+        job = Job(None, function, tuple(args), kwargs, timeout)
+        if self.journal is not None:
+            job.id = self.journal.add(job.name, pickle.dumps((function, job.args, kwargs, timeout)))
+        else:
+            job.id = next(self._ids)
+        self.enqueue(job, block)
+        return job.future
+
+    def enqueue(self, job: Job, block: bool):
+        try:
+            self.pending.put(job, block=block)
+        except queue.Full:
+            self.record(job, Journal.CANCELLED)
+            raise
+
+    def resume(self) -> list[concurrent.futures.Future]:
+        """Resubmit the jobs of the journal left unfinished by a previous process
+
+        Returns:
+            list[concurrent.futures.Future]: futures of the resubmitted jobs, in submission order
+        """
+        futures = []
+        for job_id, payload in self.journal.unfinished():
+            function, args, kwargs, timeout = pickle.loads(payload)
+            job = Job(job_id, function, args, kwargs, timeout)
+            self.journal.update(job_id, Journal.PENDING)
+            self.enqueue(job, True)
+            futures.append(job.future)
+        return futures
+
+    def map(
+        self, function: callable, items: list, timeout: float=None, on_result: callable=None,
+        return_exceptions: bool=False) -> list:
+        """function of every item, in order. on_result is called in the calling thread with each
+            item and its result once it is done, while later items are still being submitted.
+            If a job fails or times out, the jobs not yet started are cancelled and its error is
+            raised, unless return_exceptions, where its error takes the place of its result
+        """
+        items = list(items)
+        futures = []
+        waiting = {}
+
+        def outcome(future: concurrent.futures.Future) -> any:
+            if return_exceptions and future.exception() is not None:
+                return future.exception()
+            return future.result()
+
+        def notify(done: list[concurrent.futures.Future]):
+            for future in done:
+                on_result(items[waiting.pop(future)], outcome(future))
+        try:
+            for position, item in enumerate(items):
+                futures.append(self.submit(function, (item,), timeout=timeout))
+                if on_result is not None:
+                    waiting[futures[-1]] = position
+                    notify([future for future in waiting if future.done()])
+            if on_result is not None:
+                notify(concurrent.futures.as_completed(list(waiting)))
+            return [outcome(future) for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def dispatch(self):
+        """Hand queued jobs to the pool as workers free up, until the None sentinel
+        """
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+            self.slots.acquire()
+            if not job.future.set_running_or_notify_cancel():
+                self.slots.release()
+                self.record(job, Journal.CANCELLED)
+                continue
+            self.record(job, Journal.RUNNING)
+            with self.lock:
+                self.running.add(job)
+                try:
+                    self.start(job)
+                except Exception as error:
+                    self.running.discard(job)
+                    self.slots.release()
+                    self.fail(job, error, Journal.FAILED)
+                    continue
+                if job.timeout is not None and job.running is not None:
+                    job.timer = threading.Timer(job.timeout, self.expire, (job,))
+                    job.timer.daemon = True
+                    job.timer.start()
+
+    def start(self, job: Job):
+        """Run job on the current executor, with the lock held
+        """
+        job.running = self.executor.submit(job.function, *job.args, **job.kwargs)
+        job.running.add_done_callback(lambda running, job=job: self.finish(job, running))
+
+    def finish(self, job: Job, running: concurrent.futures.Future):
+        with self.lock:
+            if job.running is not running:
+                return
+            job.running = None
+            self.running.discard(job)
+            if job.timer is not None:
+                job.timer.cancel()
+        self.slots.release()
+        if running.cancelled():
+            self.fail(job, concurrent.futures.CancelledError(), Journal.CANCELLED)
+        elif running.exception() is not None:
+            self.fail(job, running.exception(), Journal.FAILED)
+        else:
+            try:
+                job.future.set_result(running.result())
+            except concurrent.futures.InvalidStateError:
+                return
+            self.record(job, Journal.DONE)
+
+    def expire(self, job: Job):
+        with self.lock:
+            if job.running is None:
+                return
+            self.fail(job, TimeoutError(self.timeout_msg.format(name=job.name, timeout=job.timeout)), Journal.TIMED_OUT)
+            if self.kind == self.PROCESS:
+                self.running.discard(job)
+                job.running = None
+                self.slots.release()
+                self.recycle()
+
+    def recycle(self):
+        """Terminate the process workers, stuck on a timed out job, and start the jobs still
+            running on them again on new workers, with the lock held
+        """
+        executor, self.executor = self.executor, self.start_executor()
+        # ProcessPoolExecutor has no public way to stop running calls before Python 3.14
+        for process in list(executor._processes.values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for job in list(self.running):
+            try:
+                self.start(job)
+            except Exception as error:
+                self.running.discard(job)
+                job.running = None
+                self.slots.release()
+                self.fail(job, error, Journal.FAILED)
+
+    def fail(self, job: Job, error: BaseException, state: str):
+        try:
+            job.future.set_exception(error)
+        except concurrent.futures.InvalidStateError:
+            return
+        self.record(job, state, repr(error))
+
+    def record(self, job: Job, state: str, error: str=None):
+        if self.journal is not None:
+            self.journal.update(job.id, state, error)
+
+    def close(self, cancel: bool=False):
+        """Stop accepting jobs, wait for queued jobs, or cancel them, and shut the workers down
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if cancel:
+            while True:
+                try:
+                    job = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None and job.future.cancel():
+                    self.record(job, Journal.CANCELLED)
+        self.pending.put(None)
+        self.dispatcher.join()
+        self.executor.shutdown(wait=True)
+        if self.owns_journal:
+            self.journal.close()
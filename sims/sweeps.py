@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+
+from sims.agents import genetics
+
+STATS = ('best', 'mean', 'q10', 'median', 'q90')
+QUANTILES = (0.1, 0.5, 0.9)
+
+def generation_fitnesses(generation: dict) -> np.ndarray:
+    """Fitnesses of a generation report dict, full or summary
+    """
+    if 'fitnesses' in generation:
+        return np.asarray(generation['fitnesses'], dtype=np.float64)
+    return np.array([individual['fitness'] for individual in generation['individuals']], dtype=np.float64)
+
+def run_curves(report: dict | genetics.AlgorithmReport) -> np.ndarray:
+    """Per generation STATS of a run
+
+    Args:
+        report (dict | genetics.AlgorithmReport): report of the run, or its dict
+
+    Returns:
+        np.ndarray: float64 array of shape (generations, len(STATS))
+    """
+    if isinstance(report, genetics.AlgorithmReport):
+        report = report.to_dict()
+    curves = np.full((len(report['generations']), len(STATS)), np.nan)
+    for number, generation in enumerate(report['generations']):
+        fitnesses = generation_fitnesses(generation)
+        curves[number, 0] = generation['highest_fitness']
+        curves[number, 1] = generation['average_fitness']
+        if fitnesses.size > 0:
+            curves[number, 2:] = np.quantile(fitnesses, QUANTILES)
+    return curves
+
+class SweepStore:
+    """Per generation fitness statistics of every run of a sweep, kept as one array of shape
+        (runs, generations, len(STATS)) padded with NaN past the end of shorter runs.
+        Runs are added as they finish into a buffer that doubles along runs or generations
+        when full, so adding a run costs amortized O(its generations). The store is saved to a
+        single .npz file every save_every added runs, or every quarter of its runs once larger,
+        so the bytes written over a sweep stay linear in its size, and on flush or exit.
+        Aggregate queries never parse the run reports again
+
+    Args:
+        path (str, optional): .npz file the store is loaded from if it exists and saved to.
+            Defaults to None, in memory only.
+        save_every (int, optional): added runs between saves. Defaults to 16.
+    """
+    unknown_stat_msg = 'unknown stat "{stat}". Must be one of {stats}'
+
+    @classmethod
+    def load(cls, path: str) -> SweepStore:
+        return cls(path)
+
+    @classmethod
+    def from_reports(cls, paths: list[str], path: str=None) -> SweepStore:
+        """Store of report json files, keyed by file name without extension
+        """
+        store = cls(path)
+        for report_path in paths:
+            with open(report_path) as report_file:
+                report = json.load(report_file)
+            store.add(os.path.splitext(os.path.basename(report_path))[0], report, save=False)
+        if path is not None:
+            store.save()
+        return store
+
+    def __init__(self, path: str=None, save_every: int=16):
+        self.path = path
+        self.save_every = save_every
+        self.keys = []
+        self.parameters = []
+        self.rows = {}
+        self.buffer = np.full((16, 0, len(STATS)), np.nan)
+        self.buffer_lengths = np.zeros(16, dtype=np.int64)
+        self.generations = 0
+        self.unsaved = 0
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                self.keys = data['keys'].tolist()
+                self.parameters = json.loads(str(data['parameters']))
+                self.buffer = data['values'].copy()
+                self.buffer_lengths = data['lengths'].copy()
+            self.rows = {key: row for row, key in enumerate(self.keys)}
+            self.generations = self.buffer.shape[1]
+
+    def __enter__(self) -> SweepStore:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.buffer[:len(self), :self.generations]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.buffer_lengths[:len(self)]
+
+    def add(self, key: str, report: dict | genetics.AlgorithmReport, parameters: dict=None, save: bool=True):
+        """Add or replace the run key, saving the store periodically when it has a path
+
+        Args:
+            key (str): unique name of the run
+            report (dict | genetics.AlgorithmReport): report of the run, or its dict
+            parameters (dict, optional): json serializable parameters of the run. Defaults to None.
+            save (bool, optional): count the run towards save_every. Defaults to True.
+        """
+        self.add_curves(key, run_curves(report), parameters, save)
+
+    def add_curves(self, key: str, curves: np.ndarray, parameters: dict=None, save: bool=True):
+        """Add or replace the run key from its run_curves, e.g. computed in a worker process
+        """
+        if len(curves) > self.buffer.shape[1]:
+            capacity = max(len(curves), 2 * self.buffer.shape[1])
+            padding = np.full((len(self.buffer), capacity - self.buffer.shape[1], len(STATS)), np.nan)
+            self.buffer = np.concatenate([self.buffer, padding], axis=1)
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self)
+            if row == len(self.buffer):
+                added = max(len(self.buffer), 16)
+                self.buffer = np.concatenate([
+                    self.buffer, np.full((added, *self.buffer.shape[1:]), np.nan)])
+                self.buffer_lengths = np.concatenate([self.buffer_lengths, np.zeros(added, dtype=np.int64)])
+            self.rows[key] = row
+            self.keys.append(key)
+            self.parameters.append(parameters or {})
+        else:
+            self.parameters[row] = parameters or {}
+        self.buffer[row] = np.nan
+        self.buffer[row, :len(curves)] = curves
+        self.buffer_lengths[row] = len(curves)
+        self.generations = max(self.generations, len(curves))
+        if save and self.path is not None:
+            self.unsaved += 1
+            if self.unsaved >= max(self.save_every, len(self) // 4):
+                self.save()
+
+    def flush(self):
+        """Save runs added since the last save
+        """
+        if self.unsaved > 0 and self.path is not None:
+            self.save()
+
+    def save(self, path: str=None):
+        """Write the store, replacing the previous file only once fully written
+        """
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        partial = path + '.partial.npz'
+        np.savez(
+            partial, keys=np.array(self.keys, dtype=str), parameters=np.array(json.dumps(self.parameters)),
+            values=self.values, lengths=self.lengths)
+        os.replace(partial, path)
+        if path == self.path:
+            self.unsaved = 0
+
+    def select(self, **parameters) -> np.ndarray:
+        """Indices of the runs with the given parameter values
+        """
+        return np.array([
+            run for run, run_parameters in enumerate(self.parameters)
+            if all(run_parameters.get(name) == value for name, value in parameters.items())], dtype=np.int64)
+
+    def curves(self, stat: str='best', runs: np.ndarray=None) -> np.ndarray:
+        """Curves of a stat of shape (runs, generations). Past the end of shorter runs, best is
+            their final best, as a run that stopped keeps the best it found, and other stats are NaN
+        """
+        if stat not in STATS:
+            raise ValueError(self.unknown_stat_msg.format(stat=stat, stats=STATS))
+        curves = self.values[:, :, STATS.index(stat)]
+        if stat == 'best':
+            last = np.take_along_axis(curves, np.maximum(self.lengths - 1, 0)[:, None], axis=1)
+            ended = np.arange(curves.shape[1]) >= self.lengths[:, None]
+            curves = np.where(ended & (self.lengths[:, None] > 0), last, curves)
+        return curves if runs is None else curves[runs]
+
+    def mean_curve(self, stat: str='best', runs: np.ndarray=None) -> np.ndarray:
+        """Mean of a stat across runs at every generation: of every run for best, else over
+            the runs that reached it
+        """
+        curves = self.curves(stat, runs)
+        counts = (~np.isnan(curves)).sum(axis=0)
+        return np.where(counts > 0, np.nansum(curves, axis=0) / np.maximum(counts, 1), np.nan)
+
+    def reached(self, runs: np.ndarray=None) -> np.ndarray:
+        """Runs that reached every generation
+        """
+        lengths = self.lengths if runs is None else self.lengths[runs]
+        return (lengths[:, None] > np.arange(self.values.shape[1])).sum(axis=0)
+
+    def converged(self, generation: int, target: float=None) -> list[str]:
+        """Keys of the runs whose best fitness reached target by generation.
+            Without target, runs that found their final best by generation
+        """
+        best = np.fmax.accumulate(np.nan_to_num(self.curves('best'), nan=-np.inf), axis=1)
+        if best.shape[1] == 0:
+            return []
+        reached = best[:, min(generation, best.shape[1] - 1)]
+        goal = best[:, -1] if target is None else target
+        return [key for key, converged in zip(self.keys, reached >= goal) if converged]
+
+    def plot(self, stat: str='best', runs: np.ndarray=None, ax: any=None, label: str=None) -> any:
+        """Plot the mean curve of a stat with the range of the runs' curves shaded
+
+        Args:
+            stat (str, optional): one of STATS. Defaults to 'best'.
+            runs (np.ndarray, optional): indices of the runs plotted. Defaults to all.
+            ax (matplotlib.axes.Axes, optional): Defaults to a new figure's axes.
+            label (str, optional): legend label. Defaults to stat.
+
+        Returns:
+            matplotlib.axes.Axes: axes plotted on
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            _, ax = plt.subplots()
+        curves = self.curves(stat, runs)
+        generations = np.arange(curves.shape[1])
+        ax.plot(generations, self.mean_curve(stat, runs), label=label or stat)
+        if len(curves) > 1:
+            ax.fill_between(generations, np.nanmin(curves, axis=0), np.nanmax(curves, axis=0), alpha=0.2)
+        ax.set_xlabel('generation')
+        ax.set_ylabel('fitness')
+        return ax
@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from sims import cli
+from sims import sweeps
+
+class TestCli(unittest.TestCase):
+    def run_cli(self, *argv: str) -> str:
+        stream = io.StringIO()
+        self.assertEqual(cli.main(list(argv), stream), 0)
+        return stream.getvalue()
+
+    def test_parse_override(self):
+        self.assertEqual(cli.parse_override('frames=50'), ('frames', 50))
+        self.assertEqual(cli.parse_override('gravity=[0,-2]'), ('gravity', [0, -2]))
+        self.assertEqual(cli.parse_override('log_path=logs'), ('log_path', 'logs'))
+        actual = cli.build_config([cli.parse_override('frames=50')])
+        self.assertEqual(actual.frames, 50)
+
+    def test_emit(self):
+        rows = [{'engine': 'batch', 'seconds': 0.5}, {'engine': 'event', 'seconds': 0.25}]
+        stream = io.StringIO()
+        cli.emit(rows, cli.FORMAT_CSV, stream)
+        self.assertEqual(stream.getvalue(), 'engine,seconds\nbatch,0.5\nevent,0.25\n')
+        stream = io.StringIO()
+        cli.emit(rows, cli.FORMAT_JSON, stream)
+        self.assertEqual(json.loads(stream.getvalue()), rows)
+        stream = io.StringIO()
+        cli.emit(rows, cli.FORMAT_TEXT, stream)
+        self.assertEqual(stream.getvalue(), 'engine  seconds\nbatch   0.5\nevent   0.25\n')
+        stream = io.StringIO()
+        cli.emit(rows + [{'engine': 'kernel', 'error': 'TimeoutError'}], cli.FORMAT_CSV, stream)
+        self.assertEqual(stream.getvalue(), 'engine,seconds,error\nbatch,0.5,\nevent,0.25,\nkernel,,TimeoutError\n')
+
+    def test_train_resumes_from_checkpoints(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            argv = [
+                'train', '--generation-size', '8', '--generations', '2', '--courses', '2',
+                '--set', 'frames=100', '--checkpoint-dir', checkpoint_dir, '--format', 'json']
+            first = json.loads(self.run_cli(*argv, '--runs', '1'))
+            second = json.loads(self.run_cli(*argv, '--runs', '2'))
+            self.assertEqual(len(os.listdir(checkpoint_dir)), 3)
+            self.assertEqual([row['resumed'] for row in second], [True, False])
+            self.assertEqual(second[0]['best'], first[0]['best'])
+            self.assertEqual(first[0]['generations'], 2)
+
+            reports = sorted(
+                os.path.join(checkpoint_dir, name) for name in os.listdir(checkpoint_dir) if name.endswith('.json'))
+            summary = json.loads(self.run_cli('inspect-report', '--summary', '--format', 'json', *reports))
+            self.assertEqual([row['best'] for row in summary], [row['best'] for row in second])
+
+    def test_changed_spec_not_resumed(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            argv = [
+                'train', '--generation-size', '8', '--courses', '2', '--checkpoint-dir', checkpoint_dir,
+                '--format', 'json']
+            first = json.loads(self.run_cli(*argv, '--generations', '2', '--set', 'frames=100'))
+            second = json.loads(self.run_cli(*argv, '--generations', '3', '--set', 'frames=300'))
+            third = json.loads(self.run_cli(*argv, '--generations', '3', '--set', 'frames=300', '--eval-workers', '2'))
+            self.assertEqual([first[0]['resumed'], second[0]['resumed'], third[0]['resumed']], [False, False, True])
+            self.assertEqual(second[0]['generations'], 3)
+            self.assertEqual(len(sweeps.SweepStore.load(os.path.join(checkpoint_dir, cli.STORE_NAME))), 2)
+
+    def test_aggregate(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            self.run_cli(
+                'sweep', '--generation-sizes', '8', '--elitisms', '0', '2', '--runs', '2',
+                '--generations', '3', '--course-counts', '2', '--set', 'frames=100', '--checkpoint-dir', checkpoint_dir)
+            store = os.path.join(checkpoint_dir, cli.STORE_NAME)
+            plot = os.path.join(checkpoint_dir, 'best.png')
+            rows = json.loads(self.run_cli('aggregate', store, '--where', 'elitism=2', '--plot', plot, '--format', 'json'))
+            self.assertEqual([row['generation'] for row in rows], [0, 1, 2])
+            self.assertEqual([row['runs'] for row in rows], [2, 2, 2])
+            self.assertTrue(os.path.exists(plot))
+            rows = json.loads(self.run_cli('aggregate', store, '--converged-by', '2', '--format', 'json'))
+            self.assertEqual(len(rows), 4)
+
+    def test_train_stops_once_solved(self):
+        rows = json.loads(self.run_cli(
+            'train', '--generation-size', '20', '--generations', '5', '--courses', '2',
+            '--set', 'frames=30', '--format', 'json'))
+        self.assertLess(rows[0]['generations'], 5)
+        self.assertEqual(rows[0]['best'], 30)
+        self.assertEqual(rows[0]['termination'], 'target fitness 30')
+
+    def test_timed_out_runs_reported(self):
+        rows = json.loads(self.run_cli(
+            'train', '--generation-size', '8', '--generations', '2', '--courses', '2', '--runs', '2',
+            '--set', 'frames=100', '--timeout', '0.0001', '--format', 'json'))
+        self.assertEqual([row['seed'] for row in rows], [0, 1])
+        self.assertTrue(all(row['error'].startswith('TimeoutError') for row in rows))
+
+    def test_bench(self):
+        rows = json.loads(self.run_cli(
+            'bench', '--population', '10', '--courses', '2', '--set', 'frames=100', '--format', 'json'))
+        self.assertEqual([row['engine'] for row in rows], list(cli.ENGINES))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import pickle
+import queue
+import tempfile
+import threading
+import time
+import unittest
+
+from sims import jobs
+
+def square(value: int) -> int:
+    return value * value
+
+def nap(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+def fail(value: int):
+    raise ArithmeticError(value)
+
+class TestJobQueue(unittest.TestCase):
+    def test_results(self):
+        with jobs.JobQueue(3) as job_queue:
+            futures = [job_queue.submit(square, (value,)) for value in range(10)]
+            actual = [future.result() for future in futures]
+        self.assertListEqual(actual, [value * value for value in range(10)])
+
+    def test_process_map(self):
+        reported = []
+        with jobs.JobQueue(2, kind=jobs.JobQueue.PROCESS) as job_queue:
+            actual = job_queue.map(square, range(6), on_result=lambda item, result: reported.append((item, result)))
+        self.assertListEqual(actual, [0, 1, 4, 9, 16, 25])
+        self.assertListEqual(sorted(reported), list(zip(range(6), actual)))
+
+    def test_backpressure_and_cancellation(self):
+        release = threading.Event()
+        with jobs.JobQueue(1, max_pending=1) as job_queue:
+            running = job_queue.submit(release.wait)
+            held = job_queue.submit(square, (2,))
+            time.sleep(0.1)
+            waiting = job_queue.submit(square, (3,))
+            with self.assertRaises(queue.Full):
+                job_queue.submit(square, (4,), block=False)
+            self.assertTrue(waiting.cancel())
+            release.set()
+            self.assertTrue(running.result())
+            self.assertEqual(held.result(), 4)
+        self.assertTrue(waiting.cancelled())
+
+    def test_timeout(self):
+        release = threading.Event()
+        with jobs.JobQueue(1) as job_queue:
+            future = job_queue.submit(release.wait, timeout=0.05)
+            with self.assertRaises(TimeoutError):
+                future.result()
+            release.set()
+            self.assertEqual(job_queue.submit(square, (5,), timeout=1).result(), 25)
+
+    def test_process_timeout(self):
+        start = time.perf_counter()
+        with jobs.JobQueue(1, kind=jobs.JobQueue.PROCESS) as job_queue:
+            actual = job_queue.map(time.sleep, [3, 0], timeout=0.3, return_exceptions=True)
+            self.assertEqual(job_queue.submit(square, (5,)).result(), 25)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertIsInstance(actual[0], TimeoutError)
+        self.assertIsNone(actual[1])
+
+    def test_process_timeout_restarts_others(self):
+        with jobs.JobQueue(2, kind=jobs.JobQueue.PROCESS) as job_queue:
+            stuck = job_queue.submit(time.sleep, (3,), timeout=0.3)
+            other = job_queue.submit(nap, (0.6,))
+            with self.assertRaises(TimeoutError):
+                stuck.result()
+            self.assertEqual(other.result(), 0.6)
+
+    def test_map_failure(self):
+        with jobs.JobQueue(1) as job_queue:
+            with self.assertRaises(ArithmeticError):
+                job_queue.map(fail, [1, 2])
+        with self.assertRaises(ValueError):
+            job_queue.submit(square, (1,))
+
+    def test_journal_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'jobs.db')
+            journal = jobs.Journal(path)
+            journal.add('square', pickle.dumps((square, (3,), {}, None)))
+            journal.add('square', pickle.dumps((square, (4,), {}, None)))
+            journal.update(1, jobs.Journal.DONE)
+            journal.close()
+            with jobs.JobQueue(2, journal=path) as job_queue:
+                actual = [future.result() for future in job_queue.resume()]
+                failed = job_queue.submit(fail, (1,))
+                with self.assertRaises(ArithmeticError):
+                    failed.result()
+            self.assertListEqual(actual, [16])
+            journal = jobs.Journal(path)
+            self.assertDictEqual(journal.states(), {1: 'done', 2: 'done', 3: 'failed'})
+            journal.close()
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            jobs.JobQueue(0)
+        with self.assertRaises(ValueError):
+            jobs.JobQueue(1, kind='cluster')
+
+if __name__ == '__main__':
+    unittest.main()
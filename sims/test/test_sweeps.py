@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from sims import sweeps
+from sims.agents import genetics
+
+def report(best: list[float], summary: bool=False) -> dict:
+    """Report dict of a run whose generations have fitnesses 0 to best"""
+    generations = []
+    for highest in best:
+        fitnesses = np.linspace(0, highest, 11)
+        generation = (
+            genetics.GenerationSummary(fitnesses, highest, fitnesses.mean()) if summary
+            else genetics.GenerationReport(
+                [genetics.IndividualReport('0', None, fitness) for fitness in fitnesses],
+                highest, fitnesses.mean()))
+        generations.append(generation)
+    return genetics.AlgorithmReport(generations, 1.0).to_dict()
+
+class TestSweepStore(unittest.TestCase):
+    def setUp(self):
+        self.store = sweeps.SweepStore()
+        self.store.add('a', report([10, 20, 40]), {'elitism': 0})
+        self.store.add('b', report([30, 30], summary=True), {'elitism': 2})
+
+    def test_run_curves(self):
+        actual = sweeps.run_curves(report([10]))
+        np.testing.assert_allclose(actual, [[10, 5, 1, 5, 9]])
+
+    def test_queries(self):
+        np.testing.assert_array_equal(self.store.curves('best')[1], [30, 30, 30])
+        np.testing.assert_array_equal(self.store.curves('mean')[1, 2], np.nan)
+        np.testing.assert_array_equal(self.store.mean_curve('best'), [20, 25, 35])
+        np.testing.assert_array_equal(self.store.reached(), [2, 2, 1])
+        np.testing.assert_array_equal(self.store.lengths, [3, 2])
+        np.testing.assert_array_equal(self.store.select(elitism=2), [1])
+        self.assertEqual(self.store.converged(0), ['b'])
+        self.assertEqual(self.store.converged(1, target=20), ['a', 'b'])
+        self.assertEqual(self.store.converged(5, target=35), ['a'])
+        with self.assertRaises(ValueError):
+            self.store.curves('worst')
+
+    def test_replace(self):
+        self.store.add('b', report([50]), {'elitism': 2})
+        self.assertEqual(len(self.store), 2)
+        np.testing.assert_array_equal(self.store.curves('best')[1], [50, 50, 50])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sweep.npz')
+            with sweeps.SweepStore(path) as store:
+                store.add('a', report([10, 20, 40]), {'elitism': 0})
+                store.add('b', report([30, 30]), {'elitism': 2})
+            actual = sweeps.SweepStore.load(path)
+            self.assertEqual(actual.keys, ['a', 'b'])
+            self.assertEqual(actual.parameters, [{'elitism': 0}, {'elitism': 2}])
+            np.testing.assert_array_equal(actual.values, store.values)
+            self.assertListEqual(sorted(os.listdir(directory)), ['sweep.npz'])
+
+    def test_save_every(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sweep.npz')
+            store = sweeps.SweepStore(path, save_every=2)
+            store.add('a', report([10]))
+            self.assertFalse(os.path.exists(path))
+            store.add('b', report([20]))
+            self.assertEqual(len(sweeps.SweepStore.load(path)), 2)
+            store.add('c', report([30]))
+            self.assertEqual(len(sweeps.SweepStore.load(path)), 2)
+            store.flush()
+            self.assertEqual(len(sweeps.SweepStore.load(path)), 3)
+
+    def test_add_to_empty_saved_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sweep.npz')
+            sweeps.SweepStore(path).save()
+            with sweeps.SweepStore(path) as store:
+                store.add('a', report([10, 20]))
+            np.testing.assert_array_equal(sweeps.SweepStore.load(path).curves('best'), [[10, 20]])
+
+    def test_growth(self):
+        store = sweeps.SweepStore()
+        lengths = np.random.default_rng(0).integers(1, 40, size=50)
+        for run, length in enumerate(lengths):
+            store.add(f'run_{run}', report(list(range(length))))
+        self.assertEqual(store.values.shape, (50, lengths.max(), len(sweeps.STATS)))
+        np.testing.assert_array_equal(store.lengths, lengths)
+        np.testing.assert_array_equal(store.curves('best', [7])[0, :lengths[7]], np.arange(lengths[7]))
+        self.assertTrue(np.isnan(store.curves('mean')[7, lengths[7]:]).all())
+        self.assertEqual(store.select().tolist(), list(range(50)))
+
+    def test_from_reports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, best in [('run_0', [10, 20]), ('run_1', [5])]:
+                paths.append(os.path.join(directory, f'{name}.json'))
+                genetics.AlgorithmReport(
+                    [genetics.GenerationSummary(np.array([fitness]), fitness, fitness) for fitness in best],
+                    1.0).to_json(paths[-1])
+            store = sweeps.SweepStore.from_reports(paths)
+            self.assertEqual(store.keys, ['run_0', 'run_1'])
+            np.testing.assert_array_equal(store.mean_curve('median'), [7.5, 20])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from sims import visualize as vis
+from sims.environments import hurdles
+
+class SlowRenderer:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.frame_numbers = []
+        self.closed = False
+
+    def __call__(self, snapshot: vis.FrameSnapshot):
+        time.sleep(self.delay)
+        self.frame_numbers.append(snapshot.frame_number)
+
+    def close(self):
+        self.closed = True
+
+class TestLiveViewer(unittest.TestCase):
+    def test_publish_never_blocks(self):
+        renderer = SlowRenderer(0.05)
+        with vis.LiveViewer(render=renderer, fps=1000, maxsize=2) as viewer:
+            start = time.perf_counter()
+            for frame_number in range(200):
+                viewer.publish(vis.FrameSnapshot(frame_number, []))
+            elapsed = time.perf_counter() - start
+            time.sleep(0.2)
+        self.assertLess(elapsed, 0.05)
+        self.assertGreater(viewer.dropped, 0)
+        self.assertEqual(viewer.published, 200)
+        self.assertGreater(len(renderer.frame_numbers), 0)
+        self.assertEqual(renderer.frame_numbers, sorted(renderer.frame_numbers))
+        self.assertTrue(renderer.closed)
+
+    def test_simulation_publishes(self):
+        renderer = SlowRenderer(0)
+        hurdlers = [hurdles.ProximityHurdler(100), hurdles.ProximityHurdler(0)]
+        with vis.LiveViewer(render=renderer, fps=1000, maxsize=1000) as viewer:
+            sim = hurdles.Simulation(hurdlers, [hurdles.Hurdle()], viewer=viewer)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(100):
+                    sim.main()
+            self.assertIsNone(sim.ui)
+            self.assertEqual(len(sim.frames), 0)
+        self.assertEqual(viewer.published, 100)
+        last = sim.frame_snapshot()
+        self.assertEqual([len(positions) for positions, *_ in last.layers], [1, 1])
+
+class TestUi(unittest.TestCase):
+    def test_render(self):
+        ui = vis.Ui((8, 6))
+        snapshot = vis.FrameSnapshot(0, [(np.array([[1, 0]]), 2, 3, 2)])
+        frame = ui.render(snapshot)
+        self.assertEqual(frame.shape, (6, 8, 3))
+        actual = np.argwhere((frame == vis.Ui.PIXEL_MAP[2]).all(axis=2))
+        expected = np.array([[3, 1], [3, 2], [4, 1], [4, 2], [5, 1], [5, 2]])
+        np.testing.assert_array_equal(actual, expected)
+
+class TestSideEffects(unittest.TestCase):
+    def test_import_is_lazy_and_pure(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        with tempfile.TemporaryDirectory() as cwd:
+            loaded = subprocess.run(
+                [sys.executable, '-c', (
+                    'import sys; import sims.agents.hurdler, sims.environments.trace; '
+                    'print(sorted({"cv2", "matplotlib", "unittest"} & set(sys.modules)))')],
+                cwd=cwd, env={**os.environ, 'PYTHONPATH': root},
+                capture_output=True, text=True, check=True).stdout.strip()
+            self.assertEqual(loaded, '[]')
+            self.assertListEqual(os.listdir(cwd), [])
+
+    def test_cv_keeps_out_path(self):
+        with tempfile.TemporaryDirectory() as out_path:
+            kept = os.path.join(out_path, 'kept.avi')
+            open(kept, 'w').close()
+            vis.Cv((8, 6), out_path)
+            vis.Cv((8, 6), os.path.join(out_path, 'new'))
+            self.assertTrue(os.path.exists(kept))
+            self.assertFalse(os.path.exists(os.path.join(out_path, 'new')))
+
+if __name__ == '__main__':
+    unittest.main()
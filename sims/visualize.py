@@ -1,23 +1,67 @@
 from __future__ import annotations
 import logging
 import os
+import queue
+import threading
+import time
 
-import cv2 as cv
 import numpy as np
 
-from settings import Settings
-from sims.environments import common
+from settings import DEFAULT_CONFIG
 
-if not os.path.isdir(Settings.log_path):
-    os.makedirs(Settings.log_path)
-logging.basicConfig(
-    filename=os.path.join(Settings.log_path, 'environment.log'),
-    format='%(asctime)s %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    encoding='utf-8',
-    level=logging.DEBUG)
+# OpenCV is imported by the functions that draw or encode, so importing this module
+# (and every environment using it) does not load it, and nothing is written on import
+logger = logging.getLogger(__name__)
+
+def configure_logging(log_path: str=DEFAULT_CONFIG.log_path):
+    """Log to environment.log in log_path. Called by entry points, not on import
+    """
+    os.makedirs(log_path, exist_ok=True)
+    logging.basicConfig(
+        filename=os.path.join(log_path, 'environment.log'),
+        format='%(asctime)s %(levelname)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S',
+        encoding='utf-8',
+        level=logging.DEBUG)
+
+def write_video(path: str, images, fps: int, frame_size: tuple[int, int]=None):
+    """Encode display oriented RGB images (see Ui.render) to video
+
+    Args:
+        path (str): output video path
+        images (iterable[np.ndarray]): uint8 images of shape (height, width, 3)
+        fps (int): frames per second
+        frame_size (tuple[int, int], optional): output (width, height). Defaults to size of first image.
+    """
+    import cv2 as cv
+    writer = None
+    for image in images:
+        if writer is None:
+            if frame_size is None:
+                frame_size = (image.shape[1], image.shape[0])
+            writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*"FMP4"), fps, tuple(frame_size))
+        image = cv.resize(image, tuple(frame_size))
+        writer.write(cv.cvtColor(image, cv.COLOR_RGB2BGR))
+    if writer is not None:
+        writer.release()
+
+class FrameSnapshot:
+    """Compact copy of one frame published to a LiveViewer
+
+    Args:
+        frame_number (int): frame number
+        layers (list[tuple[np.ndarray, int, int, int]]): (positions, width, height, color)
+            of each kind of gameobject. positions has shape (gameobjects, 2)
+    """
+    __slots__ = ('frame_number', 'layers')
+
+    def __init__(self, frame_number: int, layers: list[tuple[np.ndarray, int, int, int]]):
+        self.frame_number = frame_number
+        self.layers = layers
 
 class Ui:
+    PIXEL_MAP = [(179, 232, 211), (0, 0, 0), (84, 98, 107), (209, 196, 50)]
+
     def __init__(self, size):
         self.shape = size
 
@@ -33,13 +77,120 @@ class Ui:
     def get_empty(self):
         return np.zeros(self.shape, dtype=object)
 
+    def render(self, snapshot: FrameSnapshot) -> np.ndarray:
+        """Render snapshot straight to a display oriented RGB image
+
+        Returns:
+            np.ndarray: uint8 image of shape (height, width, 3)
+        """
+        frame = np.empty((*self.shape, 3), dtype=np.uint8)
+        frame[:] = self.PIXEL_MAP[0]
+        for positions, width, height, color in snapshot.layers:
+            for x, y in positions.astype(int):
+                frame[max(x, 0): x + width, max(y, 0): y + height] = self.PIXEL_MAP[color]
+        return np.flip(frame.transpose((1, 0, 2)), axis=0)
+
+class CvWindow(Ui):
+    """Renders FrameSnapshots to an OpenCV window
+    """
+    def __init__(self, size, name: str='sims'):
+        super().__init__(size)
+        self.name = name
+
+    def __call__(self, snapshot: FrameSnapshot):
+        import cv2 as cv
+        frame = cv.cvtColor(self.render(snapshot), cv.COLOR_RGB2BGR)
+        cv.imshow(self.name, frame)
+        cv.waitKey(1)
+
+    def close(self):
+        import cv2 as cv
+        cv.destroyWindow(self.name)
+
+class LiveViewer:
+    """Renders published FrameSnapshots on a daemon thread at no more than fps.
+        publish never blocks: when the bounded queue is full the oldest snapshot is dropped,
+        so a slow renderer can not slow down the simulation
+
+    Args:
+        render (callable, optional): called with each rendered FrameSnapshot.
+            Defaults to a CvWindow of DEFAULT_CONFIG.map_shape.
+        fps (int, optional): maximum render rate. Defaults to DEFAULT_CONFIG.live_fps.
+        maxsize (int, optional): queue size. Defaults to 2.
+    """
+    def __init__(self, render: callable=None, fps: int=None, maxsize: int=2):
+        self.render = render or CvWindow(DEFAULT_CONFIG.map_shape)
+        self.fps = fps or DEFAULT_CONFIG.live_fps
+        self.queue = queue.Queue(maxsize)
+        self.published = 0
+        self.dropped = 0
+        self.rendered = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if hasattr(self.render, 'close'):
+            self.render.close()
+
+    def publish(self, snapshot: FrameSnapshot):
+        self.published += 1
+        try:
+            self.queue.put_nowait(snapshot)
+            return
+        except queue.Full:
+            pass
+        try:
+            self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.dropped += 1
+        try:
+            self.queue.put_nowait(snapshot)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        period = 1 / self.fps
+        while not self._stop.is_set():
+            try:
+                snapshot = self.queue.get(timeout=period)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            try:
+                self.render(snapshot)
+            except Exception as err:
+                logger.error(f'live viewer failed to render frame {snapshot.frame_number}: {err}')
+                return
+            self.rendered += 1
+            remaining = period - (time.perf_counter() - start)
+            if remaining > 0:
+                self._stop.wait(remaining)
+
 class Cv(Ui):
+    """Collects drawn frames and encodes them to cv_visual.avi in out_path. out_path is
+        created when the video is written and existing files in it are left in place
+    """
     # TODO: frame save path, video save path
-    PIXEL_MAP = [(179, 232, 211), (0, 0, 0), (84, 98, 107), (209, 196, 50)]
     def __init__(self, size, out_path):
         super().__init__(size)
         self.out_path = out_path
-        common.build_path(self.out_path)
 
     def convert(self, frame: np.ndarray):
         converted = np.zeros((*frame.shape, 3))
@@ -49,8 +200,10 @@ class Cv(Ui):
 
     # TODO: Make pass output file name. Pass load file name.
     def to_video(self, frames, fps, frame_size=None):
+        import cv2 as cv
         if frame_size is None:
             frame_size = self.shape
+        os.makedirs(self.out_path, exist_ok=True)
         writer = cv.VideoWriter(
             os.path.join(self.out_path, 'cv_visual.avi'),
             cv.VideoWriter_fourcc(*"FMP4"),
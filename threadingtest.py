@@ -5,11 +5,11 @@ import msvcrt
 import os
 import logging
 
-from settings import Settings
+from settings import DEFAULT_CONFIG
 
-if not os.path.isdir(Settings.log_path):
-    os.makedirs(Settings.log_path)
-log_file_path = os.path.join(Settings.log_path, 'threadtest.log')
+if not os.path.isdir(DEFAULT_CONFIG.log_path):
+    os.makedirs(DEFAULT_CONFIG.log_path)
+log_file_path = os.path.join(DEFAULT_CONFIG.log_path, 'threadtest.log')
 if os.path.isfile(log_file_path):
     os.remove(log_file_path)
 logging.basicConfig(